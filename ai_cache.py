@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+BriefCard - AI 分析快取
+以內容雜湊為鍵快取 analyze_content 結果，避免重複呼叫 LLM
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CachedAIService:
+    """
+    包裝任一 AI 服務的 analyze_content，結果依
+    (provider, model, prompt 版本, 標題, 截斷後內容) 的雜湊快取
+    """
+
+    def __init__(self, service, provider: str, max_entries: int = 1000,
+                 ttl: int = 86400, content_chars: int = 3000):
+        self.service = service
+        self.provider = provider
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.content_chars = content_chars
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getattr__(self, name: str):
+        # 其餘方法（generate_summary 等）直接委派給底層服務
+        return getattr(self.service, name)
+
+    def cache_key(self, title: str, content: str) -> str:
+        """計算快取鍵"""
+        payload = json.dumps([
+            self.provider,
+            getattr(self.service, "model", ""),
+            getattr(self.service, "prompt_version", getattr(self.service, "PROMPT_VERSION", "")),
+            title or "",
+            (content or "")[:self.content_chars]
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def analyze_content(self, title: str, content: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        綜合分析內容（帶快取）
+
+        Args:
+            refresh: True 時略過快取重新分析，並以新結果覆寫快取
+        """
+        key = self.cache_key(title, content)
+
+        if not refresh:
+            cached = self._get(key)
+            if cached is not None:
+                self.hits += 1
+                logger.info(f"🗃️ AI 分析快取命中: {title[:50]}")
+                return cached
+
+        self.misses += 1
+        result = await self.service.analyze_content(title, content)
+
+        # 摘要失敗的結果不快取，下次仍會重新嘗試
+        if result and result.get("summary"):
+            self._set(key, result)
+
+        return result
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return {**value, "keywords": list(value.get("keywords", []))}
+
+    def _set(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = (time.time() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """清空快取"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "provider": self.provider,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions
+        }
+
+    async def close(self):
+        await self.service.close()
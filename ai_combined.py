@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 合併式 AI 分析
+以單一結構化（JSON）回應同時取得摘要、關鍵詞與分類
+"""
+
+import json
+import logging
+import re
+from typing import Optional, Dict, Any
+
+from pydantic import ValidationError
+
+from models import AIAnalysisResult, ContentCategory
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_VALUES = [category.value for category in ContentCategory]
+
+# 要求模型回傳的 JSON Schema
+ANALYSIS_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "keywords": {"type": "array", "items": {"type": "string"}},
+        "category": {"type": "string", "enum": CATEGORY_VALUES}
+    },
+    "required": ["summary", "keywords", "category"],
+    "additionalProperties": False
+}
+
+def build_combined_prompt(title: str, content: str, max_length: int = 200, max_keywords: int = 5) -> str:
+    """建立合併分析提示詞"""
+    return f"""請分析以下網頁內容，並只回傳一個 JSON 物件，格式如下：
+{{"summary": "...", "keywords": ["...", "..."], "category": "..."}}
+
+要求：
+1. summary：簡潔的中文摘要，{max_length} 字以內，突出重點資訊；新聞請提到時間、地點、人物，產品請提到主要功能和特色
+2. keywords：{max_keywords} 個最能代表核心主題的中文關鍵詞，每個 2-4 個字
+3. category：從以下類別中選擇一個：{"、".join(CATEGORY_VALUES)}
+4. 不要輸出 JSON 以外的任何文字
+
+標題：{title}
+
+內容：
+{content}"""
+
+def json_response_format(kind: str) -> Optional[Dict[str, Any]]:
+    """
+    建立 chat completions 的 response_format 參數
+
+    Args:
+        kind: json_schema（OpenAI 相容的結構化輸出）、json_object 或 none
+    """
+    if kind == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "bookmark_analysis", "strict": True, "schema": ANALYSIS_JSON_SCHEMA}
+        }
+    if kind == "json_object":
+        return {"type": "json_object"}
+    return None
+
+def normalize_category(category: str) -> str:
+    """將模型回傳的分類對應到 ContentCategory"""
+    category = (category or "").strip()
+    if category in CATEGORY_VALUES:
+        return category
+    for value in CATEGORY_VALUES:
+        if value in category or (category and category in value):
+            return value
+    return ContentCategory.OTHER.value
+
+def parse_combined_response(response: Optional[str], max_length: int = 200, max_keywords: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    解析並驗證合併分析的回應
+
+    Returns:
+        與 analyze_content 相同格式的字典，或 None 表示解析失敗
+    """
+    if not response:
+        return None
+
+    # 容忍模型包上 ```json 區塊或前後多餘文字
+    match = re.search(r"\{.*\}", response, re.DOTALL)
+    if not match:
+        logger.warning("⚠️ 合併分析回應不含 JSON")
+        return None
+
+    try:
+        data = json.loads(match.group(0))
+        if isinstance(data.get("keywords"), str):
+            data["keywords"] = [kw.strip() for kw in re.split(r"[,，、]", data["keywords"]) if kw.strip()]
+        result = AIAnalysisResult(**data)
+    except (ValueError, TypeError, AttributeError, ValidationError) as e:
+        logger.warning(f"⚠️ 合併分析回應解析失敗: {e}")
+        return None
+
+    summary = (result.summary or "").strip()
+    if not summary:
+        return None
+    if len(summary) > max_length:
+        summary = summary[:max_length-3] + "..."
+
+    return {
+        "summary": summary,
+        "keywords": [kw.strip() for kw in result.keywords if kw.strip()][:max_keywords],
+        "category": normalize_category(result.category)
+    }
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 多提供者 AI 路由
+依設定順序嘗試多個 AI 服務，記錄各提供者的健康分數並以斷路器略過故障者；
+主要提供者超過其 p95 延遲仍未回應時，可對下一個提供者發出對沖請求，先成功者勝出
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from config import settings
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# 斷路器狀態
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+EMPTY_ANALYSIS = {"summary": None, "keywords": [], "category": "其他"}
+
+class ProviderState:
+    """單一提供者的健康狀態、斷路器與每日額度"""
+
+    def __init__(self, name: str, service, daily_budget: int = 0,
+                 failure_threshold: int = 3, cooldown: float = 60.0):
+        self.name = name
+        self.service = service
+        self.daily_budget = daily_budget
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.health = 1.0  # 成功率的指數移動平均
+        self.consecutive_failures = 0
+        self.circuit = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.latency = LatencyWindow(200)
+
+        self._day = datetime.utcnow().strftime("%Y-%m-%d")
+        self.used_today = 0
+        self.counters = {"requests": 0, "successes": 0, "failures": 0, "timeouts": 0, "cancelled": 0, "wins": 0}
+
+    def available(self) -> bool:
+        """斷路器未開啟（或冷卻結束可試探）且仍有每日額度"""
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        if day != self._day:
+            self._day = day
+            self.used_today = 0
+        if self.daily_budget and self.used_today >= self.daily_budget:
+            return False
+
+        if self.circuit == CIRCUIT_OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.circuit = CIRCUIT_HALF_OPEN
+            logger.info(f"🔌 {self.name} 斷路器冷卻結束，允許試探請求")
+        # 半開時只允許一個試探請求
+        return not (self.circuit == CIRCUIT_HALF_OPEN and self.in_flight)
+
+    def record(self, success: bool, elapsed: float):
+        self.health = 0.8 * self.health + 0.2 * (1.0 if success else 0.0)
+        if success:
+            self.counters["successes"] += 1
+            self.latency.add(elapsed)
+            self.consecutive_failures = 0
+            if self.circuit != CIRCUIT_CLOSED:
+                logger.info(f"✅ {self.name} 恢復正常，關閉斷路器")
+            self.circuit = CIRCUIT_CLOSED
+            return
+
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        if self.circuit == CIRCUIT_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.circuit != CIRCUIT_OPEN:
+                logger.warning(f"⚠️ {self.name} 連續失敗 {self.consecutive_failures} 次，開啟斷路器 {self.cooldown:.0f}s")
+            self.circuit = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "health": round(self.health, 3),
+            "circuit": self.circuit,
+            "consecutive_failures": self.consecutive_failures,
+            "in_flight": self.in_flight,
+            "used_today": self.used_today,
+            "daily_budget": self.daily_budget,
+            **self.counters,
+            "latency": self.latency.summary()
+        }
+
+class AIRouter:
+    """多提供者 AI 服務路由（介面與單一 AI 服務相同）"""
+
+    def __init__(self, providers: List[Tuple[str, Any]], hedge: bool = True,
+                 hedge_delay: float = 8.0, hedge_min_samples: int = 20,
+                 attempt_timeout: float = 20.0, budgets: Optional[Dict[str, int]] = None,
+                 failure_threshold: int = 3, cooldown: float = 60.0):
+        budgets = budgets or {}
+        self.providers = [
+            ProviderState(name, service, budgets.get(name, 0), failure_threshold, cooldown)
+            for name, service in providers
+        ]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.attempt_timeout = attempt_timeout
+        self.counters = {"requests": 0, "hedged": 0, "failovers": 0, "exhausted": 0}
+
+    @property
+    def model(self) -> str:
+        return ",".join(f"{state.name}:{getattr(state.service, 'model', '')}" for state in self.providers)
+
+    @property
+    def prompt_version(self) -> str:
+        return ",".join(
+            str(getattr(state.service, "prompt_version", getattr(state.service, "PROMPT_VERSION", "")))
+            for state in self.providers
+        )
+
+    def _candidates(self) -> List[ProviderState]:
+        """可用的提供者：依設定順序，健康分數偏低者排到後面"""
+        available = [state for state in self.providers if state.available()]
+        return sorted(available, key=lambda state: state.health < 0.5)
+
+    def _hedge_after(self, state: ProviderState) -> float:
+        """對沖等待時間：樣本足夠時使用該提供者的 p95 延遲"""
+        p95 = state.latency.percentile(0.95) if len(state.latency) >= self.hedge_min_samples else None
+        return max(1.0, min(p95 if p95 is not None else self.hedge_delay, self.attempt_timeout))
+
+    async def _call(self, state: ProviderState, title: str, content: str) -> Optional[Dict[str, Any]]:
+        """呼叫單一提供者；失敗或沒有摘要時回傳 None（被對沖取消時不計為失敗）"""
+        state.in_flight += 1
+        state.used_today += 1
+        state.counters["requests"] += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(state.service.analyze_content(title, content), self.attempt_timeout)
+            success = bool(result and result.get("summary"))
+        except asyncio.TimeoutError:
+            state.counters["timeouts"] += 1
+            logger.warning(f"⏳ {state.name} 分析逾時 ({self.attempt_timeout:.0f}s)")
+            result, success = None, False
+        except asyncio.CancelledError:
+            state.counters["cancelled"] += 1
+            raise
+        except Exception as e:
+            logger.error(f"❌ {state.name} 分析失敗: {e}")
+            result, success = None, False
+        finally:
+            state.in_flight -= 1
+
+        state.record(success, time.monotonic() - started)
+        return result if success else None
+
+    async def analyze_content(self, title: str, content: str) -> Dict[str, Any]:
+        """
+        依序嘗試提供者直到取得摘要
+
+        主要提供者超過對沖等待時間仍未回應時，同時對下一個提供者發出請求（每次分析最多對沖一次）；
+        請求失敗時改用下一個提供者
+        """
+        self.counters["requests"] += 1
+        candidates = self._candidates()
+        if not candidates:
+            self.counters["exhausted"] += 1
+            logger.error("❌ 沒有可用的 AI 提供者（斷路器開啟或額度用盡）")
+            return dict(EMPTY_ANALYSIS)
+
+        pending: Dict[asyncio.Task, ProviderState] = {}
+        next_index = 0
+        hedged = False
+
+        def launch():
+            nonlocal next_index
+            state = candidates[next_index]
+            next_index += 1
+            pending[asyncio.create_task(self._call(state, title, content))] = state
+
+        launch()
+        try:
+            while pending:
+                can_hedge = self.hedge and not hedged and len(pending) == 1 and next_index < len(candidates)
+                timeout = self._hedge_after(next(iter(pending.values()))) if can_hedge else None
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    self.counters["hedged"] += 1
+                    logger.info(f"🔀 {next(iter(pending.values())).name} 超過 {timeout:.1f}s 未回應，對沖至 {candidates[next_index].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    state = pending.pop(task)
+                    result = task.result()
+                    if result:
+                        state.counters["wins"] += 1
+                        return result
+
+                if not pending and next_index < len(candidates):
+                    self.counters["failovers"] += 1
+                    logger.warning(f"↪️ 改用下一個 AI 提供者: {candidates[next_index].name}")
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self.counters["exhausted"] += 1
+        logger.error("❌ 所有 AI 提供者都無法完成分析")
+        return dict(EMPTY_ANALYSIS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "providers": {state.name: state.stats() for state in self.providers}
+        }
+
+    async def close(self):
+        for state in self.providers:
+            await state.service.close()
+
+def parse_budgets(value: str) -> Dict[str, int]:
+    """解析 "openrouter:200,deepseek:1000" 格式的每日額度設定"""
+    budgets = {}
+    for item in (value or "").split(","):
+        name, _, amount = item.partition(":")
+        if name.strip() and amount.strip().isdigit():
+            budgets[name.strip().lower()] = int(amount)
+    return budgets
+
+def create_ai_router(providers: List[Tuple[str, Any]]) -> AIRouter:
+    """根據配置建立 AI 路由"""
+    return AIRouter(
+        providers,
+        hedge=settings.ai_router_hedge,
+        hedge_delay=settings.ai_router_hedge_delay,
+        attempt_timeout=settings.ai_router_attempt_timeout,
+        budgets=parse_budgets(settings.ai_router_budgets),
+        failure_threshold=settings.ai_router_failure_threshold,
+        cooldown=settings.ai_router_cooldown
+    )
@@ -6,16 +6,28 @@ BriefCard - AI 摘要服務
 
 import httpx
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 import json
 
 from config import settings
+from ai_combined import build_combined_prompt, json_response_format, parse_combined_response
+from content_prep import prepare_content, prompt_token_budget
+from rate_limiter import llm_rate_limiter
+from ai_stream import stream_chat_completion, collect_stream, partial_json_summary
 
 logger = logging.getLogger(__name__)
 
 class AIService:
     """AI 摘要服務類"""
     
+    # 提示詞版本，修改提示詞時需遞增以讓 AI 分析快取失效
+    PROMPT_VERSION = "2"
+    
+    @property
+    def prompt_version(self) -> str:
+        """含分析模式的提示詞版本（作為快取鍵的一部分）"""
+        return f"{self.PROMPT_VERSION}-{settings.ai_analysis_mode}"
+    
     def __init__(self):
         """初始化 AI 服務"""
         self.api_key = settings.deepseek_api_key
@@ -46,6 +58,7 @@ class AIService:
         
         try:
             # 構建提示詞
+            prepared_content = prepare_content(title, content, self.model, prompt_token_budget("summary"))
             prompt = f"""請為以下網頁內容生成一個簡潔的中文摘要，要求：
 
 1. 摘要長度控制在 {max_length} 字以內
@@ -57,12 +70,16 @@ class AIService:
 標題：{title}
 
 內容：
-{content[:3000]}  # 限制輸入長度避免超過 token 限制
+{prepared_content}
 
 請生成摘要："""
 
             # 調用 DeepSeek API
-            response = await self._call_deepseek_api(prompt, max_tokens=300)
+            # 串流模式下摘要超過長度即提前結束，第一句完成時先提供預覽
+            if settings.ai_streaming:
+                response = await collect_stream(self._stream_deepseek_api(prompt, max_tokens=300), max_length)
+            else:
+                response = await self._call_deepseek_api(prompt, max_tokens=300)
             
             if response:
                 summary = response.strip()
@@ -93,6 +110,7 @@ class AIService:
         """
         
         try:
+            prepared_content = prepare_content(title, content, self.model, prompt_token_budget("keywords"))
             prompt = f"""請從以下網頁內容中提取 {max_keywords} 個最重要的中文關鍵詞，要求：
 
 1. 關鍵詞要能代表內容的核心主題
@@ -103,7 +121,7 @@ class AIService:
 標題：{title}
 
 內容：
-{content[:2000]}
+{prepared_content}
 
 關鍵詞："""
 
@@ -132,6 +150,7 @@ class AIService:
         """
         
         try:
+            prepared_content = prepare_content(title, content, self.model, prompt_token_budget("category"))
             prompt = f"""請將以下網頁內容分類到最合適的類別中，從以下類別中選擇一個：
 
 技術/科技、新聞時事、商業財經、娛樂休閒、教育學習、健康醫療、生活資訊、社群媒體、購物消費、工具軟體、其他
@@ -139,7 +158,7 @@ class AIService:
 標題：{title}
 
 內容：
-{content[:1500]}
+{prepared_content}
 
 請直接返回分類名稱，不要其他說明："""
 
@@ -156,7 +175,44 @@ class AIService:
             logger.error(f"❌ 內容分類失敗: {e}")
             return "其他"
     
-    async def _call_deepseek_api(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
+    def _build_payload(self, prompt: str, max_tokens: int,
+                       response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """建立 chat completions 請求內容"""
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.3,  # 較低的溫度以獲得更一致的結果
+            "stream": False
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        return payload
+    
+    def _stream_deepseek_api(self, prompt: str, max_tokens: int = 500,
+                             response_format: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        以串流模式調用 DeepSeek API
+        
+        Returns:
+            逐段產生回應文字的非同步迭代器（關閉即中斷連線）
+        """
+        
+        return stream_chat_completion(
+            self.client,
+            "deepseek",
+            self.model,
+            f"{self.base_url}/chat/completions",
+            self._build_payload(prompt, max_tokens, response_format)
+        )
+    
+    async def _call_deepseek_api(self, prompt: str, max_tokens: int = 500,
+                                 response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         調用 DeepSeek API
         
@@ -169,24 +225,19 @@ class AIService:
         """
         
         try:
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": max_tokens,
-                "temperature": 0.3,  # 較低的溫度以獲得更一致的結果
-                "stream": False
-            }
+            payload = self._build_payload(prompt, max_tokens, response_format)
             
-            response = await self.client.post(
+            response = await llm_rate_limiter.post(
+                self.client,
+                "deepseek",
+                self.model,
                 f"{self.base_url}/chat/completions",
                 json=payload
             )
             
+            if response is None:
+                return None
+            
             if response.status_code == 200:
                 data = response.json()
                 if "choices" in data and len(data["choices"]) > 0:
@@ -203,6 +254,36 @@ class AIService:
             logger.error(f"❌ 調用 DeepSeek API 失敗: {e}")
             return None
     
+    async def analyze_content_combined(self, title: str, content: str,
+                                       max_length: int = 200, max_keywords: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        以單次結構化回應完成摘要、關鍵詞與分類
+        
+        Returns:
+            分析結果字典，或 None 如果回應無法解析
+        """
+        
+        prompt = build_combined_prompt(
+            title,
+            prepare_content(title, content, self.model, prompt_token_budget("summary")),
+            max_length,
+            max_keywords
+        )
+        response_format = json_response_format("json_object")
+        if settings.ai_streaming:
+            # JSON 需要完整才能解析，串流只用來提早取得摘要第一句的預覽
+            response = await collect_stream(
+                self._stream_deepseek_api(prompt, max_tokens=500, response_format=response_format),
+                summary_of=partial_json_summary
+            )
+        else:
+            response = await self._call_deepseek_api(prompt, max_tokens=500, response_format=response_format)
+        
+        result = parse_combined_response(response, max_length, max_keywords)
+        if result:
+            logger.info(f"✅ 合併分析完成: 摘要={len(result['summary'])} 字, 關鍵詞={len(result['keywords'])}, 分類={result['category']}")
+        return result
+    
     async def analyze_content(self, title: str, content: str) -> Dict[str, Any]:
         """
         綜合分析內容，包含摘要、關鍵詞和分類
@@ -213,6 +294,12 @@ class AIService:
         
         logger.info(f"🤖 開始 AI 內容分析: {title[:50]}...")
         
+        if settings.ai_analysis_mode == "combined":
+            combined_result = await self.analyze_content_combined(title, content)
+            if combined_result:
+                return combined_result
+            logger.warning("⚠️ 合併分析失敗，改用三次呼叫分析")
+        
         # 並行執行多個分析任務
         import asyncio
         
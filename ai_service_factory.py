@@ -7,6 +7,7 @@ BriefCard - AI 服務工廠
 import logging
 from typing import Dict, Any
 from config import settings
+from ai_cache import CachedAIService
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,27 @@ class AIServiceFactory:
         """
         
         provider = settings.ai_service_provider.lower()
+        service = AIServiceFactory.create_provider_service(provider)
+        
+        if service is None or not settings.ai_cache_enabled:
+            return service
+        
+        logger.info(f"🗃️ 啟用 AI 分析快取 (上限 {settings.ai_cache_max_entries} 筆)")
+        return CachedAIService(
+            service,
+            provider,
+            max_entries=settings.ai_cache_max_entries,
+            ttl=settings.ai_cache_ttl
+        )
+    
+    @staticmethod
+    def create_provider_service(provider: str):
+        """
+        建立指定提供者的 AI 服務實例（不含快取）
+        
+        Returns:
+            AI 服務實例，或 None 如果配置無效
+        """
         
         if provider == "openrouter":
             if not settings.openrouter_api_key:
@@ -42,6 +64,30 @@ class AIServiceFactory:
             logger.info("🤖 使用 DeepSeek AI 服務")
             return AIService()
             
+        elif provider == "local":
+            # 本地抽取式分析，不呼叫外部 API
+            from local_ai_service import local_ai_service
+            logger.info("🧮 使用本地 AI 分析服務")
+            return local_ai_service
+            
+        elif provider == "router":
+            # 依序組合多個提供者，略過無法建立者
+            from ai_router import create_ai_router
+            providers = []
+            for name in settings.ai_router_providers.lower().split(","):
+                name = name.strip()
+                if not name or name == "router" or name in dict(providers):
+                    continue
+                service = AIServiceFactory.create_provider_service(name)
+                if service is not None:
+                    providers.append((name, service))
+            
+            if not providers:
+                logger.error("❌ AI 路由沒有可用的提供者，請檢查 AI_ROUTER_PROVIDERS")
+                return None
+            logger.info(f"🔀 使用 AI 路由: {' → '.join(name for name, _ in providers)}")
+            return create_ai_router(providers)
+            
         elif provider == "mock":
             # 建立模擬 AI 服務（用於測試）
             logger.info("🤖 使用模擬 AI 服務（測試模式）")
@@ -49,7 +95,7 @@ class AIServiceFactory:
             
         else:
             logger.error(f"❌ 不支援的 AI 服務提供者: {provider}")
-            logger.info("📋 支援的提供者: openrouter, deepseek, mock")
+            logger.info("📋 支援的提供者: openrouter, deepseek, local, router, mock")
             return None
     
     @staticmethod
@@ -64,12 +110,17 @@ class AIServiceFactory:
         return {
             "openrouter": bool(settings.openrouter_api_key),
             "deepseek": bool(settings.deepseek_api_key),
+            "local": True,  # 本地分析不需要 API Key
+            "router": True,  # 至少有本地分析可用
             "mock": True  # 模擬服務總是可用
         }
 
 class MockAIService:
     """模擬 AI 服務（用於測試和演示）"""
     
+    PROMPT_VERSION = "1"
+    model = "mock"
+    
     def __init__(self):
         logger.info("🎭 初始化模擬 AI 服務")
     
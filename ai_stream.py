@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+BriefCard - LLM 串流回應
+解析 chat completions 的 SSE 串流；摘要超過長度上限時提前關閉連線以免為之後會被截掉的 token 付費，
+並在第一句完成時透過 summary_preview 回呼先提供預覽
+"""
+
+import json
+import logging
+import re
+from contextlib import aclosing
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable
+
+import httpx
+
+from rate_limiter import llm_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# 處理書籤時設定，串流中第一句摘要完成時呼叫（呼叫端不需經過 AI 服務的介面傳遞）
+summary_preview: ContextVar[Optional[Callable[[str], Awaitable[None]]]] = ContextVar("summary_preview", default=None)
+
+FIRST_SENTENCE_PATTERN = re.compile(r"^\s*(.{8,}?(?:[。！？!?]|\.(?=\s)))", re.DOTALL)
+JSON_SUMMARY_PATTERN = re.compile(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """逐一取得 SSE 事件的 data 內容（略過註解行，例如 OpenRouter 的 keep-alive）"""
+    data_lines = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        yield "\n".join(data_lines)
+
+async def stream_chat_completion(client: httpx.AsyncClient, provider: str, model: str,
+                                 url: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    以串流模式呼叫 chat completions（同樣經過速率限制）
+
+    Yields:
+        模型輸出的文字片段；關閉產生器即中斷連線
+    """
+    response = await llm_rate_limiter.post(client, provider, model, url, json={**payload, "stream": True}, stream=True)
+    if response is None:
+        return
+
+    try:
+        if response.status_code != 200:
+            await response.aread()
+            logger.error(f"❌ API 串流請求失敗: {response.status_code} - {response.text}")
+            return
+
+        async for data in iter_sse_data(response):
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            if "error" in chunk:
+                logger.error(f"❌ API 串流錯誤: {chunk['error']}")
+                break
+
+            choices = chunk.get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if delta:
+                yield delta
+    finally:
+        await response.aclose()
+
+def first_sentence(text: str) -> Optional[str]:
+    match = FIRST_SENTENCE_PATTERN.match(text)
+    return match.group(1).strip() if match else None
+
+def partial_json_summary(text: str) -> str:
+    """從尚未完整的 JSON 回應取出目前已產生的 summary 字串"""
+    match = JSON_SUMMARY_PATTERN.search(text)
+    if not match:
+        return ""
+    raw = match.group(1)
+    # 結尾可能是不完整的跳脫序列（例如 \u4e）
+    for end in range(len(raw), max(-1, len(raw) - 6), -1):
+        try:
+            return json.loads(f'"{raw[:end]}"')
+        except ValueError:
+            continue
+    return ""
+
+async def collect_stream(deltas: AsyncIterator[str], max_length: Optional[int] = None,
+                         summary_of: Callable[[str], str] = lambda text: text) -> Optional[str]:
+    """
+    收集串流回應
+
+    Args:
+        max_length: 摘要超過此長度即停止接收（None 表示讀完整個回應）
+        summary_of: 從目前累積的文字取出摘要部分（用於第一句預覽）
+
+    Returns:
+        累積的文字，沒有任何輸出時回傳 None
+    """
+    text = ""
+    handler = summary_preview.get()
+    async with aclosing(deltas):
+        async for delta in deltas:
+            text += delta
+
+            if handler:
+                sentence = first_sentence(summary_of(text))
+                if sentence:
+                    try:
+                        await handler(sentence)
+                    except Exception as e:
+                        logger.warning(f"⚠️ 摘要預覽更新失敗: {e}")
+                    handler = None
+
+            if max_length and len(text.strip()) > max_length:
+                logger.info(f"✂️ 摘要已超過 {max_length} 字，提前結束串流")
+                break
+
+    return text or None
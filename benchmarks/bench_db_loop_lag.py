@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 資料庫事件迴圈延遲基準測試
+比較直接呼叫同步 .execute()（舊做法）與 SupabaseClient._execute（執行緒池）時的事件迴圈延遲
+
+用法：
+    python benchmarks/bench_db_loop_lag.py [--queries 50] [--latency-ms 80]
+
+以模擬的 PostgREST 查詢（阻塞 sleep）代表一次網路往返，不需要真實的 Supabase。
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_client
+
+class FakeQuery:
+    """模擬 supabase-py 查詢建構器：execute() 會阻塞一段時間"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return {"data": []}
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """每隔 interval 醒來一次，記錄實際延遲超出預期的毫秒數"""
+    lags = []
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, (time.perf_counter() - expected) * 1000))
+    return lags
+
+async def run_blocking(queries: int, latency: float):
+    """舊做法：在 async 函式中直接呼叫 .execute()"""
+    async def one():
+        FakeQuery(latency).execute()
+    await asyncio.gather(*(one() for _ in range(queries)))
+
+async def run_executor(queries: int, latency: float):
+    """新做法：透過 SupabaseClient._execute 交給執行緒池"""
+    await asyncio.gather(*(db_client._execute(FakeQuery(latency)) for _ in range(queries)))
+
+async def bench(name: str, runner, queries: int, latency: float):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await runner(queries, latency)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = await probe
+    lags_sorted = sorted(lags)
+    p99 = lags_sorted[round((len(lags_sorted) - 1) * 0.99)] if lags_sorted else 0.0
+
+    print(f"{name:<12} 總耗時 {elapsed*1000:8.1f} ms | 迴圈延遲 max {max(lags):8.1f} ms"
+          f" | p99 {p99:8.1f} ms | 平均 {statistics.mean(lags):6.2f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="資料庫事件迴圈延遲基準測試")
+    parser.add_argument("--queries", type=int, default=50, help="並行查詢數")
+    parser.add_argument("--latency-ms", type=float, default=80, help="模擬每次查詢的往返時間")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"🗄️ {args.queries} 個並行查詢，每個阻塞 {args.latency_ms} ms\n")
+    await bench("before", run_blocking, args.queries, latency)
+    await bench("after", run_executor, args.queries, latency)
+    await db_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
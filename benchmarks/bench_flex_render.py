@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+BriefCard - Flex 卡片渲染壓測
+比較舊做法（每次建 dict → BubbleContainer → FlexSendMessage → json.dumps）與預先編譯模板的渲染耗時
+
+用法：
+    python benchmarks/bench_flex_render.py [--cards 20000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linebot.models import BubbleContainer, FlexSendMessage
+
+from config import settings
+from flex_renderer import flex_renderer
+
+def sample_bookmark(index: int) -> dict:
+    return {
+        "id": f"00000000-0000-0000-0000-{index:012d}",
+        "user_id": "U" + "0" * 32,
+        "url": f"https://example.com/articles/{index}?utm_source=line",
+        "title": f"第 {index} 篇文章：如何在 FastAPI 中建立高效能的非同步服務與背景工作佇列",
+        "summary": "這篇文章介紹非同步 I/O、連線池、背壓與工作佇列的設計取捨，" * 3,
+        "image_url": f"https://example.com/images/{index}.jpg",
+        "category": "技術",
+        "tags": ["Python", "FastAPI", "效能", "非同步"],
+        "status": "completed"
+    }
+
+def legacy_render(bookmark: dict, user_id: str) -> bytes:
+    """舊做法快照：每張卡片重新組 dict 並經過 SDK 物件序列化"""
+    title = bookmark.get("title", "無標題")
+    if len(title) > 60:
+        title = title[:57] + "..."
+    main_content = bookmark.get("summary") or "📋 已保存此網頁書籤"
+    if len(main_content) > 100:
+        main_content = main_content[:97] + "..."
+
+    flex_json = {
+        "type": "bubble",
+        "hero": {"type": "image", "url": bookmark["image_url"], "size": "full",
+                 "aspectRatio": "16:9", "aspectMode": "cover"},
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [
+                {"type": "text", "text": title, "weight": "bold", "size": "lg", "wrap": True, "maxLines": 2},
+                {"type": "text", "text": main_content, "size": "sm", "color": "#666666",
+                 "wrap": True, "maxLines": 4, "margin": "md"},
+                {"type": "button", "style": "primary", "margin": "lg",
+                 "action": {"type": "uri", "label": "編輯卡片",
+                            "uri": f"{settings.liff_url}?bookmarkId={bookmark['id']}&userId={user_id}"}}
+            ]
+        },
+        "footer": {
+            "type": "box",
+            "layout": "horizontal",
+            "spacing": "sm",
+            "contents": [
+                {"type": "button", "style": "secondary", "flex": 1,
+                 "action": {"type": "uri", "uri": bookmark["url"], "label": "閱讀原文"}},
+                {"type": "button", "style": "secondary", "flex": 1,
+                 "action": {"type": "postback", "label": "保存書籤",
+                            "data": f"action=save&bookmark_id={bookmark['id']}"}}
+            ]
+        }
+    }
+    message = FlexSendMessage(alt_text=f"📋 {bookmark['title']}",
+                              contents=BubbleContainer.new_from_json_dict(flex_json))
+    return json.dumps(message.as_json_dict(), ensure_ascii=False).encode("utf-8")
+
+def bench(name: str, render, bookmarks: list, user_id: str):
+    timings = []
+    total_bytes = 0
+    for bookmark in bookmarks:
+        start = time.perf_counter()
+        body = render(bookmark, user_id)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+        total_bytes += len(body)
+
+    timings.sort()
+    p99 = timings[round((len(timings) - 1) * 0.99)]
+    print(f"{name:<10} 平均 {statistics.mean(timings):7.1f} µs | p50 {statistics.median(timings):7.1f} µs"
+          f" | p99 {p99:7.1f} µs | 平均大小 {total_bytes // len(bookmarks)} bytes")
+
+def main():
+    parser = argparse.ArgumentParser(description="Flex 卡片渲染壓測")
+    parser.add_argument("--cards", type=int, default=20000, help="渲染卡片數")
+    args = parser.parse_args()
+
+    user_id = "U" + "0" * 32
+    bookmarks = [sample_bookmark(i) for i in range(args.cards)]
+    stored = {b["id"]: flex_renderer.render_bubble(b, user_id) for b in bookmarks}
+
+    # 確認兩種做法產生相同結構的卡片
+    legacy = json.loads(legacy_render(bookmarks[0], user_id))
+    compiled = json.loads(flex_renderer.render_message(bookmarks[0], user_id))
+    print(f"🧪 輸出卡片欄位一致: {legacy['contents'].keys() == compiled['contents'].keys()}\n")
+
+    print(f"🃏 渲染 {args.cards} 張卡片\n")
+    bench("legacy", legacy_render, bookmarks, user_id)
+    bench("compiled", flex_renderer.render_message, bookmarks, user_id)
+    bench("stored", lambda b, u: flex_renderer.render_message(b, u, bubble=stored[b["id"]]), bookmarks, user_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+BriefCard - LINE 客戶端壓測
+對本地假 LINE API 比較同步 LineBotApi（舊做法）與 AsyncLineClient 的總耗時與事件迴圈延遲
+
+用法：
+    python fakes/fake_line_api.py --port 9100 --latency-ms 80 &
+    python benchmarks/bench_line_client.py --base-url http://127.0.0.1:9100 [--pushes 200] [--rate-limit-ratio 0.1]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linebot.models import TextSendMessage
+
+from line_client import AsyncLineClient
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """每隔 interval 醒來一次，記錄實際延遲超出預期的毫秒數"""
+    lags = []
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, (time.perf_counter() - expected) * 1000))
+    return lags
+
+async def run_sync(base_url: str, pushes: int):
+    """舊做法：在 async 函式中直接呼叫同步 LineBotApi.push_message"""
+    from linebot import LineBotApi
+
+    api = LineBotApi("fake-token", endpoint=base_url)
+
+    async def one(index: int):
+        try:
+            api.push_message(f"U{index:032d}", TextSendMessage(text=f"bench {index}"))
+        except Exception:
+            pass
+    await asyncio.gather(*(one(i) for i in range(pushes)))
+
+async def run_async(base_url: str, pushes: int):
+    """新做法：AsyncLineClient（連線池 + 429 重試）"""
+    client = AsyncLineClient("fake-token", base_url=base_url)
+
+    async def one(index: int):
+        try:
+            await client.push_message(f"U{index:032d}", TextSendMessage(text=f"bench {index}"))
+        except Exception:
+            pass
+    await asyncio.gather(*(one(i) for i in range(pushes)))
+    print(f"  客戶端計數: {client.stats()}")
+    await client.close()
+
+async def bench(name: str, runner, base_url: str, pushes: int):
+    async with httpx.AsyncClient(base_url=base_url) as admin:
+        await admin.post("/_fake/reset")
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await runner(base_url, pushes)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = sorted(await probe)
+    p99 = lags[round((len(lags) - 1) * 0.99)] if lags else 0.0
+
+    async with httpx.AsyncClient(base_url=base_url) as admin:
+        stats = (await admin.get("/_fake/stats")).json()
+
+    print(f"{name:<8} 總耗時 {elapsed*1000:8.1f} ms | 迴圈延遲 max {max(lags):8.1f} ms"
+          f" | p99 {p99:8.1f} ms | 平均 {statistics.mean(lags):6.2f} ms"
+          f" | 送達 {stats['push']}/{pushes}，429 {stats['rate_limited']} 次")
+
+async def main():
+    parser = argparse.ArgumentParser(description="LINE 客戶端壓測")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9100", help="假 LINE API 位址")
+    parser.add_argument("--pushes", type=int, default=200, help="並行推播數")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="假伺服器回應 429 的比例")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url) as admin:
+        await admin.post("/_fake/config", json={"rate_limit_ratio": args.rate_limit_ratio, "retry_after": None})
+
+    print(f"📤 {args.pushes} 個並行推播 → {args.base_url}\n")
+    await bench("sync", run_sync, args.base_url, args.pushes)
+    await bench("async", run_async, args.base_url, args.pushes)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 本地 AI 分析壓測
+量測本地摘要、關鍵詞與分類在長網頁上的耗時
+
+用法：
+    python benchmarks/bench_local_ai.py [--chars 50000] [--runs 20] [--file page.md]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_ai_service import local_ai_service, summarize, extract_keywords, categorize, clean_text
+
+SAMPLE_SENTENCES = [
+    "台積電今天公布第三季財報，營收創下歷史新高，主要受惠於人工智慧晶片需求強勁。",
+    "分析師指出，先進製程的產能利用率持續維持高檔，預期下一季營收將再成長百分之十。",
+    "公司表示，將在美國與日本擴大投資興建新廠，以滿足客戶對高效能運算晶片的需求。",
+    "不過，市場也擔心地緣政治風險與匯率波動，可能影響未來的毛利率表現。",
+    "董事長在法說會上強調，人工智慧帶動的晶片需求才剛開始，長期成長動能依然強勁。",
+    "The company also raised its capital expenditure guidance for advanced packaging.",
+    "投資人對財報反應熱烈，股價在盤後交易中上漲超過百分之三。",
+]
+
+def sample_page(chars: int) -> str:
+    random.seed(0)
+    paragraphs = []
+    while sum(len(p) for p in paragraphs) < chars:
+        paragraphs.append("".join(random.choice(SAMPLE_SENTENCES) for _ in range(4)))
+    return "\n\n".join(paragraphs)[:chars]
+
+def bench(name: str, func, runs: int):
+    func()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{name:<10} 平均 {statistics.mean(timings):7.2f} ms | 最大 {max(timings):7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 AI 分析壓測")
+    parser.add_argument("--chars", type=int, default=50000, help="產生的測試網頁字數")
+    parser.add_argument("--runs", type=int, default=20, help="重複次數")
+    parser.add_argument("--file", help="改用指定的 Markdown 檔案")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            content = f.read()
+    else:
+        content = sample_page(args.chars)
+    title = "台積電第三季財報營收創新高 人工智慧晶片需求強勁"
+
+    print(f"🧮 本地分析 {len(content)} 字\n")
+    bench("summary", lambda: summarize(title, content), args.runs)
+    bench("keywords", lambda: extract_keywords(title, clean_text(content)), args.runs)
+    bench("category", lambda: categorize(title, content), args.runs)
+    bench("analyze", lambda: local_ai_service.analyze(title, content), args.runs)
+
+    print(f"\n{local_ai_service.analyze(title, content)}")
+
+if __name__ == "__main__":
+    main()
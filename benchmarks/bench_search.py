@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 書籤搜尋基準測試
+在合成的 10 萬筆書籤上比較全文搜尋 RPC 與舊的 ilike 搜尋
+
+需要已套用 migrations/003_bookmark_search.sql 的 Supabase（讀取 .env 的 SUPABASE_URL / SUPABASE_ANON_KEY）。
+
+用法：
+    python benchmarks/bench_search.py --seed        # 建立合成資料（約數分鐘）
+    python benchmarks/bench_search.py               # 執行基準測試
+    python benchmarks/bench_search.py --cleanup     # 刪除合成資料
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_client
+
+BENCH_USER_ID = "bench-search-user"
+
+ZH_WORDS = [
+    "人工智慧", "機器學習", "資料庫", "全文搜尋", "台積電", "半導體", "股市", "利率", "房價", "旅遊",
+    "美食", "咖啡", "健身", "睡眠", "電動車", "手機", "遊戲", "電影", "音樂", "教育",
+    "疫苗", "醫療", "氣候", "選舉", "颱風", "捷運", "創業", "投資", "加密貨幣", "程式設計",
+]
+EN_WORDS = [
+    "python", "fastapi", "postgres", "react", "kubernetes", "docker", "llm", "openai", "startup", "design",
+    "review", "tutorial", "guide", "release", "benchmark", "security", "cloud", "mobile", "linux", "rust",
+]
+QUERIES = ["人工智慧", "半導體 股市", "咖啡", "python", "postgres 教學", "颱風", "rust benchmark", "電動車"]
+
+def synthetic_bookmark(index: int, content_chars: int) -> dict:
+    """產生一筆合成書籤"""
+    rng = random.Random(index)
+    zh = rng.sample(ZH_WORDS, 4)
+    en = rng.sample(EN_WORDS, 3)
+    body_words = [rng.choice(ZH_WORDS + EN_WORDS) for _ in range(content_chars // 4)]
+    created_at = datetime.utcnow() - timedelta(minutes=index)
+
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": BENCH_USER_ID,
+        "url": f"https://example.com/{en[0]}/{index}",
+        "title": f"{zh[0]}與{zh[1]}：{en[0]} {en[1]} 觀察 #{index}",
+        "description": f"關於{zh[2]}的文章",
+        "summary": f"本文討論{zh[0]}、{zh[2]}與{zh[3]}的最新發展，並介紹 {en[2]}。",
+        "tags": [zh[0], zh[1], en[0]],
+        "notes": rng.choice(["", "稍後閱讀", f"想研究 {en[1]}"]),
+        "content_markdown": " ".join(body_words)[:content_chars],
+        "category": "其他",
+        "status": "completed",
+        "created_at": created_at.isoformat(),
+        "updated_at": created_at.isoformat(),
+    }
+
+async def seed(count: int, batch_size: int, content_chars: int):
+    print(f"🌱 建立 {count} 筆合成書籤 (user_id={BENCH_USER_ID})")
+    start = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        rows = [synthetic_bookmark(i, content_chars) for i in range(offset, min(count, offset + batch_size))]
+        await db_client._execute(db_client.client.table("bookmarks").insert(rows, returning="minimal"))
+        print(f"  {offset + len(rows)}/{count}", end="\r")
+    print(f"\n✅ 完成，耗時 {time.perf_counter() - start:.1f}s")
+
+async def cleanup():
+    await db_client._execute(db_client.client.table("bookmarks").delete(returning="minimal").eq("user_id", BENCH_USER_ID))
+    print("🧹 已刪除合成資料")
+
+async def time_queries(name: str, search, repeats: int):
+    durations = []
+    hits = 0
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            results = await search(BENCH_USER_ID, query, 20)
+            durations.append((time.perf_counter() - start) * 1000)
+            hits += len(results)
+
+    durations.sort()
+    p95 = durations[round((len(durations) - 1) * 0.95)]
+    print(f"{name:<10} p50 {statistics.median(durations):8.1f} ms | p95 {p95:8.1f} ms"
+          f" | max {durations[-1]:8.1f} ms | 平均命中 {hits / len(durations):5.1f} 筆")
+
+async def main():
+    parser = argparse.ArgumentParser(description="書籤搜尋基準測試")
+    parser.add_argument("--seed", action="store_true", help="建立合成資料")
+    parser.add_argument("--cleanup", action="store_true", help="刪除合成資料")
+    parser.add_argument("--count", type=int, default=100_000, help="合成書籤數量")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--content-chars", type=int, default=800, help="每筆內文長度")
+    parser.add_argument("--repeats", type=int, default=5, help="每個查詢重複次數")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        await cleanup()
+    elif args.seed:
+        await seed(args.count, args.batch_size, args.content_chars)
+    else:
+        print(f"🔍 {len(QUERIES)} 個查詢 × {args.repeats} 次\n")
+        await time_queries("ilike", db_client._search_bookmarks_ilike, args.repeats)
+        await time_queries("fulltext", db_client.search_bookmarks, args.repeats)
+
+    await db_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 語意搜尋壓測
+建立一個含大量書籤的用戶分片（float16 memmap），量測索引寫入、查詢編碼與 top-k 搜尋的耗時
+
+用法：
+    python benchmarks/bench_semantic_search.py [--bookmarks 50000] [--queries 200] [--dim 256]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_index import SemanticIndex
+
+TOPICS = [
+    ("台積電第三季財報創新高", "人工智慧 晶片 先進製程 營收 資本支出"),
+    ("Python 非同步程式設計入門", "asyncio 協程 事件迴圈 效能 程式"),
+    ("東京五天四夜自由行攻略", "旅遊 景點 美食 交通 住宿"),
+    ("央行升息對房貸族的影響", "利率 房貸 通膨 經濟 貨幣政策"),
+    ("大谷翔平再度入選全明星賽", "棒球 大聯盟 投手 打者 紀錄"),
+    ("如何在家沖出一杯好咖啡", "咖啡 手沖 烘焙 研磨 器材"),
+    ("新款電動車續航力實測", "電動車 電池 充電 續航 特斯拉"),
+    ("睡眠不足對健康的長期影響", "健康 睡眠 醫學 研究 壓力"),
+]
+
+def sample_bookmarks(count: int):
+    random.seed(0)
+    for i in range(count):
+        title, words = random.choice(TOPICS)
+        terms = words.split()
+        random.shuffle(terms)
+        yield {
+            "id": f"bm-{i:06d}",
+            "title": f"{title} #{i}",
+            "summary": f"{title}，重點包括{'、'.join(terms[:3])}等內容。",
+            "tags": terms[:3]
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="語意搜尋壓測")
+    parser.add_argument("--bookmarks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        index = SemanticIndex(root=root, dim=args.dim)
+        user_id = "U" + "0" * 32
+
+        started = time.perf_counter()
+        batch = []
+        for bookmark in sample_bookmarks(args.bookmarks):
+            batch.append(bookmark)
+            if len(batch) == 1000:
+                index.index_bookmarks(user_id, batch)
+                batch = []
+        index.index_bookmarks(user_id, batch)
+        elapsed = time.perf_counter() - started
+        size_mb = os.path.getsize(os.path.join(index.shard(user_id).path, "vectors.npy")) / 1024 / 1024
+        print(f"索引 {args.bookmarks} 筆: {elapsed:.1f}s ({args.bookmarks / elapsed:.0f} 筆/s)，分片 {size_mb:.1f} MB")
+
+        # 重新從磁碟載入分片，量測冷啟動
+        index = SemanticIndex(root=root, dim=args.dim)
+        started = time.perf_counter()
+        index.shard(user_id)
+        print(f"載入分片: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        queries = ["晶片 營收", "咖啡", "升息 房貸", "asyncio 效能", "日本旅遊美食", "電動車電池"]
+        timings = []
+        for i in range(args.queries):
+            started = time.perf_counter()
+            results = index.search(user_id, queries[i % len(queries)], args.k)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"搜尋 top-{args.k}: p50 {statistics.median(timings):.2f} ms, "
+              f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms")
+
+        timings = []
+        for i in range(args.queries):
+            started = time.perf_counter()
+            index.related(user_id, f"bm-{i:06d}", 5)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"相關書籤 top-5: p50 {statistics.median(timings):.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+        for query in queries[:3]:
+            print(f"  {query} → {[bookmark_id for bookmark_id, _ in index.search(user_id, query, 3)]}")
+
+if __name__ == "__main__":
+    main()
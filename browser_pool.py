@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 瀏覽器池
+維護常駐的 Crawl4AI / Chromium 實例，避免每次爬取都重新啟動瀏覽器
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Set, Union
+
+import psutil
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+logger = logging.getLogger(__name__)
+
+class PooledBrowser:
+    """池中的單一瀏覽器實例"""
+
+    def __init__(self, slot_id: int, crawler: AsyncWebCrawler, pids: Set[int]):
+        self.slot_id = slot_id
+        self.crawler = crawler
+        self.pids = pids  # 此實例啟動的行程（Playwright driver 與其下的 Chromium）
+        self.pages_served = 0
+        self.started_at = time.time()
+        self.memory_mb = 0.0
+        self.memory_checked_at = 0.0
+
+    @property
+    def is_connected(self) -> bool:
+        """瀏覽器連線是否仍有效（崩潰或被關閉後為 False）"""
+        if not getattr(self.crawler, "ready", False):
+            return False
+        manager = getattr(getattr(self.crawler, "crawler_strategy", None), "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        return browser is None or browser.is_connected()
+
+class BrowserPool:
+    """
+    常駐瀏覽器池
+
+    - 啟動時預熱 `size` 個 AsyncWebCrawler（各自持有一個 Chromium 與其 context）
+    - 每次 `acquire()` 借出一個實例，`arun` 未指定 session_id 時會開新分頁並在完成後關閉
+    - 實例服務超過 `max_pages` 個頁面，或自身行程樹記憶體超過門檻時自動回收重啟
+    - 啟動失敗的實例以空位（slot_id）留在池中，由下一個借用者重新啟動，池的大小不會因此縮小
+    """
+
+    def __init__(self, browser_config: BrowserConfig, size: int = 2,
+                 max_pages: int = 50, max_memory_mb: int = 800, memory_check_interval: float = 30.0):
+        self.browser_config = browser_config
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_interval = memory_check_interval
+
+        # 閒置的實例，或等待重新啟動的空位（slot_id）
+        self._idle: Optional[asyncio.Queue] = None
+        self._browsers: Dict[int, PooledBrowser] = {}
+        self._recycle_tasks: Set[asyncio.Task] = set()
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._closed = False
+        self.recycled_count = 0
+
+    @property
+    def is_running(self) -> bool:
+        """瀏覽器池是否已啟動"""
+        return self._started and not self._closed
+
+    async def start(self):
+        """預熱所有瀏覽器實例"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self._started:
+                return
+
+            self._closed = False
+            self._idle = asyncio.Queue()
+            logger.info(f"🌐 預熱瀏覽器池: {self.size} 個實例")
+
+            results = await asyncio.gather(
+                *(self._launch(slot_id) for slot_id in range(self.size)),
+                return_exceptions=True
+            )
+            for slot_id, result in enumerate(results):
+                if isinstance(result, Exception):
+                    logger.error(f"❌ 瀏覽器實例 {slot_id} 啟動失敗: {result}")
+                    self._idle.put_nowait(slot_id)
+                    continue
+                self._idle.put_nowait(result)
+
+            self._started = True
+            logger.info(f"✅ 瀏覽器池已就緒: {len(self._browsers)}/{self.size}")
+
+    async def _launch(self, slot_id: int) -> PooledBrowser:
+        """啟動單一瀏覽器實例（逐一啟動，以前後的子行程差異找出此實例的行程）"""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+
+        async with self._launch_lock:
+            before = self._child_pids()
+            crawler = AsyncWebCrawler(config=self.browser_config)
+            await crawler.start()
+            browser = PooledBrowser(slot_id, crawler, self._child_pids() - before)
+
+        self._browsers[slot_id] = browser
+        return browser
+
+    @staticmethod
+    def _child_pids() -> Set[int]:
+        try:
+            return {child.pid for child in psutil.Process().children()}
+        except psutil.Error:
+            return set()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        借出一個瀏覽器實例
+
+        Yields:
+            已啟動的 AsyncWebCrawler
+        """
+        if not self._started:
+            await self.start()
+        if self._closed:
+            raise RuntimeError("瀏覽器池已關閉")
+
+        item: Union[PooledBrowser, int] = await self._idle.get()
+        if isinstance(item, int):
+            # 空位：在此重新啟動；失敗時放回空位並拋出，讓後續借用者再試而不是一直等待
+            try:
+                browser = await self._launch(item)
+            except Exception as e:
+                self._idle.put_nowait(item)
+                raise RuntimeError(f"瀏覽器實例 {item} 啟動失敗: {e}") from e
+        else:
+            browser = item
+
+        try:
+            yield browser.crawler
+        finally:
+            browser.pages_served += 1
+            self._release(browser)
+
+    def _release(self, browser: PooledBrowser):
+        """歸還瀏覽器實例，必要時排程回收"""
+        if self._closed:
+            return
+
+        reason = self._recycle_reason(browser)
+        if reason:
+            logger.info(f"♻️ 回收瀏覽器實例 {browser.slot_id}: {reason}")
+            task = asyncio.create_task(self._recycle(browser))
+            self._recycle_tasks.add(task)
+            task.add_done_callback(self._recycle_tasks.discard)
+        else:
+            self._idle.put_nowait(browser)
+
+    def _recycle_reason(self, browser: PooledBrowser) -> Optional[str]:
+        """判斷實例是否需要回收"""
+        if not browser.is_connected:
+            return "瀏覽器已失效"
+        if self.max_pages and browser.pages_served >= self.max_pages:
+            return f"已服務 {browser.pages_served} 個頁面"
+
+        now = time.monotonic()
+        if self.max_memory_mb and now - browser.memory_checked_at >= self.memory_check_interval:
+            browser.memory_mb = self._browser_memory_mb(browser)
+            browser.memory_checked_at = now
+            if browser.memory_mb > self.max_memory_mb:
+                return f"瀏覽器記憶體 {browser.memory_mb:.0f}MB 超過門檻"
+
+        return None
+
+    @staticmethod
+    def _browser_memory_mb(browser: PooledBrowser) -> float:
+        """計算單一實例行程樹的記憶體用量（MB）"""
+        total = 0
+        for pid in browser.pids:
+            try:
+                process = psutil.Process(pid)
+                processes = [process, *process.children(recursive=True)]
+            except psutil.Error:
+                continue
+            for proc in processes:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+        return total / (1024 * 1024)
+
+    async def _recycle(self, browser: PooledBrowser):
+        """關閉舊實例並啟動新實例放回池中"""
+        try:
+            await browser.crawler.close()
+        except Exception as e:
+            logger.warning(f"⚠️ 關閉瀏覽器實例 {browser.slot_id} 失敗: {e}")
+
+        self._browsers.pop(browser.slot_id, None)
+        if self._closed:
+            return
+
+        try:
+            new_browser = await self._launch(browser.slot_id)
+            self.recycled_count += 1
+            self._idle.put_nowait(new_browser)
+        except Exception as e:
+            # 留下空位，由下一個借用者重新啟動
+            logger.error(f"❌ 重啟瀏覽器實例 {browser.slot_id} 失敗: {e}")
+            self._idle.put_nowait(browser.slot_id)
+
+    async def close(self):
+        """關閉瀏覽器池及所有實例"""
+        if not self._started or self._closed:
+            return
+
+        self._closed = True
+        logger.info("🛑 正在關閉瀏覽器池...")
+
+        if self._recycle_tasks:
+            await asyncio.gather(*self._recycle_tasks, return_exceptions=True)
+
+        browsers: List[PooledBrowser] = list(self._browsers.values())
+        self._browsers.clear()
+        await asyncio.gather(
+            *(browser.crawler.close() for browser in browsers),
+            return_exceptions=True
+        )
+
+        self._started = False
+        logger.info("✅ 瀏覽器池已關閉")
+
+    def stats(self) -> Dict[str, Any]:
+        """瀏覽器池狀態"""
+        return {
+            "running": self.is_running,
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "recycled": self.recycled_count,
+            "pages_served": {
+                slot_id: browser.pages_served
+                for slot_id, browser in self._browsers.items()
+            },
+            "memory_mb": {
+                slot_id: round(self._browser_memory_mb(browser), 1)
+                for slot_id, browser in self._browsers.items()
+            }
+        }
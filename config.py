@@ -24,9 +24,41 @@ class Settings(BaseSettings):
     # Supabase 配置
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_anon_key: str = os.getenv("SUPABASE_ANON_KEY", "")
+    db_max_workers: int = int(os.getenv("DB_MAX_WORKERS", "16"))  # 資料庫執行緒池大小
+    db_max_concurrency: int = int(os.getenv("DB_MAX_CONCURRENCY", "16"))  # 同時進行的查詢上限
+    db_timeout: float = float(os.getenv("DB_TIMEOUT", "30"))
+    stats_cache_ttl: int = int(os.getenv("STATS_CACHE_TTL", "30"))  # 書籤統計快取秒數
     
     # AI 服務配置
-    ai_service_provider: str = os.getenv("AI_SERVICE_PROVIDER", "openrouter")  # openrouter, deepseek, openai
+    ai_service_provider: str = os.getenv("AI_SERVICE_PROVIDER", "openrouter")  # openrouter, deepseek, local, router, mock
+    ai_input_token_budget: int = int(os.getenv("AI_INPUT_TOKEN_BUDGET", "1500"))  # 送給 LLM 的內容 token 上限（摘要；關鍵詞與分類使用較小比例）
+    ai_local_preview: bool = os.getenv("AI_LOCAL_PREVIEW", "true").lower() == "true"  # 等待 LLM 時先以本地分析填入摘要與標籤
+    ai_streaming: bool = os.getenv("AI_STREAMING", "false").lower() == "true"  # 以串流接收 LLM 回應：摘要超過長度即中斷，第一句完成時先寫入預覽
+    
+    # 多提供者路由（AI_SERVICE_PROVIDER=router）
+    ai_router_providers: str = os.getenv("AI_ROUTER_PROVIDERS", "openrouter,deepseek,local")  # 依優先順序嘗試
+    ai_router_hedge: bool = os.getenv("AI_ROUTER_HEDGE", "true").lower() == "true"  # 主要提供者超過 p95 延遲時對下一個提供者發出對沖請求
+    ai_router_hedge_delay: float = float(os.getenv("AI_ROUTER_HEDGE_DELAY", "8"))  # 延遲樣本不足時的對沖等待秒數
+    ai_router_attempt_timeout: float = float(os.getenv("AI_ROUTER_ATTEMPT_TIMEOUT", "20"))  # 單一提供者的逾時秒數
+    ai_router_failure_threshold: int = int(os.getenv("AI_ROUTER_FAILURE_THRESHOLD", "3"))  # 連續失敗幾次後開啟斷路器
+    ai_router_cooldown: float = float(os.getenv("AI_ROUTER_COOLDOWN", "60"))  # 斷路器開啟後的冷卻秒數
+    ai_router_budgets: str = os.getenv("AI_ROUTER_BUDGETS", "")  # 每日請求額度，例如 "openrouter:200,deepseek:2000"（未列出者不限）
+    
+    # LLM API 速率限制與重試（所有 AI 服務共用）
+    ai_rate_limits: str = os.getenv("AI_RATE_LIMITS", "openrouter=0.33/5")  # "提供者[:模型]=每秒請求數/突發量"，以逗號分隔
+    ai_rate_default_rate: float = float(os.getenv("AI_RATE_DEFAULT_RATE", "2"))  # 未設定的提供者每秒請求數
+    ai_rate_default_burst: int = int(os.getenv("AI_RATE_DEFAULT_BURST", "5"))  # 未設定的提供者突發量
+    ai_retry_max: int = int(os.getenv("AI_RETRY_MAX", "3"))  # 429 / 5xx 的最大重試次數
+    ai_retry_backoff_base: float = float(os.getenv("AI_RETRY_BACKOFF_BASE", "1"))  # 指數退避的基準秒數
+    ai_retry_backoff_max: float = float(os.getenv("AI_RETRY_BACKOFF_MAX", "30"))  # 單次退避上限秒數
+    ai_queue_deadline: float = float(os.getenv("AI_QUEUE_DEADLINE", "40"))  # 排隊與重試的總秒數上限
+    
+    ai_analysis_mode: str = os.getenv("AI_ANALYSIS_MODE", "combined")  # combined（單次 JSON 回應）, parallel（三次呼叫）
+    
+    # AI 分析快取
+    ai_cache_enabled: bool = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+    ai_cache_max_entries: int = int(os.getenv("AI_CACHE_MAX_ENTRIES", "1000"))
+    ai_cache_ttl: int = int(os.getenv("AI_CACHE_TTL", "86400"))
     
     # DeepSeek API 配置
     deepseek_api_key: str = os.getenv("DEEPSEEK_API_KEY", "")
@@ -40,6 +72,27 @@ class Settings(BaseSettings):
     # LINE Bot 配置
     line_channel_access_token: Optional[str] = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
     line_channel_secret: Optional[str] = os.getenv("LINE_CHANNEL_SECRET")
+    line_api_base_url: str = os.getenv("LINE_API_BASE_URL", "https://api.line.me")  # 測試時可指向 fakes/fake_line_api.py
+    line_api_timeout: float = float(os.getenv("LINE_API_TIMEOUT", "10"))
+    line_api_max_retries: int = int(os.getenv("LINE_API_MAX_RETRIES", "3"))
+    line_api_max_retry_after: float = float(os.getenv("LINE_API_MAX_RETRY_AFTER", "60"))  # Retry-After 超過此秒數時不等待，直接失敗
+    line_api_max_connections: int = int(os.getenv("LINE_API_MAX_CONNECTIONS", "20"))
+    webhook_queue_size: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    webhook_workers: int = int(os.getenv("WEBHOOK_WORKERS", "8"))
+    webhook_enqueue_timeout: float = float(os.getenv("WEBHOOK_ENQUEUE_TIMEOUT", "0.5"))  # 佇列滿時的等待秒數，逾時回應 503
+    webhook_dedupe_ttl: int = int(os.getenv("WEBHOOK_DEDUPE_TTL", "3600"))  # webhookEventId 保留秒數
+    line_task_concurrency: int = int(os.getenv("LINE_TASK_CONCURRENCY", "32"))  # postback / 連結處理同時執行數
+    line_task_max_pending: int = int(os.getenv("LINE_TASK_MAX_PENDING", "500"))
+    line_send_rate: float = float(os.getenv("LINE_SEND_RATE", "200"))  # 每秒回覆/推播請求數（LINE 上限為 2,000）
+    line_send_burst: int = int(os.getenv("LINE_SEND_BURST", "200"))
+    line_coalesce_window: float = float(os.getenv("LINE_COALESCE_WINDOW", "0.3"))  # 同一用戶的訊息合併發送的等待秒數
+    line_reply_token_ttl: float = float(os.getenv("LINE_REPLY_TOKEN_TTL", "50"))  # reply token 視為有效的秒數
+    line_monthly_push_quota: int = int(os.getenv("LINE_MONTHLY_PUSH_QUOTA", "0"))  # 每月推播上限，0 表示不限制
+    line_max_urls_per_message: int = int(os.getenv("LINE_MAX_URLS_PER_MESSAGE", "10"))  # 一則訊息最多處理的連結數（carousel 上限 12）
+    line_url_concurrency: int = int(os.getenv("LINE_URL_CONCURRENCY", "3"))  # 同一則訊息中同時處理的連結數
+    flex_store_rendered_card: bool = os.getenv("FLEX_STORE_RENDERED_CARD", "false").lower() == "true"  # 需先執行 migrations/005
+    line_metadata_reply_timeout: float = float(os.getenv("LINE_METADATA_REPLY_TIMEOUT", "10"))  # 等待網頁資訊以 reply token 回覆卡片的秒數
+    line_push_enriched_card: bool = os.getenv("LINE_PUSH_ENRICHED_CARD", "true").lower() == "true"  # AI 分析完成後推播更新卡片
     
     # LIFF 配置
     liff_id: str = os.getenv("LIFF_ID", "2007890677-Wa6jeBz3")
@@ -48,7 +101,47 @@ class Settings(BaseSettings):
     # 爬蟲設定
     crawler_timeout: int = int(os.getenv("CRAWLER_TIMEOUT", "30"))
     max_content_length: int = int(os.getenv("MAX_CONTENT_LENGTH", "50000"))
+    crawler_fetch_mode: str = os.getenv("CRAWLER_FETCH_MODE", "tiered")  # tiered, http, browser
+    crawler_http_timeout: float = float(os.getenv("CRAWLER_HTTP_TIMEOUT", "8"))
+    crawler_http_max_bytes: int = int(os.getenv("CRAWLER_HTTP_MAX_BYTES", "2000000"))
+    
+    # 爬取快取設定
+    crawl_cache_backend: str = os.getenv("CRAWL_CACHE_BACKEND", "memory")  # memory, redis, none
+    crawl_cache_redis_url: str = os.getenv("CRAWL_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    crawl_cache_max_bytes: int = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    crawl_cache_ttl: int = int(os.getenv("CRAWL_CACHE_TTL", "3600"))  # 成功結果保留秒數
+    crawl_cache_failure_ttl: int = int(os.getenv("CRAWL_CACHE_FAILURE_TTL", "60"))  # 失敗結果保留秒數
     
+    # 瀏覽器池設定
+    browser_pool_size: int = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+    browser_max_pages: int = int(os.getenv("BROWSER_MAX_PAGES", "50"))  # 每個實例服務多少頁面後回收
+    browser_max_memory_mb: int = int(os.getenv("BROWSER_MAX_MEMORY_MB", "800"))  # 每個實例的記憶體上限
+    browser_memory_check_interval: float = float(os.getenv("BROWSER_MEMORY_CHECK_INTERVAL", "30"))  # 每個實例記憶體檢查的最短間隔（秒）
+
+    # 語意搜尋設定
+    semantic_search_enabled: bool = os.getenv("SEMANTIC_SEARCH_ENABLED", "true").lower() == "true"  # 書籤處理完成時寫入語意索引
+    semantic_index_dir: str = os.getenv("SEMANTIC_INDEX_DIR", "data/semantic")  # 每個用戶一個分片目錄
+    semantic_encoder: str = os.getenv("SEMANTIC_ENCODER", "hashing")  # 本地編碼器（hashing 不需網路與模型檔）
+    semantic_dim: int = int(os.getenv("SEMANTIC_DIM", "256"))  # 向量維度（變更後分片會重建）
+    semantic_cache_mb: int = int(os.getenv("SEMANTIC_CACHE_MB", "256"))  # 保留在記憶體中的 float32 分片上限
+    semantic_content_chars: int = int(os.getenv("SEMANTIC_CONTENT_CHARS", "2000"))  # 內文納入索引的字數
+    semantic_min_score: float = float(os.getenv("SEMANTIC_MIN_SCORE", "0.05"))  # 低於此相似度的結果不回傳
+
+    # 工作佇列設定
+    job_queue_db_path: str = os.getenv("JOB_QUEUE_DB_PATH", "data/jobs.sqlite3")
+    job_workers: int = int(os.getenv("JOB_WORKERS", "4"))
+    job_crawl_concurrency: int = int(os.getenv("JOB_CRAWL_CONCURRENCY", "2"))  # 同時爬取數（通常等於瀏覽器池大小）
+    job_ai_concurrency: int = int(os.getenv("JOB_AI_CONCURRENCY", "4"))
+    job_db_concurrency: int = int(os.getenv("JOB_DB_CONCURRENCY", "8"))
+    job_lease_seconds: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    job_retry_backoff: float = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # 失敗重試前的等待秒數（每次加倍）
+    job_stuck_after_seconds: int = int(os.getenv("JOB_STUCK_AFTER_SECONDS", "600"))  # 處理中超過此秒數視為卡住
+
+    # 書籤事件設定
+    event_bus_backend: str = os.getenv("EVENT_BUS_BACKEND", "memory")  # memory, redis（多個 worker 時使用）
+    event_bus_redis_url: str = os.getenv("EVENT_BUS_REDIS_URL", "redis://localhost:6379/0")
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -66,8 +159,8 @@ class Settings(BaseSettings):
             required_fields.append(("DeepSeek API Key", self.deepseek_api_key))
         elif self.ai_service_provider == "openrouter":
             required_fields.append(("OpenRouter API Key", self.openrouter_api_key))
-        elif self.ai_service_provider == "mock":
-            # 模擬服務不需要 API Key
+        elif self.ai_service_provider in ("local", "router", "mock"):
+            # 本地分析與模擬服務不需要 API Key；路由會略過缺少 API Key 的提供者
             pass
         
         missing_fields = []
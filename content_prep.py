@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+BriefCard - AI 輸入內容整理
+在爬蟲與 AI 服務之間去除導覽列、連結清單、Cookie 橫幅等雜訊，依模型估算 token 數，
+在 token 預算內挑選資訊量最高的段落，取代直接以字數截斷原始 Markdown
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+from config import settings
+from local_ai_service import tokenize
+
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+BARE_URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+MARKUP_PATTERN = re.compile(r"^[#>\-*+\s]+|[*_`|]+")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_END_PATTERN = re.compile(r"[。！？!?；;.]")
+CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]")
+
+# 常見的網站樣板文字（只在較短的行中出現時視為雜訊）
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|隱私權|隐私|privacy policy|版權所有|版权所有|all rights reserved|copyright|©|"
+    r"登入|登录|註冊|注册|sign in|log in|sign up|訂閱|订阅|subscribe|newsletter|"
+    r"分享到|分享至|share this|上一篇|下一篇|相關文章|相关文章|related posts|延伸閱讀|推薦閱讀|"
+    r"廣告|广告|advertisement|sponsored|免責聲明|免责声明|skip to content|back to top|回到頂部",
+    re.IGNORECASE
+)
+BOILERPLATE_MAX_CHARS = 120
+
+# 各模型的 token 估算（每個 CJK 字元、每個其他字元的 token 數），依模型名稱子字串比對
+MODEL_TOKEN_RATIOS: List[Tuple[str, float, float]] = [
+    ("deepseek", 0.6, 0.3),
+    ("qwen", 0.6, 0.3),
+    ("gpt-4o", 0.8, 0.25),
+    ("gemma", 0.8, 0.28),
+    ("llama", 1.0, 0.28),
+    ("phi", 1.2, 0.28),
+]
+DEFAULT_TOKEN_RATIO = (1.0, 0.3)
+
+# 各提示詞佔 AI_INPUT_TOKEN_BUDGET 的比例（關鍵詞與分類不需要完整內容）
+PROMPT_BUDGET_RATIOS = {"summary": 1.0, "keywords": 0.7, "category": 0.4}
+
+def prompt_token_budget(kind: str) -> int:
+    """指定提示詞的內容 token 預算"""
+    return max(100, int(settings.ai_input_token_budget * PROMPT_BUDGET_RATIOS.get(kind, 1.0)))
+
+def token_ratio(model: str) -> Tuple[float, float]:
+    model = (model or "").lower()
+    for name, cjk_ratio, other_ratio in MODEL_TOKEN_RATIOS:
+        if name in model:
+            return cjk_ratio, other_ratio
+    return DEFAULT_TOKEN_RATIO
+
+def estimate_tokens(text: str, model: str = "") -> int:
+    """估算文字在指定模型下的 token 數（CJK 與其他字元分開計算）"""
+    if not text:
+        return 0
+    cjk_ratio, other_ratio = token_ratio(model)
+    cjk_chars = len(CJK_PATTERN.findall(text))
+    return math.ceil(cjk_chars * cjk_ratio + (len(text) - cjk_chars) * other_ratio)
+
+def clean_markdown(content: str) -> str:
+    """
+    去除 Markdown 雜訊
+
+    移除圖片與網址、連結只保留文字，略過以連結為主的導覽行、短的樣板文字行與重複行，
+    段落之間保留空行
+    """
+    lines: List[str] = []
+    seen = set()
+    for raw_line in (content or "").splitlines():
+        line = raw_line.strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+
+        link_count = len(LINK_PATTERN.findall(line))
+        text = LINK_PATTERN.sub(r"\1", IMAGE_PATTERN.sub("", line))
+        text = MARKUP_PATTERN.sub("", BARE_URL_PATTERN.sub("", text)).strip()
+        if not text:
+            continue
+
+        # 導覽列 / 連結清單：幾乎都是連結文字，且不是完整句子
+        if link_count and len(text) < 40 * link_count and not SENTENCE_END_PATTERN.search(text[-1]):
+            continue
+        if len(text) <= BOILERPLATE_MAX_CHARS and BOILERPLATE_PATTERN.search(text):
+            continue
+        if len(text) > 10:
+            if text in seen:
+                continue
+            seen.add(text)
+
+        lines.append(("- " + text) if LIST_ITEM_PATTERN.match(line) else text)
+
+    return "\n".join(lines).strip()
+
+@lru_cache(maxsize=16)
+def split_sections(content: str) -> Tuple[str, ...]:
+    """清理後依空行切成段落；只有標題的短段落併入下一段"""
+    sections: List[str] = []
+    pending_heading = ""
+    for paragraph in PARAGRAPH_SPLIT.split(clean_markdown(content)):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) < 30 and "\n" not in paragraph and not SENTENCE_END_PATTERN.search(paragraph):
+            pending_heading = f"{pending_heading} {paragraph}".strip()
+            continue
+        sections.append(f"{pending_heading}\n{paragraph}" if pending_heading else paragraph)
+        pending_heading = ""
+    return tuple(sections)
+
+def score_section(section: str, index: int, title_terms: set) -> float:
+    """
+    段落資訊量分數
+
+    長度（開根號，避免長段落獨大）× 句子完整度（標點密度）× 清單懲罰 × 與標題的詞重疊 × 前段加成
+    """
+    length = len(section)
+    if length < 20:
+        return 0.0
+
+    lines = section.splitlines()
+    list_ratio = sum(1 for line in lines if line.startswith("- ")) / len(lines)
+    prose = min(1.0, len(SENTENCE_END_PATTERN.findall(section)) * 40 / length)
+
+    score = math.sqrt(length) * (0.3 + prose) * (1 - 0.5 * list_ratio)
+    if title_terms:
+        overlap = len(title_terms & set(tokenize(section))) / len(title_terms)
+        score *= 1 + overlap
+    return score * (1 + 0.5 / (1 + index))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "") -> str:
+    """截斷至 token 上限，盡量在句尾斷開"""
+    tokens = estimate_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+
+    limit = max(1, int(len(text) * max_tokens / tokens))
+    cut = text[:limit]
+    ends = [match.end() for match in SENTENCE_END_PATTERN.finditer(cut)]
+    if ends and ends[-1] > limit // 2:
+        cut = cut[:ends[-1]]
+    return cut.strip()
+
+def prepare_content(title: str, content: str, model: str = "", token_budget: int = 1500) -> str:
+    """
+    整理要送給 LLM 的內容
+
+    Args:
+        model: 模型名稱（用於估算 token 數）
+        token_budget: 內容部分的 token 上限
+
+    Returns:
+        依原文順序串接的高資訊量段落，總 token 數不超過預算
+    """
+    sections = split_sections(content or "")
+    if not sections:
+        return truncate_to_tokens((content or "").strip(), token_budget, model)
+
+    title_terms = set(tokenize(title or ""))
+    ranked = sorted(
+        range(len(sections)),
+        key=lambda i: score_section(sections[i], i, title_terms),
+        reverse=True
+    )
+
+    chosen: List[Tuple[int, str]] = []
+    remaining = token_budget
+    for index in ranked:
+        if remaining < 50:
+            break
+        section = sections[index]
+        tokens = estimate_tokens(section, model)
+        if tokens > remaining:
+            # 放不下整段時，只有資訊量最高的段落會被截斷放入
+            if chosen:
+                continue
+            section = truncate_to_tokens(section, remaining, model)
+            tokens = estimate_tokens(section, model)
+        chosen.append((index, section))
+        remaining -= tokens + 1
+
+    return "\n\n".join(section for _, section in sorted(chosen))
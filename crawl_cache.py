@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 爬取結果快取
+以標準化 URL 為鍵快取爬蟲結果，並合併同一 URL 的並行爬取
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class _LeaderCancelled(Exception):
+    """singleflight 的爬取者被取消（等待者應自行爬取，而不是跟著被取消）"""
+
+class MemoryCacheBackend:
+    """行程內快取，以位元組總量為上限的 LRU"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(value)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: int):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.time() + ttl, size, dict(value))
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.current_bytes -= entry[1]
+
+    async def close(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+class RedisCacheBackend:
+    """
+    共享快取，讓多個 uvicorn worker 共用爬取結果
+
+    容量上限交由 Redis 的 maxmemory + allkeys-lru 設定處理；
+    另外提供分散式鎖，讓跨 worker 的同一 URL 也只爬取一次。
+    """
+
+    def __init__(self, url: str, prefix: str = "briefcard:crawl:"):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: int):
+        await self.redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False, default=str), ex=ttl)
+
+    async def delete(self, key: str):
+        await self.redis.delete(self.prefix + key)
+
+    async def acquire_lock(self, key: str, ttl: int) -> bool:
+        """取得跨 worker 的爬取鎖"""
+        return bool(await self.redis.set(f"{self.prefix}lock:{key}", "1", nx=True, ex=ttl))
+
+    async def release_lock(self, key: str):
+        await self.redis.delete(f"{self.prefix}lock:{key}")
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+class CrawlCache:
+    """爬取結果快取，支援成功 / 失敗分別的 TTL 與 singleflight"""
+
+    def __init__(self, backend, success_ttl: int, failure_ttl: int, lock_timeout: int = 60):
+        self.backend = backend
+        self.success_ttl = success_ttl
+        self.failure_ttl = failure_ttl
+        self.lock_timeout = lock_timeout
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """
+        讀取快取，未命中時執行 fetch；同一鍵的並行請求只會觸發一次 fetch
+
+        Args:
+            key: 快取鍵（標準化後的 URL）
+            fetch: 實際爬取的協程工廠
+        """
+        cached = await self._safe_get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        # 同一行程內已有相同 URL 在爬取中，直接等待其結果
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.coalesced += 1
+            try:
+                result = await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                return await self.get_or_fetch(key, fetch)
+            return dict(result) if result else result
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            result = await self._fetch_with_lock(key, fetch)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # 只有爬取者被取消，等待者改為自行爬取
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免沒有等待者時出現 "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fetch_with_lock(self, key: str, fetch) -> Optional[Dict[str, Any]]:
+        """跨 worker 協調：取得鎖者爬取，其餘等待共享快取"""
+        acquire_lock = getattr(self.backend, "acquire_lock", None)
+        locked = False
+
+        if acquire_lock:
+            try:
+                locked = await acquire_lock(key, self.lock_timeout)
+                if not locked:
+                    cached = await self._wait_for_peer(key)
+                    if cached is not None:
+                        self.coalesced += 1
+                        return cached
+            except Exception as e:
+                logger.warning(f"⚠️ 爬取鎖操作失敗，直接爬取: {e}")
+
+        try:
+            result = await fetch()
+            if result is not None:
+                ttl = self.success_ttl if result.get("success") else self.failure_ttl
+                await self._safe_set(key, result, ttl)
+            return result
+        finally:
+            if locked:
+                try:
+                    await self.backend.release_lock(key)
+                except Exception as e:
+                    logger.warning(f"⚠️ 釋放爬取鎖失敗: {e}")
+
+    async def _wait_for_peer(self, key: str) -> Optional[Dict[str, Any]]:
+        """等待其他 worker 寫入快取"""
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            await asyncio.sleep(0.2)
+            cached = await self._safe_get(key)
+            if cached is not None:
+                return cached
+        return None
+
+    async def _safe_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ 讀取爬取快取失敗: {e}")
+            return None
+
+    async def _safe_set(self, key: str, value: Dict[str, Any], ttl: int):
+        if ttl <= 0:
+            return
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ 寫入爬取快取失敗: {e}")
+
+    async def invalidate(self, key: str):
+        """移除指定 URL 的快取"""
+        await self.backend.delete(key)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            **self.backend.stats()
+        }
+
+def create_crawl_cache() -> CrawlCache:
+    """根據配置建立爬取快取"""
+    backend_name = settings.crawl_cache_backend.lower()
+    backend = None
+
+    if backend_name == "redis":
+        try:
+            backend = RedisCacheBackend(settings.crawl_cache_redis_url)
+            logger.info(f"🗃️ 使用 Redis 爬取快取: {settings.crawl_cache_redis_url}")
+        except ImportError:
+            logger.warning("⚠️ 未安裝 redis 套件，改用行程內爬取快取")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis 爬取快取初始化失敗，改用行程內快取: {e}")
+
+    if backend is None:
+        backend = MemoryCacheBackend(settings.crawl_cache_max_bytes)
+
+    # backend=none 時將 TTL 設為 0，只保留 singleflight
+    enabled = backend_name != "none"
+    return CrawlCache(
+        backend,
+        success_ttl=settings.crawl_cache_ttl if enabled else 0,
+        failure_ttl=settings.crawl_cache_failure_ttl if enabled else 0,
+        lock_timeout=settings.crawler_timeout * 2
+    )
@@ -8,10 +8,14 @@ import asyncio
 import time
 from typing import Optional, Dict, Any
 import logging
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 import re
 
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+import httpx
+from crawl4ai import BrowserConfig, CrawlerRunConfig
+from browser_pool import BrowserPool
+from crawl_cache import create_crawl_cache
+from html_metadata import parse_html_metadata
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -41,6 +45,48 @@ class WebCrawlerService:
             override_navigator=False,
             delay_before_return_html=3.0,  # 給內容更多時間載入
         )
+        
+        # 常駐瀏覽器池，由 FastAPI lifespan 啟動與關閉
+        self.browser_pool = BrowserPool(
+            self.browser_config,
+            size=settings.browser_pool_size,
+            max_pages=settings.browser_max_pages,
+            max_memory_mb=settings.browser_max_memory_mb,
+            memory_check_interval=settings.browser_memory_check_interval
+        )
+        
+        # 以標準化 URL 為鍵的爬取結果快取
+        self.cache = create_crawl_cache()
+        
+        # 靜態抓取用的 HTTP 連線池
+        self.http_client = httpx.AsyncClient(
+            timeout=settings.crawler_http_timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            headers={
+                "User-Agent": self.browser_config.user_agent,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8"
+            }
+        )
+    
+    @property
+    def is_ready(self) -> bool:
+        """爬蟲是否可用（http 模式不使用瀏覽器池，只看 HTTP 連線池）"""
+        if self.http_client.is_closed:
+            return False
+        return settings.crawler_fetch_mode == "http" or self.browser_pool.is_running
+    
+    async def start(self):
+        """啟動並預熱瀏覽器池"""
+        if settings.crawler_fetch_mode != "http":
+            await self.browser_pool.start()
+    
+    async def close(self):
+        """關閉瀏覽器池、HTTP 連線池與快取"""
+        await self.browser_pool.close()
+        await self.http_client.aclose()
+        await self.cache.close()
     
     def is_valid_url(self, url: str) -> bool:
         """驗證 URL 是否有效"""
@@ -79,12 +125,107 @@ class WebCrawlerService:
             return None
         
         cleaned_url = self.clean_url(url)
+        
+        # 相同 URL 共用快取結果，並行請求只會爬取一次
+        return await self.cache.get_or_fetch(
+            cleaned_url,
+            lambda: self._extract_uncached(cleaned_url)
+        )
+    
+    async def _extract_uncached(self, cleaned_url: str) -> Dict[str, Any]:
+        """實際爬取網頁（不經快取）"""
         logger.info(f"🕷️ 開始爬取: {cleaned_url}")
         
         start_time = time.time()
         
+        # 先嘗試純 HTTP 抓取靜態中繼資料，必要時才升級到瀏覽器渲染
+        if settings.crawler_fetch_mode in ("tiered", "http"):
+            static_result = await self._extract_static(cleaned_url, start_time)
+            if static_result:
+                return static_result
+            if settings.crawler_fetch_mode == "http":
+                return {"error": "靜態抓取失敗", "url": cleaned_url, "success": False}
+        
+        return await self._extract_with_browser(cleaned_url, start_time)
+    
+    async def _extract_static(self, cleaned_url: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """
+        以 HTTP GET 抓取並解析靜態 HTML
+        
+        Returns:
+            與瀏覽器路徑相同格式的結果，或 None 表示需要升級到瀏覽器
+        """
+        try:
+            async with self.http_client.stream("GET", cleaned_url) as response:
+                content_type = response.headers.get("content-type", "")
+                if response.status_code >= 400 or "html" not in content_type:
+                    logger.info(f"↪️ 靜態抓取不適用 ({response.status_code}, {content_type or '未知類型'})，改用瀏覽器: {cleaned_url}")
+                    return None
+                
+                raw = bytearray()
+                async for chunk in response.aiter_bytes():
+                    raw.extend(chunk)
+                    if len(raw) >= settings.crawler_http_max_bytes:
+                        break
+                
+                html = self._decode_html(bytes(raw), response.charset_encoding)
+                final_url = str(response.url)
+                status_code = response.status_code
+        except (httpx.HTTPError, UnicodeError) as e:
+            logger.info(f"↪️ 靜態抓取失敗，改用瀏覽器: {cleaned_url} - {e}")
+            return None
+        
+        parsed = parse_html_metadata(html)
+        metadata = parsed["metadata"]
+        
+        if parsed["js_rendered"]:
+            logger.info(f"↪️ 頁面需要 JavaScript 渲染，改用瀏覽器: {cleaned_url}")
+            return None
+        if not metadata["title"] and not metadata["description"]:
+            logger.info(f"↪️ 靜態頁面無可用中繼資料，改用瀏覽器: {cleaned_url}")
+            return None
+        
+        image_url = self._extract_main_image(metadata)
+        if image_url:
+            image_url = urljoin(final_url, image_url)
+        
+        markdown = parsed["content_markdown"]
+        content_data = {
+            "url": cleaned_url,
+            "title": metadata["title"] or self._extract_title_from_content(markdown),
+            "description": metadata["description"] or self._extract_description_from_content(markdown),
+            "image_url": image_url,
+            "content_markdown": self._truncate_content(markdown),
+            "content_text": self._truncate_content(parsed["content_text"]),
+            "author": metadata["author"],
+            "publish_date": metadata["published_time"],
+            "site_name": metadata["site_name"] or self._extract_domain(cleaned_url),
+            "success": True,
+            "crawl_duration": round(time.time() - start_time, 2),
+            "word_count": len(markdown.split()),
+            "status_code": status_code,
+            "fetch_mode": "http"
+        }
+        
+        logger.info(f"⚡ 靜態抓取成功: {cleaned_url} ({content_data['crawl_duration']}s)")
+        return content_data
+    
+    def _decode_html(self, raw: bytes, header_encoding: Optional[str]) -> str:
+        """依 HTTP 標頭或 <meta charset> 解碼 HTML"""
+        encoding = header_encoding
+        if not encoding:
+            match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', raw[:4096], re.IGNORECASE)
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        
+        try:
+            return raw.decode(encoding, errors="replace")
+        except LookupError:
+            return raw.decode("utf-8", errors="replace")
+    
+    async def _extract_with_browser(self, cleaned_url: str, start_time: float) -> Dict[str, Any]:
+        """以 Crawl4AI 瀏覽器渲染頁面並提取內容"""
         try:
-            async with AsyncWebCrawler(config=self.browser_config) as crawler:
+            async with self.browser_pool.acquire() as crawler:
                 result = await crawler.arun(
                     url=cleaned_url,
                     config=self.crawl_config
@@ -113,7 +254,8 @@ class WebCrawlerService:
                     "success": True,
                     "crawl_duration": round(time.time() - start_time, 2),
                     "word_count": len((result.markdown or "").split()),
-                    "status_code": getattr(result, 'status_code', 200)
+                    "status_code": getattr(result, 'status_code', 200),
+                    "fetch_mode": "browser"
                 }
                 
                 logger.info(f"✅ 爬取成功: {cleaned_url} ({content_data['crawl_duration']}s)")
@@ -221,6 +363,8 @@ async def test_crawler():
         print(f"耗時: {result.get('crawl_duration')}s")
     else:
         print("❌ 爬蟲測試失敗")
+    
+    await crawler_service.close()
 
 if __name__ == "__main__":
     print("🕷️ 爬蟲服務測試")
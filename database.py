@@ -4,21 +4,134 @@ BriefCard - Supabase 資料庫客戶端
 處理所有資料庫操作和連線管理
 """
 
-from supabase import create_client, Client
-from typing import Optional, Dict, Any, List
+from supabase import create_client, Client, ClientOptions
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
+import json
+import time
+import uuid
+
+import httpx
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# 列表 / 卡片用的欄位（不含動輒數十 KB 的 content_markdown）
+BOOKMARK_CARD_COLUMNS = "id,user_id,folder_id,url,title,description,image_url,site_name,summary,notes,tags,category,status,created_at,updated_at"
+
+# 單筆詳情用的完整欄位
+BOOKMARK_DETAIL_COLUMNS = "*"
+
+def encode_cursor(bookmark: Dict[str, Any]) -> str:
+    """將書籤的 (created_at, id) 編碼為不透明的分頁游標"""
+    raw = json.dumps([bookmark["created_at"], bookmark["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    解碼分頁游標
+    
+    Raises:
+        ValueError: 游標格式錯誤
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, bookmark_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+        # 兩者都會被放進 PostgREST 的 or 篩選字串，需確認不含引號、逗號或括號
+        return str(created_at), str(uuid.UUID(str(bookmark_id)))
+    except Exception as e:
+        raise ValueError(f"無效的分頁游標: {cursor}") from e
+
+class BookmarkStatsCache:
+    """
+    每位用戶的書籤統計彙總
+    
+    查詢結果保留 ttl 秒；期間內建立 / 刪除書籤時直接增減計數，
+    跨日或逾時後才重新查詢資料庫。
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, Any]] = {}
+    
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if not entry:
+            return None
+        if entry["expires_at"] <= time.time() or entry["day"] != datetime.utcnow().date():
+            self._entries.pop(user_id, None)
+            return None
+        return dict(entry["stats"])
+    
+    def set(self, user_id: str, stats: Dict[str, Any]):
+        if self.ttl <= 0:
+            return
+        self._entries[user_id] = {
+            "stats": dict(stats),
+            "expires_at": time.time() + self.ttl,
+            "day": datetime.utcnow().date()
+        }
+    
+    def apply(self, bookmark: Dict[str, Any], delta: int):
+        """依書籤的建立時間增減統計"""
+        entry = self._entries.get(bookmark.get("user_id"))
+        if not entry:
+            return
+        
+        try:
+            created_at = datetime.fromisoformat(str(bookmark.get("created_at")).replace("Z", "+00:00"))
+            created_at = created_at.replace(tzinfo=None) - (created_at.utcoffset() or timedelta(0))
+        except ValueError:
+            # 無法判斷時間時直接讓快取失效
+            self._entries.pop(bookmark.get("user_id"), None)
+            return
+        
+        now = datetime.utcnow()
+        stats = entry["stats"]
+        stats["total"] = max(0, stats["total"] + delta)
+        if created_at.date() >= now.date():
+            stats["today"] = max(0, stats["today"] + delta)
+        if created_at >= now - timedelta(days=7):
+            stats["this_week"] = max(0, stats["this_week"] + delta)
+        if created_at >= now - timedelta(days=30):
+            stats["this_month"] = max(0, stats["this_month"] + delta)
+    
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
 class SupabaseClient:
     """Supabase 資料庫客戶端封裝"""
     
     def __init__(self):
         """初始化 Supabase 客戶端"""
         self.client: Optional[Client] = None
+        
+        # supabase-py 的 .execute() 是同步阻塞呼叫，統一交給專用執行緒池，
+        # 並以 semaphore 限制同時進行的查詢數，避免塞滿執行緒池或連線池
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.db_max_workers,
+            thread_name_prefix="supabase"
+        )
+        self._semaphore = asyncio.Semaphore(settings.db_max_concurrency)
+        
+        # 所有查詢共用的 HTTP 連線池（keep-alive）
+        self.http_client = httpx.Client(
+            timeout=settings.db_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.db_max_workers,
+                max_keepalive_connections=settings.db_max_workers
+            )
+        )
+        
+        # 每位用戶的統計彙總，建立 / 刪除書籤時增量更新
+        self.stats_cache = BookmarkStatsCache(settings.stats_cache_ttl)
+        
         self.connect()
     
     def connect(self) -> bool:
@@ -26,7 +139,8 @@ class SupabaseClient:
         try:
             self.client = create_client(
                 settings.supabase_url,
-                settings.supabase_anon_key
+                settings.supabase_anon_key,
+                options=ClientOptions(httpx_client=self.http_client)
             )
             logger.info("✅ Supabase 連線成功")
             return True
@@ -34,14 +148,26 @@ class SupabaseClient:
             logger.error(f"❌ Supabase 連線失敗: {e}")
             return False
     
-    def health_check(self) -> bool:
+    async def _execute(self, query):
+        """在執行緒池中執行 PostgREST 查詢，不阻塞事件迴圈"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, query.execute)
+    
+    async def close(self):
+        """關閉執行緒池與 HTTP 連線池"""
+        # 等待進行中的查詢結束時不阻塞事件迴圈
+        await asyncio.to_thread(self.executor.shutdown, True, cancel_futures=True)
+        self.http_client.close()
+    
+    async def health_check(self) -> bool:
         """檢查資料庫連線狀態"""
         try:
             if not self.client:
                 return False
             
             # 簡單查詢測試連線
-            result = self.client.table("bookmarks").select("count").limit(1).execute()
+            result = await self._execute(self.client.table("bookmarks").select("count").limit(1))
             return True
         except Exception as e:
             logger.error(f"資料庫健康檢查失敗: {e}")
@@ -52,19 +178,20 @@ class SupabaseClient:
     async def create_bookmark(self, bookmark_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """建立新書籤"""
         try:
-            result = self.client.table("bookmarks").insert(bookmark_data).execute()
+            result = await self._execute(self.client.table("bookmarks").insert(bookmark_data))
             if result.data:
                 logger.info(f"✅ 書籤建立成功: {result.data[0]['id']}")
+                self.stats_cache.apply(result.data[0], +1)
                 return result.data[0]
             return None
         except Exception as e:
             logger.error(f"❌ 建立書籤失敗: {e}")
             return None
     
-    async def get_bookmark(self, bookmark_id: str) -> Optional[Dict[str, Any]]:
+    async def get_bookmark(self, bookmark_id: str, columns: str = BOOKMARK_DETAIL_COLUMNS) -> Optional[Dict[str, Any]]:
         """根據 ID 獲取書籤"""
         try:
-            result = self.client.table("bookmarks").select("*").eq("id", bookmark_id).execute()
+            result = await self._execute(self.client.table("bookmarks").select(columns).eq("id", bookmark_id))
             if result.data:
                 return result.data[0]
             return None
@@ -72,73 +199,173 @@ class SupabaseClient:
             logger.error(f"❌ 獲取書籤失敗: {e}")
             return None
     
-    async def get_bookmarks_by_user(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    async def get_bookmarks_by_user(self, user_id: str, limit: int = 50, offset: int = 0,
+                                    columns: str = BOOKMARK_CARD_COLUMNS) -> List[Dict[str, Any]]:
         """獲取用戶的所有書籤（支援分頁）"""
         try:
-            result = (self.client.table("bookmarks")
-                     .select("*")
-                     .eq("user_id", user_id)
-                     .order("created_at", desc=True)
-                     .range(offset, offset + limit - 1)
-                     .execute())
+            result = await self._execute(self.client.table("bookmarks")
+                                        .select(columns)
+                                        .eq("user_id", user_id)
+                                        .order("created_at", desc=True)
+                                        .order("id", desc=True)
+                                        .range(offset, offset + limit - 1))
             return result.data or []
         except Exception as e:
             logger.error(f"❌ 獲取用戶書籤失敗: {e}")
             return []
     
-    async def search_bookmarks(self, user_id: str, query: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """搜索用戶書籤"""
+    async def get_bookmarks_by_ids(self, user_id: str, bookmark_ids: List[str],
+                                   columns: str = BOOKMARK_CARD_COLUMNS) -> List[Dict[str, Any]]:
+        """依 ID 獲取用戶的書籤（不保證順序）"""
+        if not bookmark_ids:
+            return []
+        try:
+            result = await self._execute(self.client.table("bookmarks")
+                                        .select(columns)
+                                        .eq("user_id", user_id)
+                                        .in_("id", bookmark_ids))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"❌ 依 ID 獲取書籤失敗: {e}")
+            return []
+    
+    async def get_bookmarks_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None,
+                                 columns: str = BOOKMARK_CARD_COLUMNS) -> Dict[str, Any]:
+        """
+        以 keyset（游標）分頁獲取用戶書籤，依 (created_at, id) 由新到舊
+        
+        Args:
+            cursor: 上一頁回傳的 next_cursor，None 表示第一頁
+            
+        Returns:
+            {"bookmarks": [...], "next_cursor": str 或 None}
+            
+        Raises:
+            ValueError: 游標格式錯誤
+        """
+        query = (self.client.table("bookmarks")
+                 .select(columns)
+                 .eq("user_id", user_id))
+        
+        if cursor:
+            created_at, bookmark_id = decode_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{bookmark_id}")'
+            )
+        
+        try:
+            # 多取一筆用來判斷是否還有下一頁
+            result = await self._execute(query
+                                        .order("created_at", desc=True)
+                                        .order("id", desc=True)
+                                        .limit(limit + 1))
+            rows = result.data or []
+        except Exception as e:
+            logger.error(f"❌ 獲取用戶書籤失敗: {e}")
+            rows = []
+        
+        bookmarks = rows[:limit]
+        next_cursor = encode_cursor(bookmarks[-1]) if len(rows) > limit else None
+        return {"bookmarks": bookmarks, "next_cursor": next_cursor}
+    
+    async def search_bookmarks(self, user_id: str, query: str, limit: int = 50, offset: int = 0,
+                               columns: str = BOOKMARK_CARD_COLUMNS) -> List[Dict[str, Any]]:
+        """
+        搜索用戶書籤（全文搜尋，依相關度排序）
+        
+        使用 search_bookmarks RPC（見 migrations/003_bookmark_search.sql），
+        涵蓋標題、摘要、標籤、筆記與內文；未部署時退回 ilike 模糊搜尋。
+        """
+        try:
+            result = await self._execute(self.client.rpc("search_bookmarks", {
+                                            "p_user_id": user_id,
+                                            "p_query": query,
+                                            "p_limit": limit,
+                                            "p_offset": offset
+                                        })
+                                        .select(columns))
+            return result.data or []
+        except Exception as e:
+            logger.warning(f"⚠️ 全文搜尋 RPC 不可用，改用 ilike 搜尋: {e}")
+            return await self._search_bookmarks_ilike(user_id, query, limit, offset, columns)
+    
+    async def _search_bookmarks_ilike(self, user_id: str, query: str, limit: int = 50, offset: int = 0,
+                                      columns: str = BOOKMARK_CARD_COLUMNS) -> List[Dict[str, Any]]:
+        """以 ilike 模糊搜索標題、網址與筆記（無法使用索引）"""
         try:
             # 使用 ilike 進行不區分大小寫的模糊搜索
-            result = (self.client.table("bookmarks")
-                     .select("*")
-                     .eq("user_id", user_id)
-                     .or_(f"title.ilike.%{query}%,url.ilike.%{query}%,notes.ilike.%{query}%")
-                     .order("created_at", desc=True)
-                     .limit(limit)
-                     .execute())
+            result = await self._execute(self.client.table("bookmarks")
+                                        .select(columns)
+                                        .eq("user_id", user_id)
+                                        .or_(f"title.ilike.%{query}%,url.ilike.%{query}%,notes.ilike.%{query}%")
+                                        .order("created_at", desc=True)
+                                        .range(offset, offset + limit - 1))
             return result.data or []
         except Exception as e:
             logger.error(f"❌ 搜索書籤失敗: {e}")
             return []
     
     async def get_bookmark_stats(self, user_id: str) -> Dict[str, Any]:
-        """獲取用戶書籤統計資訊"""
+        """獲取用戶書籤統計資訊（短 TTL 快取 + 單一彙總查詢）"""
+        cached = self.stats_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
+        try:
+            result = await self._execute(self.client.rpc("get_bookmark_stats", {"p_user_id": user_id}))
+            row = (result.data or [{}])[0]
+            stats = {
+                "total": row.get("total") or 0,
+                "today": row.get("today") or 0,
+                "this_week": row.get("this_week") or 0,
+                "this_month": row.get("this_month") or 0
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ get_bookmark_stats RPC 不可用，改用逐項查詢: {e}")
+            stats = await self._get_bookmark_stats_legacy(user_id)
+            if stats is None:
+                return {
+                    "total": 0,
+                    "today": 0,
+                    "this_week": 0,
+                    "this_month": 0
+                }
+        
+        self.stats_cache.set(user_id, stats)
+        return stats
+    
+    async def _get_bookmark_stats_legacy(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """以四次 count 查詢計算統計（未部署 get_bookmark_stats RPC 時的備援）"""
         try:
-            from datetime import datetime, timedelta
-            
             # 總書籤數
-            total_result = (self.client.table("bookmarks")
-                           .select("id", count="exact")
-                           .eq("user_id", user_id)
-                           .execute())
+            total_result = await self._execute(self.client.table("bookmarks")
+                                              .select("id", count="exact")
+                                              .eq("user_id", user_id))
             total_count = total_result.count or 0
             
             # 今日新增
             today = datetime.utcnow().date()
-            today_result = (self.client.table("bookmarks")
-                           .select("id", count="exact")
-                           .eq("user_id", user_id)
-                           .gte("created_at", today.isoformat())
-                           .execute())
+            today_result = await self._execute(self.client.table("bookmarks")
+                                              .select("id", count="exact")
+                                              .eq("user_id", user_id)
+                                              .gte("created_at", today.isoformat()))
             today_count = today_result.count or 0
             
             # 本週新增
             week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-            week_result = (self.client.table("bookmarks")
-                          .select("id", count="exact")
-                          .eq("user_id", user_id)
-                          .gte("created_at", week_ago)
-                          .execute())
+            week_result = await self._execute(self.client.table("bookmarks")
+                                             .select("id", count="exact")
+                                             .eq("user_id", user_id)
+                                             .gte("created_at", week_ago))
             week_count = week_result.count or 0
             
             # 本月新增
             month_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
-            month_result = (self.client.table("bookmarks")
-                           .select("id", count="exact")
-                           .eq("user_id", user_id)
-                           .gte("created_at", month_ago)
-                           .execute())
+            month_result = await self._execute(self.client.table("bookmarks")
+                                              .select("id", count="exact")
+                                              .eq("user_id", user_id)
+                                              .gte("created_at", month_ago))
             month_count = month_result.count or 0
             
             return {
@@ -149,21 +376,30 @@ class SupabaseClient:
             }
         except Exception as e:
             logger.error(f"❌ 獲取書籤統計失敗: {e}")
-            return {
-                "total": 0,
-                "today": 0,
-                "this_week": 0,
-                "this_month": 0
-            }
+            return None
     
+    async def get_stale_processing_bookmarks(self, older_than_seconds: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """獲取停留在處理中（含等待 AI 分析）狀態超過指定秒數的書籤（用於重啟後恢復）"""
+        try:
+            cutoff = (datetime.utcnow() - timedelta(seconds=older_than_seconds)).isoformat()
+            result = await self._execute(self.client.table("bookmarks")
+                                        .select("id,url,updated_at")
+                                        .in_("status", ["processing", "metadata_ready"])
+                                        .lt("updated_at", cutoff)
+                                        .order("updated_at")
+                                        .limit(limit))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"❌ 獲取卡住的書籤失敗: {e}")
+            return []
+
     async def update_bookmark(self, bookmark_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """更新書籤資訊"""
         try:
             update_data["updated_at"] = datetime.utcnow().isoformat()
-            result = (self.client.table("bookmarks")
-                     .update(update_data)
-                     .eq("id", bookmark_id)
-                     .execute())
+            result = await self._execute(self.client.table("bookmarks")
+                                        .update(update_data)
+                                        .eq("id", bookmark_id))
             if result.data:
                 return result.data[0]
             return None
@@ -171,10 +407,35 @@ class SupabaseClient:
             logger.error(f"❌ 更新書籤失敗: {e}")
             return None
     
+    async def save_bookmark_card(self, bookmark_id: str, card_json: bytes) -> bool:
+        """保存預先渲染的 Flex 卡片（不更新 updated_at）"""
+        try:
+            await self._execute(self.client.table("bookmarks")
+                               .update({"card_json": card_json.decode("utf-8")})
+                               .eq("id", bookmark_id))
+            return True
+        except Exception as e:
+            logger.error(f"❌ 保存書籤卡片失敗: {e}")
+            return False
+    
+    async def save_summary_preview(self, bookmark_id: str, summary: str) -> bool:
+        """寫入串流中的摘要預覽（只更新仍在處理中的書籤，不會覆寫已完成的結果）"""
+        try:
+            result = await self._execute(self.client.table("bookmarks")
+                                        .update({"summary": summary})
+                                        .eq("id", bookmark_id)
+                                        .eq("status", "metadata_ready"))
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"❌ 保存摘要預覽失敗: {e}")
+            return False
+    
     async def delete_bookmark(self, bookmark_id: str) -> bool:
         """删除書籤"""
         try:
-            result = self.client.table("bookmarks").delete().eq("id", bookmark_id).execute()
+            result = await self._execute(self.client.table("bookmarks").delete().eq("id", bookmark_id))
+            for row in result.data or []:
+                self.stats_cache.apply(row, -1)
             logger.info(f"✅ 書籤删除成功: {bookmark_id}")
             return True
         except Exception as e:
@@ -191,7 +452,7 @@ class SupabaseClient:
                 "share_token": share_token,
                 "created_at": datetime.utcnow().isoformat()
             }
-            result = self.client.table("shares").insert(share_data).execute()
+            result = await self._execute(self.client.table("shares").insert(share_data))
             if result.data:
                 return result.data[0]
             return None
@@ -202,10 +463,9 @@ class SupabaseClient:
     async def get_share_by_token(self, share_token: str) -> Optional[Dict[str, Any]]:
         """根據分享 token 獲取分享資訊"""
         try:
-            result = (self.client.table("shares")
-                     .select("*, bookmarks(*)")
-                     .eq("share_token", share_token)
-                     .execute())
+            result = await self._execute(self.client.table("shares")
+                                        .select("*, bookmarks(*)")
+                                        .eq("share_token", share_token))
             if result.data:
                 return result.data[0]
             return None
@@ -218,7 +478,7 @@ class SupabaseClient:
     async def create_folder(self, folder_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """建立新資料夾"""
         try:
-            result = self.client.table("folders").insert(folder_data).execute()
+            result = await self._execute(self.client.table("folders").insert(folder_data))
             if result.data:
                 logger.info(f"✅ 資料夾建立成功: {result.data[0]['id']}")
                 return result.data[0]
@@ -230,7 +490,7 @@ class SupabaseClient:
     async def get_folder(self, folder_id: str) -> Optional[Dict[str, Any]]:
         """根據 ID 獲取資料夾"""
         try:
-            result = self.client.table("folders").select("*").eq("id", folder_id).execute()
+            result = await self._execute(self.client.table("folders").select("*").eq("id", folder_id))
             if result.data:
                 return result.data[0]
             return None
@@ -241,12 +501,11 @@ class SupabaseClient:
     async def get_folders_by_user(self, user_id: str) -> List[Dict[str, Any]]:
         """獲取用戶的所有資料夾"""
         try:
-            result = (self.client.table("folders")
-                     .select("*")
-                     .eq("user_id", user_id)
-                     .order("sort_order", desc=False)
-                     .order("created_at", desc=False)
-                     .execute())
+            result = await self._execute(self.client.table("folders")
+                                        .select("*")
+                                        .eq("user_id", user_id)
+                                        .order("sort_order", desc=False)
+                                        .order("created_at", desc=False))
             return result.data or []
         except Exception as e:
             logger.error(f"❌ 獲取用戶資料夾失敗: {e}")
@@ -255,12 +514,11 @@ class SupabaseClient:
     async def get_default_folder(self, user_id: str) -> Optional[Dict[str, Any]]:
         """獲取用戶的預設資料夾"""
         try:
-            result = (self.client.table("folders")
-                     .select("*")
-                     .eq("user_id", user_id)
-                     .eq("is_default", True)
-                     .limit(1)
-                     .execute())
+            result = await self._execute(self.client.table("folders")
+                                        .select("*")
+                                        .eq("user_id", user_id)
+                                        .eq("is_default", True)
+                                        .limit(1))
             if result.data:
                 return result.data[0]
             return None
@@ -271,10 +529,9 @@ class SupabaseClient:
     async def update_folder(self, folder_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """更新資料夾資訊"""
         try:
-            result = (self.client.table("folders")
-                     .update(update_data)
-                     .eq("id", folder_id)
-                     .execute())
+            result = await self._execute(self.client.table("folders")
+                                        .update(update_data)
+                                        .eq("id", folder_id))
             if result.data:
                 return result.data[0]
             return None
@@ -285,22 +542,22 @@ class SupabaseClient:
     async def delete_folder(self, folder_id: str) -> bool:
         """删除資料夾"""
         try:
-            result = self.client.table("folders").delete().eq("id", folder_id).execute()
+            result = await self._execute(self.client.table("folders").delete().eq("id", folder_id))
             logger.info(f"✅ 資料夾删除成功: {folder_id}")
             return True
         except Exception as e:
             logger.error(f"❌ 删除資料夾失敗: {e}")
             return False
     
-    async def get_bookmarks_by_folder(self, folder_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_bookmarks_by_folder(self, folder_id: str, limit: int = 50,
+                                      columns: str = BOOKMARK_CARD_COLUMNS) -> List[Dict[str, Any]]:
         """獲取資料夾內的書籤"""
         try:
-            result = (self.client.table("bookmarks")
-                     .select("*")
-                     .eq("folder_id", folder_id)
-                     .order("created_at", desc=True)
-                     .limit(limit)
-                     .execute())
+            result = await self._execute(self.client.table("bookmarks")
+                                        .select(columns)
+                                        .eq("folder_id", folder_id)
+                                        .order("created_at", desc=True)
+                                        .limit(limit))
             return result.data or []
         except Exception as e:
             logger.error(f"❌ 獲取資料夾書籤失敗: {e}")
@@ -312,7 +569,7 @@ db_client = SupabaseClient()
 # 測試連線
 if __name__ == "__main__":
     print("🗄️ Supabase 資料庫連線測試")
-    if db_client.health_check():
+    if asyncio.run(db_client.health_check()):
         print("✅ 資料庫連線正常")
     else:
         print("❌ 資料庫連線失敗")
\ No newline at end of file
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 書籤生命週期事件
+中繼資料就緒、處理完成 / 失敗時發布事件（含最新資料列），LINE 推播等監聽者可立即反應
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Iterable, Tuple, FrozenSet, Set
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+BOOKMARK_METADATA_READY = "bookmark.metadata_ready"
+BOOKMARK_COMPLETED = "bookmark.completed"
+BOOKMARK_FAILED = "bookmark.failed"
+
+class RedisEventBroker:
+    """
+    以 Redis pub/sub 轉送事件，讓多個 uvicorn worker 之間也能收到彼此的事件
+
+    本行程發布的事件會直接在本地派送，透過 origin 略過從 Redis 收回的自身訊息。
+    """
+
+    def __init__(self, url: str, channel: str = "briefcard:bookmark-events"):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.channel = channel
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, on_message: Callable[[Dict[str, Any]], None]):
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(on_message))
+
+    async def _listen(self, on_message: Callable[[Dict[str, Any]], None]):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                on_message(json.loads(message["data"]))
+            except Exception as e:
+                logger.warning(f"⚠️ 無法處理 Redis 事件: {e}")
+
+    async def publish(self, event: Dict[str, Any]):
+        await self.redis.publish(self.channel, json.dumps(event, ensure_ascii=False, default=str))
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self._pubsub:
+            await self._pubsub.aclose()
+        await self.redis.aclose()
+
+class BookmarkEventBus:
+    """行程內的書籤事件 pub/sub，可選擇搭配 Redis 跨 worker 轉送"""
+
+    def __init__(self, broker: Optional[RedisEventBroker] = None):
+        self.broker = broker
+        self.origin = uuid.uuid4().hex
+        self._subscribers: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self._waiters: Dict[str, List[Tuple[Optional[FrozenSet[str]], asyncio.Future]]] = {}
+        # 保留通知任務的參照，避免執行中被垃圾回收
+        self._notify_tasks: Set[asyncio.Task] = set()
+        self.published = 0
+
+    async def start(self):
+        if self.broker:
+            try:
+                await self.broker.start(self._on_broker_message)
+                logger.info("📡 書籤事件已連接 Redis")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis 事件轉送啟動失敗，僅使用行程內事件: {e}")
+                self.broker = None
+
+    async def close(self):
+        if self._notify_tasks:
+            await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+        if self.broker:
+            await self.broker.close()
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """註冊監聽者，每個事件都會以 callback(event) 呼叫"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], Awaitable[None]]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def expect(self, bookmark_id: str, event_types: Optional[Iterable[str]] = None) -> asyncio.Future:
+        """
+        預先登記等待某書籤的事件
+
+        需在排入處理工作之前呼叫，避免處理過快時錯過事件
+
+        Args:
+            event_types: 只等待這些事件類型；None 表示任一事件
+        """
+        future = asyncio.get_running_loop().create_future()
+        types = frozenset(event_types) if event_types else None
+        self._waiters.setdefault(bookmark_id, []).append((types, future))
+        return future
+
+    async def wait_for(self, bookmark_id: str, timeout: float,
+                       future: Optional[asyncio.Future] = None) -> Optional[Dict[str, Any]]:
+        """
+        等待書籤事件
+
+        Returns:
+            符合條件的事件；逾時則回傳 None
+        """
+        future = future or self.expect(bookmark_id)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.discard(bookmark_id, future)
+
+    async def publish(self, event_type: str, bookmark_id: str,
+                      bookmark: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """發布書籤事件"""
+        event = {
+            "type": event_type,
+            "bookmark_id": bookmark_id,
+            "bookmark": bookmark,
+            "error": error,
+            "origin": self.origin
+        }
+        self.published += 1
+        self._dispatch(event)
+
+        if self.broker:
+            try:
+                await self.broker.publish(event)
+            except Exception as e:
+                logger.warning(f"⚠️ 事件轉送至 Redis 失敗: {e}")
+
+    def _on_broker_message(self, event: Dict[str, Any]):
+        if event.get("origin") != self.origin:
+            self._dispatch(event)
+
+    def _dispatch(self, event: Dict[str, Any]):
+        waiters = self._waiters.pop(event["bookmark_id"], [])
+        remaining = []
+        for types, future in waiters:
+            if types is not None and event["type"] not in types:
+                remaining.append((types, future))
+            elif not future.done():
+                future.set_result(event)
+        if remaining:
+            self._waiters[event["bookmark_id"]] = remaining
+
+        for callback in list(self._subscribers):
+            task = asyncio.create_task(self._notify(callback, event))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, callback: Callable[[Dict[str, Any]], Awaitable[None]], event: Dict[str, Any]):
+        try:
+            await callback(event)
+        except Exception as e:
+            logger.error(f"❌ 書籤事件監聽者執行失敗: {e}")
+
+    def discard(self, bookmark_id: str, future: asyncio.Future):
+        """取消以 expect 登記、但不再需要的等待"""
+        waiters = self._waiters.get(bookmark_id)
+        if not waiters:
+            return
+        waiters[:] = [entry for entry in waiters if entry[1] is not future]
+        if not waiters:
+            del self._waiters[bookmark_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if self.broker else "memory",
+            "subscribers": len(self._subscribers),
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "published": self.published
+        }
+
+def create_event_bus() -> BookmarkEventBus:
+    """根據配置建立事件匯流排"""
+    broker = None
+    if settings.event_bus_backend.lower() == "redis":
+        try:
+            broker = RedisEventBroker(settings.event_bus_redis_url)
+        except ImportError:
+            logger.warning("⚠️ 未安裝 redis 套件，改用行程內書籤事件")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis 事件轉送初始化失敗，改用行程內書籤事件: {e}")
+
+    return BookmarkEventBus(broker)
+
+# 建立全域事件匯流排實例
+event_bus = create_event_bus()
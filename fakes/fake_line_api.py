@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 本地假 LINE Messaging API
+提供 reply / push / profile 端點，可注入延遲與 429，用於測試與壓測 LINE 客戶端
+
+用法：
+    python fakes/fake_line_api.py --port 9100 --latency-ms 50 --rate-limit-ratio 0.1
+    LINE_API_BASE_URL=http://localhost:9100 python main.py
+
+檢視 / 調整：
+    GET  /_fake/messages   已收到的訊息
+    GET  /_fake/stats      請求計數
+    POST /_fake/config     {"latency_ms": 0, "rate_limit_ratio": 0.5, "retry_after": 1}
+    POST /_fake/reset      清空紀錄
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional, Dict, Any, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake LINE Messaging API")
+
+config: Dict[str, Any] = {"latency_ms": 0.0, "rate_limit_ratio": 0.0, "retry_after": None}
+messages: List[Dict[str, Any]] = []
+stats: Dict[str, int] = {"reply": 0, "push": 0, "profile": 0, "rate_limited": 0, "duplicate_retry_key": 0}
+used_reply_tokens: set = set()
+seen_retry_keys: set = set()
+
+async def simulate(request: Request) -> Optional[JSONResponse]:
+    """注入延遲與 429，並檢查授權標頭"""
+    if not request.headers.get("Authorization", "").startswith("Bearer "):
+        return JSONResponse(status_code=401, content={"message": "Authentication failed"})
+
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+    if random.random() < config["rate_limit_ratio"]:
+        stats["rate_limited"] += 1
+        headers = {"Retry-After": str(config["retry_after"])} if config["retry_after"] is not None else {}
+        return JSONResponse(status_code=429, content={"message": "The API rate limit has been exceeded. Try again later."},
+                            headers=headers)
+    return None
+
+def accepted() -> JSONResponse:
+    return JSONResponse(status_code=200, content={"sentMessages": []}, headers={"x-line-request-id": str(uuid.uuid4())})
+
+@app.post("/v2/bot/message/reply")
+async def reply(request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+
+    body = await request.json()
+    token = body.get("replyToken")
+    if token in used_reply_tokens:
+        return JSONResponse(status_code=400, content={"message": "Invalid reply token"})
+    used_reply_tokens.add(token)
+
+    stats["reply"] += 1
+    messages.append({"kind": "reply", "reply_token": token, "messages": body.get("messages", []), "at": time.time()})
+    return accepted()
+
+@app.post("/v2/bot/message/push")
+async def push(request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+
+    retry_key = request.headers.get("X-Line-Retry-Key")
+    if retry_key and retry_key in seen_retry_keys:
+        stats["duplicate_retry_key"] += 1
+        return JSONResponse(status_code=409, content={"message": "The retry key is already accepted"})
+    if retry_key:
+        seen_retry_keys.add(retry_key)
+
+    body = await request.json()
+    stats["push"] += 1
+    messages.append({"kind": "push", "to": body.get("to"), "messages": body.get("messages", []), "at": time.time()})
+    return accepted()
+
+@app.get("/v2/bot/profile/{user_id}")
+async def profile(user_id: str, request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+
+    stats["profile"] += 1
+    return {"userId": user_id, "displayName": f"測試用戶 {user_id[-4:]}", "pictureUrl": "", "language": "zh-TW"}
+
+@app.get("/_fake/messages")
+async def list_messages(limit: int = 100):
+    return {"messages": messages[-limit:], "total": len(messages)}
+
+@app.get("/_fake/stats")
+async def get_stats():
+    return {**stats, "config": config}
+
+@app.post("/_fake/config")
+async def update_config(request: Request):
+    config.update(await request.json())
+    return config
+
+@app.post("/_fake/reset")
+async def reset():
+    messages.clear()
+    used_reply_tokens.clear()
+    seen_retry_keys.clear()
+    for key in stats:
+        stats[key] = 0
+    return {"status": "ok"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地假 LINE Messaging API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每個請求的模擬延遲")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0, help="回應 429 的比例（0~1）")
+    parser.add_argument("--retry-after", type=float, default=None, help="429 回應附帶的 Retry-After 秒數")
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, rate_limit_ratio=args.rate_limit_ratio, retry_after=args.retry_after)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 本地假 chat completions API（OpenAI 相容，DeepSeek / OpenRouter 共用）
+支援一般與 SSE 串流回應，可注入首字延遲、逐段延遲與 429，用於測試串流摘要、提前中斷與速率限制
+
+用法：
+    python fakes/fake_llm_server.py --port 9200 --first-token-ms 300 --chunk-ms 40
+    AI_SERVICE_PROVIDER=deepseek DEEPSEEK_API_KEY=test DEEPSEEK_BASE_URL=http://localhost:9200 AI_STREAMING=true python main.py
+
+檢視 / 調整：
+    GET  /_fake/requests   已收到的請求
+    GET  /_fake/stats      請求計數（含串流被用戶端提前中斷的次數）
+    POST /_fake/config     {"chunk_ms": 0, "rate_limit_ratio": 0.5, "retry_after": 1, "summary": "..."}
+    POST /_fake/reset      清空紀錄
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Optional, Dict, Any, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake Chat Completions API")
+
+DEFAULT_SUMMARY = (
+    "台積電公布第三季財報，營收與獲利皆創下歷史新高，主要受惠於人工智慧晶片需求強勁。"
+    "公司同時上調全年資本支出，並表示先進製程產能利用率將維持高檔。"
+    "分析師預期下一季營收將再成長一成，但仍需留意匯率與地緣政治風險。"
+)
+
+config: Dict[str, Any] = {
+    "first_token_ms": 0.0, "chunk_ms": 0.0, "chunk_chars": 4,
+    "rate_limit_ratio": 0.0, "retry_after": None,
+    "summary": DEFAULT_SUMMARY, "keywords": ["台積電", "財報", "人工智慧"], "category": "商業財經"
+}
+requests_log: List[Dict[str, Any]] = []
+stats: Dict[str, int] = {
+    "requests": 0, "streamed": 0, "stream_completed": 0, "stream_disconnected": 0,
+    "chunks_sent": 0, "rate_limited": 0
+}
+
+def completion_text(body: Dict[str, Any]) -> str:
+    """要求 JSON 輸出時回傳合併分析格式，否則回傳摘要文字"""
+    if body.get("response_format"):
+        return json.dumps(
+            {"summary": config["summary"], "keywords": config["keywords"], "category": config["category"]},
+            ensure_ascii=False
+        )
+    return config["summary"]
+
+def sse(data: Any) -> str:
+    return f"data: {data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_completion(completion_id: str, model: str, text: str):
+    """逐段送出 SSE chunk；用戶端中斷時記錄已送出的段數"""
+    size = max(1, int(config["chunk_chars"]))
+    completed = False
+    try:
+        yield ": keep-alive\n\n"
+        if config["first_token_ms"]:
+            await asyncio.sleep(config["first_token_ms"] / 1000)
+
+        yield sse({"id": completion_id, "model": model, "choices": [{"index": 0, "delta": {"role": "assistant"}}]})
+        for start in range(0, len(text), size):
+            if start and config["chunk_ms"]:
+                await asyncio.sleep(config["chunk_ms"] / 1000)
+            stats["chunks_sent"] += 1
+            yield sse({
+                "id": completion_id, "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[start:start + size]}, "finish_reason": None}]
+            })
+
+        yield sse({"id": completion_id, "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        yield sse("[DONE]")
+        completed = True
+    finally:
+        stats["stream_completed" if completed else "stream_disconnected"] += 1
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    if not request.headers.get("Authorization", "").startswith("Bearer "):
+        return JSONResponse(status_code=401, content={"error": {"message": "Missing API key"}})
+
+    body = await request.json()
+    stats["requests"] += 1
+    requests_log.append({"at": time.time(), "stream": bool(body.get("stream")), "model": body.get("model"),
+                         "max_tokens": body.get("max_tokens"), "response_format": body.get("response_format")})
+
+    if random.random() < config["rate_limit_ratio"]:
+        stats["rate_limited"] += 1
+        headers = {"Retry-After": str(config["retry_after"])} if config["retry_after"] is not None else {}
+        return JSONResponse(status_code=429, content={"error": {"message": "Rate limit exceeded"}}, headers=headers)
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    model = body.get("model", "fake-model")
+    text = completion_text(body)
+
+    if body.get("stream"):
+        stats["streamed"] += 1
+        return StreamingResponse(stream_completion(completion_id, model, text), media_type="text/event-stream")
+
+    if config["first_token_ms"]:
+        await asyncio.sleep(config["first_token_ms"] / 1000)
+    return {
+        "id": completion_id,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]
+    }
+
+@app.get("/_fake/requests")
+async def list_requests(limit: int = 100):
+    return {"requests": requests_log[-limit:], "total": len(requests_log)}
+
+@app.get("/_fake/stats")
+async def get_stats():
+    return {**stats, "config": config}
+
+@app.post("/_fake/config")
+async def update_config(request: Request):
+    config.update(await request.json())
+    return config
+
+@app.post("/_fake/reset")
+async def reset():
+    requests_log.clear()
+    for key in stats:
+        stats[key] = 0
+    return {"status": "ok"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地假 chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--first-token-ms", type=float, default=0, help="第一段輸出前的延遲")
+    parser.add_argument("--chunk-ms", type=float, default=0, help="串流每段之間的延遲")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="串流每段的字元數")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0, help="回應 429 的比例（0~1）")
+    parser.add_argument("--retry-after", type=float, default=None, help="429 回應附帶的 Retry-After 秒數")
+    args = parser.parse_args()
+
+    config.update(first_token_ms=args.first_token_ms, chunk_ms=args.chunk_ms, chunk_chars=args.chunk_chars,
+                  rate_limit_ratio=args.rate_limit_ratio, retry_after=args.retry_after)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+BriefCard - Flex 卡片渲染引擎
+卡片模板啟動時預先編譯成 JSON 片段，渲染時只填入經過截斷與跳脫的欄位值，直接輸出 JSON bytes
+"""
+
+import json
+import re
+from typing import Optional, Dict, Any, List
+
+from config import settings
+
+SLOT_PATTERN = re.compile(r'"\{\{(\w+)\}\}"')
+
+# LINE Flex Message 欄位限制
+MAX_ALT_TEXT = 400
+MAX_URI = 1000
+MAX_IMAGE_URI = 2000
+MAX_CAROUSEL_BUBBLES = 12
+
+DEFAULT_IMAGE_URL = "https://via.placeholder.com/640x360/E3F2FD/1976D2?text=📋"
+
+def truncate(text: Optional[str], limit: int) -> str:
+    """截斷過長文字並加上省略號"""
+    text = (text or "").strip()
+    if len(text) > limit:
+        return text[:limit - 3] + "..."
+    return text
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+class CompiledTemplate:
+    """
+    預先編譯的 JSON 模板
+
+    模板中值為 "{{name}}" 的字串欄位是插槽；編譯時將其餘部分序列化為固定的 bytes 片段，
+    渲染時只需以 JSON 字串跳脫插槽值並串接。
+    """
+
+    def __init__(self, template: Dict[str, Any]):
+        raw = _dumps(template)
+        self.static_parts: List[bytes] = []
+        self.slots: List[str] = []
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(raw):
+            self.static_parts.append(raw[position:match.start()].encode("utf-8"))
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.static_parts.append(raw[position:].encode("utf-8"))
+
+    def render(self, values: Dict[str, Any]) -> bytes:
+        """填入插槽值；插槽值為 bytes 時視為已序列化的 JSON 直接嵌入"""
+        parts = [self.static_parts[0]]
+        for slot, static in zip(self.slots, self.static_parts[1:]):
+            value = values[slot]
+            parts.append(value if isinstance(value, bytes) else _dumps(value).encode("utf-8"))
+            parts.append(static)
+        return b"".join(parts)
+
+def _bookmark_bubble_template(with_status: bool) -> Dict[str, Any]:
+    """書籤卡片模板（Phase 1 設計）"""
+    status_line = [{
+        "type": "text",
+        "text": "{{status_line}}",
+        "size": "xs",
+        "color": "#1976D2",
+        "wrap": True,
+        "maxLines": 2,
+        "margin": "md"
+    }] if with_status else []
+
+    return {
+        "type": "bubble",
+        "hero": {
+            "type": "image",
+            "url": "{{image_url}}",
+            "size": "full",
+            "aspectRatio": "16:9",
+            "aspectMode": "cover"
+        },
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": "{{title}}",
+                    "weight": "bold",
+                    "size": "lg",
+                    "wrap": True,
+                    "maxLines": 2
+                },
+                {
+                    "type": "text",
+                    "text": "{{content}}",
+                    "size": "sm",
+                    "color": "#666666",
+                    "wrap": True,
+                    "maxLines": 4,
+                    "margin": "md"
+                },
+                *status_line,
+                {
+                    "type": "button",
+                    "style": "primary",
+                    "action": {
+                        "type": "uri",
+                        "uri": "{{edit_uri}}",
+                        "label": "編輯卡片"
+                    },
+                    "margin": "lg"
+                }
+            ]
+        },
+        "footer": {
+            "type": "box",
+            "layout": "horizontal",
+            "spacing": "sm",
+            "contents": [
+                {
+                    "type": "button",
+                    "style": "secondary",
+                    "action": {
+                        "type": "uri",
+                        "uri": "{{source_uri}}",
+                        "label": "閱讀原文"
+                    },
+                    "flex": 1
+                },
+                {
+                    "type": "button",
+                    "style": "secondary",
+                    "action": {
+                        "type": "postback",
+                        "data": "{{save_data}}",
+                        "label": "保存書籤"
+                    },
+                    "flex": 1
+                }
+            ]
+        }
+    }
+
+class FlexCardRenderer:
+    """書籤 Flex 卡片渲染器"""
+
+    def __init__(self):
+        self.bubble = CompiledTemplate(_bookmark_bubble_template(with_status=True))
+        self.bubble_without_status = CompiledTemplate(_bookmark_bubble_template(with_status=False))
+        self.message = CompiledTemplate({"type": "flex", "altText": "{{alt_text}}", "contents": "{{contents}}"})
+        self.carousel = CompiledTemplate({"type": "carousel", "contents": "{{bubbles}}"})
+
+    def card_slots(self, bookmark: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, str]:
+        """由書籤資料計算卡片各欄位（含截斷與 fallback）"""
+        bookmark_id = bookmark.get("id", "")
+        edit_uri = f"{settings.liff_url}?bookmarkId={bookmark_id}&userId={user_id or 'anonymous'}"
+
+        # 主要內文：有 AI 摘要時優先顯示，否則使用 content_markdown 前 100 字（Phase 1 規格）
+        content = truncate(
+            bookmark.get("summary") or bookmark.get("content_markdown") or bookmark.get("description"),
+            100
+        ) or "📋 已保存此網頁書籤"
+
+        # 圖片 fallback 策略：首圖 → 預覽圖 → 預設圖（LINE 只接受 https）
+        image_url = str(bookmark.get("image_url") or bookmark.get("preview_image") or "").strip()
+        if not image_url.startswith("https://") or len(image_url) > MAX_IMAGE_URI:
+            image_url = DEFAULT_IMAGE_URL
+
+        # 原文網址過長或非 http(s) 時改開編輯頁
+        source_uri = str(bookmark.get("url") or "")
+        if not source_uri.startswith(("http://", "https://")) or len(source_uri) > MAX_URI:
+            source_uri = edit_uri
+
+        # 分析狀態列：第一階段卡片顯示 AI 分析中，完成後顯示分類與標籤
+        if bookmark.get("status") == "metadata_ready":
+            site_name = bookmark.get("site_name")
+            status_line = f"🌐 {site_name} · ✨ AI 摘要分析中..." if site_name else "✨ AI 摘要分析中..."
+        else:
+            parts = [f"🏷️ {bookmark['category']}"] if bookmark.get("category") else []
+            parts += [f"#{tag}" for tag in (bookmark.get("tags") or [])[:3]]
+            status_line = " ".join(parts)
+
+        return {
+            "title": truncate(bookmark.get("title") or "無標題", 60),
+            "content": content,
+            "status_line": truncate(status_line, 80),
+            "image_url": image_url,
+            "edit_uri": edit_uri,
+            "source_uri": source_uri,
+            "save_data": f"action=save&bookmark_id={bookmark_id}"
+        }
+
+    def render_bubble(self, bookmark: Dict[str, Any], user_id: Optional[str] = None) -> bytes:
+        """渲染書籤 bubble（JSON bytes）"""
+        slots = self.card_slots(bookmark, user_id)
+        template = self.bubble if slots["status_line"] else self.bubble_without_status
+        return template.render(slots)
+
+    def render_message(self, bookmark: Dict[str, Any], user_id: Optional[str] = None,
+                       bubble: Optional[bytes] = None) -> bytes:
+        """
+        渲染完整的 Flex 訊息（JSON bytes），可直接交給 AsyncLineClient 發送
+
+        Args:
+            bubble: 已渲染（例如資料庫中保存）的 bubble，提供時不重新渲染
+        """
+        return self.message.render({
+            "alt_text": truncate(f"📋 {bookmark.get('title') or '新書籤'}", MAX_ALT_TEXT),
+            "contents": bubble or self.render_bubble(bookmark, user_id)
+        })
+
+    def render_carousel(self, bookmarks: List[Dict[str, Any]], user_id: Optional[str] = None) -> bytes:
+        """
+        將多個書籤渲染成一則 Flex carousel 訊息（JSON bytes）
+
+        只有一個書籤時回傳一般卡片；超過 12 個時只取前 12 個（LINE carousel 上限）
+        """
+        bookmarks = bookmarks[:MAX_CAROUSEL_BUBBLES]
+        if len(bookmarks) == 1:
+            return self.render_message(bookmarks[0], user_id)
+
+        bubbles = b"[" + b",".join(self.render_bubble(bookmark, user_id) for bookmark in bookmarks) + b"]"
+        return self.message.render({
+            "alt_text": truncate(f"📋 已整理 {len(bookmarks)} 個書籤", MAX_ALT_TEXT),
+            "contents": self.carousel.render({"bubbles": bubbles})
+        })
+
+# 建立全域渲染器實例（模板只編譯一次）
+flex_renderer = FlexCardRenderer()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 靜態 HTML 解析
+從原始 HTML 提取 OpenGraph / Twitter Card / JSON-LD 中繼資料與正文
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+from typing import Optional, Dict, Any, List
+
+# 不納入正文的標籤
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "footer", "header", "aside", "form", "iframe"}
+
+# 區塊層級標籤，遇到時斷行
+BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "blockquote", "pre", "td", "dd", "figcaption"}
+
+# 常見 SPA 掛載點
+SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "svelte", "main-app"}
+
+# 判斷為「需要 JavaScript 渲染」的正文長度門檻
+MIN_STATIC_TEXT_LENGTH = 200
+
+class StaticPageParser(HTMLParser):
+    """單次掃描 HTML，收集中繼資料、JSON-LD 與正文區塊"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self.links: Dict[str, str] = {}
+        self.json_ld: List[str] = []
+        self.blocks: List[str] = []
+        self.noscript_text = ""
+        self.has_spa_root = False
+
+        self._in_title = False
+        self._skip_stack: List[str] = []
+        self._in_json_ld = False
+        self._in_noscript = False
+        self._buffer: List[str] = []
+        self._ld_buffer: List[str] = []
+        self._block_prefix = ""
+
+    def handle_starttag(self, tag: str, attrs):
+        attrs = {k.lower(): (v or "") for k, v in attrs}
+
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+            content = attrs.get("content", "").strip()
+            if key and content and key not in self.meta:
+                self.meta[key] = content
+        elif tag == "link":
+            rel = attrs.get("rel", "").lower()
+            if rel and attrs.get("href") and rel not in self.links:
+                self.links[rel] = attrs["href"]
+        elif tag == "script" and attrs.get("type", "").lower() == "application/ld+json":
+            self._in_json_ld = True
+            self._ld_buffer = []
+
+        if tag in ("div", "main") and attrs.get("id", "").lower() in SPA_ROOT_IDS:
+            self.has_spa_root = True
+
+        if tag == "noscript":
+            self._in_noscript = True
+
+        if tag in SKIP_TAGS:
+            self._skip_stack.append(tag)
+            return
+
+        if tag in BLOCK_TAGS and not self._skip_stack:
+            self._flush_block()
+            if tag in ("h1", "h2", "h3"):
+                self._block_prefix = "#" * int(tag[1]) + " "
+            elif tag == "li":
+                self._block_prefix = "- "
+            else:
+                self._block_prefix = ""
+        elif tag == "br" and not self._skip_stack:
+            self._buffer.append("\n")
+
+    def handle_endtag(self, tag: str):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "script" and self._in_json_ld:
+            self.json_ld.append("".join(self._ld_buffer))
+            self._in_json_ld = False
+        elif tag == "noscript":
+            self._in_noscript = False
+
+        if self._skip_stack and self._skip_stack[-1] == tag:
+            self._skip_stack.pop()
+            return
+
+        if tag in BLOCK_TAGS and not self._skip_stack:
+            self._flush_block()
+
+    def handle_data(self, data: str):
+        if self._in_title:
+            self.title += data
+        elif self._in_json_ld:
+            self._ld_buffer.append(data)
+        elif self._in_noscript:
+            self.noscript_text += data
+        elif not self._skip_stack:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_block()
+
+    def _flush_block(self):
+        """將緩衝文字寫入正文區塊"""
+        text = re.sub(r"[ \t\r\f\v]+", " ", "".join(self._buffer)).strip()
+        self._buffer = []
+        if text:
+            self.blocks.append(self._block_prefix + text)
+        self._block_prefix = ""
+
+def _first_text(value: Any) -> str:
+    """從 JSON-LD 欄位取出第一個字串值"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list) and value:
+        return _first_text(value[0])
+    if isinstance(value, dict):
+        return _first_text(value.get("name") or value.get("url") or value.get("@id") or "")
+    return ""
+
+def _parse_json_ld(blocks: List[str]) -> Dict[str, str]:
+    """解析 JSON-LD，取出文章相關欄位"""
+    result: Dict[str, str] = {}
+    for raw in blocks:
+        try:
+            data = json.loads(raw.strip())
+        except (ValueError, TypeError):
+            continue
+
+        nodes = data if isinstance(data, list) else [data]
+        expanded = []
+        for node in nodes:
+            if isinstance(node, dict) and isinstance(node.get("@graph"), list):
+                expanded.extend(node["@graph"])
+            else:
+                expanded.append(node)
+
+        for node in expanded:
+            if not isinstance(node, dict):
+                continue
+            fields = {
+                "title": node.get("headline") or node.get("name"),
+                "description": node.get("description"),
+                "image": node.get("image") or node.get("thumbnailUrl"),
+                "author": node.get("author"),
+                "published_time": node.get("datePublished"),
+                "site_name": node.get("publisher"),
+            }
+            for key, value in fields.items():
+                text = _first_text(value)
+                if text and key not in result:
+                    result[key] = text
+    return result
+
+def is_js_rendered(parser: StaticPageParser) -> bool:
+    """判斷頁面是否依賴 JavaScript 渲染"""
+    text_length = sum(len(block) for block in parser.blocks)
+    if text_length >= MIN_STATIC_TEXT_LENGTH:
+        return False
+    if parser.has_spa_root:
+        return True
+    return "javascript" in parser.noscript_text.lower()
+
+def parse_html_metadata(html: str) -> Dict[str, Any]:
+    """
+    解析靜態 HTML
+
+    Returns:
+        Dict 包含 metadata（與 Crawl4AI metadata 相同的鍵名）、
+        content_markdown、content_text 與 js_rendered 旗標
+    """
+    parser = StaticPageParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # HTMLParser 對破損的 HTML 很寬容，這裡只是保險
+        pass
+
+    meta = parser.meta
+    ld = _parse_json_ld(parser.json_ld)
+
+    def pick(*values: Optional[str]) -> str:
+        for value in values:
+            if value and value.strip():
+                return value.strip()
+        return ""
+
+    metadata = {
+        "title": pick(meta.get("og:title"), meta.get("twitter:title"), ld.get("title"), parser.title),
+        "description": pick(meta.get("og:description"), meta.get("twitter:description"),
+                            meta.get("description"), ld.get("description")),
+        "og:image": pick(meta.get("og:image"), meta.get("og:image:url"), meta.get("og:image:secure_url")),
+        "twitter:image": pick(meta.get("twitter:image"), meta.get("twitter:image:src")),
+        "image": pick(ld.get("image"), parser.links.get("image_src")),
+        "author": pick(meta.get("author"), meta.get("article:author"), ld.get("author")),
+        "published_time": pick(meta.get("article:published_time"), meta.get("og:published_time"),
+                               meta.get("pubdate"), ld.get("published_time")),
+        "site_name": pick(meta.get("og:site_name"), meta.get("application-name"), ld.get("site_name")),
+    }
+
+    return {
+        "metadata": metadata,
+        "content_markdown": "\n\n".join(parser.blocks),
+        "content_text": "\n".join(block.lstrip("#- ") for block in parser.blocks),
+        "js_rendered": is_js_rendered(parser),
+    }
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 持久化工作佇列
+以 SQLite 保存書籤處理工作，搭配租約 / 心跳與分階段併發限制的 worker pool
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from config import settings
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+class JobRetry(Exception):
+    """暫時性失敗：工作處理函數拋出後放回佇列稍後重試（其他例外同樣會重試）"""
+
+class SQLiteJobStore:
+    """
+    SQLite 工作儲存
+
+    多個 uvicorn worker 可共用同一個檔案；領取工作時以 BEGIN IMMEDIATE 取得寫入鎖，
+    確保同一工作只會被一個 worker 領走。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def open(self):
+        """開啟資料庫檔案（延遲到第一次使用，匯入模組時不寫入磁碟）"""
+        if self._conn is not None:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        # SQLite 連線在單一執行緒中操作，不阻塞事件迴圈
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    bookmark_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    lease_owner TEXT,
+                    lease_until REAL,
+                    enqueued_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    last_error TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, enqueued_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_bookmark ON jobs (bookmark_id)")
+
+    async def _run(self, func: Callable, *args):
+        self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job.get("payload") or "{}")
+        return job
+
+    # ---------- 同步實作（在 executor 執行緒中執行） ----------
+
+    def _enqueue(self, job: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, bookmark_id, url, payload, max_attempts, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job["id"], job["bookmark_id"], job["url"], json.dumps(job["payload"]), job["max_attempts"], job["enqueued_at"])
+            )
+
+    def _claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    SELECT * FROM jobs
+                    WHERE (status = 'queued' AND enqueued_at <= ?)
+                       OR (status = 'running' AND lease_until < ? AND attempts < max_attempts)
+                    ORDER BY enqueued_at
+                    LIMIT 1
+                    """,
+                    (now, now)
+                ).fetchone()
+                if not row:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                self._conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_until = ?, started_at = ?
+                    WHERE id = ?
+                    """,
+                    (owner, now + lease_seconds, now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        job = self._row_to_job(row)
+        job["attempts"] += 1
+        job["started_at"] = now
+        return job
+
+    def _expire_exhausted(self) -> List[Dict[str, Any]]:
+        """
+        租約逾期且已達最大嘗試次數的工作標記為失敗
+
+        通常代表處理時 worker 行程崩潰（例如 OOM），不再重新領取以免反覆讓行程崩潰
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now,)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        """
+                        UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ?, lease_owner = NULL, lease_until = NULL
+                        WHERE id = ?
+                        """,
+                        [(now, "租約逾期且已達最大嘗試次數", row["id"]) for row in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [self._row_to_job(row) for row in rows]
+
+    def _heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, owner)
+            )
+            return cursor.rowcount > 0
+
+    def _finish(self, job_id: str, owner: str, status: str, error: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, finished_at = ?, last_error = ?, lease_owner = NULL, lease_until = NULL
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (status, time.time(), error, job_id, owner)
+            )
+
+    def _requeue(self, job_id: str, owner: str, error: str, delay: float):
+        """執行失敗但仍可重試：放回佇列並保留嘗試次數（delay 秒後才能再被領取）"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', enqueued_at = ?, last_error = ?, lease_owner = NULL, lease_until = NULL
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (time.time() + delay, error, job_id, owner)
+            )
+
+    def _release(self, job_id: str, owner: str):
+        """關閉時放回佇列（不計入嘗試次數）"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_owner = NULL, lease_until = NULL
+                WHERE id = ? AND lease_owner = ? AND status = 'running'
+                """,
+                (job_id, owner)
+            )
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def _active_bookmark_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT bookmark_id FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return [row["bookmark_id"] for row in rows]
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            oldest = self._conn.execute("SELECT MIN(enqueued_at) AS t FROM jobs WHERE status = 'queued'").fetchone()
+        counts = {row["status"]: row["n"] for row in rows}
+        counts["oldest_queued_at"] = oldest["t"] if oldest else None
+        return counts
+
+    def _purge(self, older_than: float):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - older_than,)
+            )
+
+    # ---------- 非同步介面 ----------
+
+    async def enqueue(self, job: Dict[str, Any]):
+        await self._run(self._enqueue, job)
+
+    async def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        return await self._run(self._claim, owner, lease_seconds)
+
+    async def expire_exhausted(self) -> List[Dict[str, Any]]:
+        return await self._run(self._expire_exhausted)
+
+    async def heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        return await self._run(self._heartbeat, job_id, owner, lease_seconds)
+
+    async def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None):
+        await self._run(self._finish, job_id, owner, status, error)
+
+    async def requeue(self, job_id: str, owner: str, error: str, delay: float = 0.0):
+        await self._run(self._requeue, job_id, owner, error, delay)
+
+    async def release(self, job_id: str, owner: str):
+        await self._run(self._release, job_id, owner)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, job_id)
+
+    async def active_bookmark_ids(self) -> List[str]:
+        return await self._run(self._active_bookmark_ids)
+
+    async def counts(self) -> Dict[str, int]:
+        return await self._run(self._counts)
+
+    async def purge(self, older_than: float):
+        await self._run(self._purge, older_than)
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+        self._conn = None
+        self._executor = None
+
+class JobQueue:
+    """書籤處理工作佇列與 worker pool"""
+
+    def __init__(self, store: SQLiteJobStore, workers: int, stage_limits: Dict[str, int],
+                 lease_seconds: float = 60, max_attempts: int = 3, retry_backoff: float = 5.0,
+                 poll_interval: float = 1.0):
+        self.store = store
+        self.workers = max(1, workers)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._stage_limits = stage_limits
+        self._stages: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(limit) for name, limit in stage_limits.items()
+        }
+        self._handler: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+        self._on_abandoned: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._running_jobs: Dict[str, Dict[str, Any]] = {}
+        self._stopping = False
+
+        self.counters = {"enqueued": 0, "completed": 0, "failed": 0, "retried": 0}
+        self.queue_wait = LatencyWindow()
+        self.run_time = LatencyWindow()
+        self.stage_wait = {name: LatencyWindow() for name in stage_limits}
+        self.stage_active = {name: 0 for name in stage_limits}
+
+    # ---------- 生命週期 ----------
+
+    async def start(self, handler: Callable[[Dict[str, Any]], Awaitable[None]],
+                    on_abandoned: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        """
+        啟動 worker pool
+
+        Args:
+            handler: 工作處理函數；拋出例外時重試，直到達到最大嘗試次數
+            on_abandoned: 工作因 worker 崩潰導致租約逾期且已無嘗試次數時呼叫
+        """
+        if self._worker_tasks:
+            return
+
+        self._handler = handler
+        self._on_abandoned = on_abandoned
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self.store.open()
+        await self.store.purge(older_than=7 * 86400)
+
+        for index in range(self.workers):
+            task = asyncio.create_task(self._worker_loop(index), name=f"job-worker-{index}")
+            self._worker_tasks.append(task)
+
+        logger.info(f"🧵 工作佇列已啟動: {self.workers} 個 worker, 階段上限 {self._stage_limits}")
+
+    async def stop(self, timeout: float = 10.0):
+        """停止 worker，未完成的工作放回佇列"""
+        if not self._worker_tasks:
+            return
+
+        self._stopping = True
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._worker_tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._worker_tasks.clear()
+
+        logger.info("✅ 工作佇列已停止")
+
+    def close(self):
+        self.store.close()
+
+    # ---------- 排入與等待 ----------
+
+    async def enqueue(self, bookmark_id: str, url: str, **payload) -> str:
+        """
+        排入書籤處理工作
+
+        Returns:
+            工作 ID
+        """
+        job = {
+            "id": str(uuid.uuid4()),
+            "bookmark_id": bookmark_id,
+            "url": url,
+            "payload": payload,
+            "max_attempts": self.max_attempts,
+            "enqueued_at": time.time()
+        }
+        await self.store.enqueue(job)
+        self.counters["enqueued"] += 1
+        if self._wakeup:
+            self._wakeup.set()
+
+        logger.info(f"📥 工作已排入: {job['id']} (書籤 {bookmark_id})")
+        return job["id"]
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[str]:
+        """
+        等待工作結束
+
+        Returns:
+            工作最終狀態（done / failed），逾時則回傳 None
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = await self.store.get(job_id)
+            if job and job["status"] in ("done", "failed"):
+                return job["status"]
+
+            # 由本行程處理時直接等待完成通知，否則輪詢（可能由其他 worker 行程處理）
+            future = self._waiters.setdefault(job_id, asyncio.get_running_loop().create_future())
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), min(self.poll_interval, deadline - time.time()))
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                if future.done():
+                    self._waiters.pop(job_id, None)
+        self._waiters.pop(job_id, None)
+        return None
+
+    # ---------- 分階段併發限制 ----------
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """限制指定階段（crawl / ai / db）的同時執行數"""
+        semaphore = self._stages.get(name)
+        if semaphore is None:
+            yield
+            return
+
+        waited_from = time.time()
+        async with semaphore:
+            self.stage_wait[name].add(time.time() - waited_from)
+            self.stage_active[name] += 1
+            try:
+                yield
+            finally:
+                self.stage_active[name] -= 1
+
+    # ---------- 恢復 ----------
+
+    async def recover(self, stale_bookmarks: List[Dict[str, Any]]) -> int:
+        """
+        重新排入卡在 processing 且沒有進行中工作的書籤
+
+        Args:
+            stale_bookmarks: 資料庫中停留在處理中狀態過久的書籤（含 id 與 url）
+        """
+        active = set(await self.store.active_bookmark_ids())
+        recovered = 0
+        for bookmark in stale_bookmarks:
+            if bookmark["id"] in active or not bookmark.get("url"):
+                continue
+            await self.enqueue(bookmark["id"], bookmark["url"], recovered=True)
+            recovered += 1
+
+        if recovered:
+            logger.warning(f"♻️ 已重新排入 {recovered} 個卡住的書籤")
+        return recovered
+
+    # ---------- worker ----------
+
+    async def _worker_loop(self, index: int):
+        while not self._stopping:
+            try:
+                for abandoned in await self.store.expire_exhausted():
+                    await self._abandon(abandoned)
+                job = await self.store.claim(self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"❌ 領取工作失敗: {e}")
+                job = None
+
+            if not job:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        self._running_jobs[job_id] = job
+        self.queue_wait.add(job["started_at"] - job["enqueued_at"])
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id))
+        started = time.time()
+        status = "done"
+
+        try:
+            await self._handler(job)
+            await self.store.finish(job_id, self.owner, "done")
+            self.counters["completed"] += 1
+        except asyncio.CancelledError:
+            # 關閉時被取消：放回佇列（不計入嘗試次數），下次啟動立即重新處理
+            if self._stopping:
+                await self.store.release(job_id, self.owner)
+            raise
+        except Exception as e:
+            logger.error(f"❌ 工作執行失敗: {job_id} (第 {job['attempts']} 次) - {e}")
+            if job["attempts"] < job["max_attempts"]:
+                delay = self.retry_backoff * (2 ** (job["attempts"] - 1))
+                await self.store.requeue(job_id, self.owner, str(e), delay)
+                self.counters["retried"] += 1
+                status = None
+            else:
+                await self.store.finish(job_id, self.owner, "failed", str(e))
+                self.counters["failed"] += 1
+                status = "failed"
+        finally:
+            heartbeat.cancel()
+            self._running_jobs.pop(job_id, None)
+            self.run_time.add(time.time() - started)
+
+        if status:
+            waiter = self._waiters.pop(job_id, None)
+            if waiter and not waiter.done():
+                waiter.set_result(status)
+
+    async def _abandon(self, job: Dict[str, Any]):
+        logger.error(f"❌ 工作租約逾期且已達最大嘗試次數，放棄: {job['id']} (書籤 {job['bookmark_id']})")
+        self.counters["failed"] += 1
+        waiter = self._waiters.pop(job["id"], None)
+        if waiter and not waiter.done():
+            waiter.set_result("failed")
+        if self._on_abandoned:
+            try:
+                await self._on_abandoned(job)
+            except Exception as e:
+                logger.error(f"❌ 處理放棄的工作失敗: {job['id']} - {e}")
+
+    async def _heartbeat_loop(self, job_id: str):
+        """定期延長租約，避免長時間工作被其他 worker 搶走"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.store.heartbeat(job_id, self.owner, self.lease_seconds):
+                    logger.warning(f"⚠️ 工作租約已遺失: {job_id}")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ 工作心跳失敗: {job_id} - {e}")
+
+    # ---------- 指標 ----------
+
+    async def metrics(self) -> Dict[str, Any]:
+        """佇列深度、延遲與各階段使用狀況"""
+        counts = await self.store.counts()
+        oldest = counts.pop("oldest_queued_at", None)
+        return {
+            "workers": self.workers,
+            "depth": {
+                "queued": counts.get("queued", 0),
+                "running": counts.get("running", 0),
+                "oldest_queued_age_s": round(time.time() - oldest, 1) if oldest else 0
+            },
+            "totals": {**counts, **self.counters},
+            "queue_wait": self.queue_wait.summary(),
+            "run_time": self.run_time.summary(),
+            "stages": {
+                name: {
+                    "limit": self._stage_limits[name],
+                    "active": self.stage_active[name],
+                    "wait": self.stage_wait[name].summary()
+                }
+                for name in self._stage_limits
+            }
+        }
+
+# 建立全域工作佇列實例
+job_queue = JobQueue(
+    SQLiteJobStore(settings.job_queue_db_path),
+    workers=settings.job_workers,
+    stage_limits={
+        "crawl": settings.job_crawl_concurrency,
+        "ai": settings.job_ai_concurrency,
+        "db": settings.job_db_concurrency
+    },
+    lease_seconds=settings.job_lease_seconds,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff=settings.job_retry_backoff
+)
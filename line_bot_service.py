@@ -5,26 +5,28 @@ BriefCard - LINE Bot 智能服務
 """
 
 import re
+import json
 import logging
 import asyncio
-import threading
 from typing import List, Dict, Any
 from urllib.parse import urlparse
 
-from linebot import (
-    LineBotApi, WebhookHandler
-)
+from linebot import WebhookParser
 from linebot.exceptions import (
     InvalidSignatureError
 )
 from linebot.models import (
-    MessageEvent, TextMessage, FlexSendMessage, 
+    MessageEvent, TextMessage, 
     TextSendMessage, PostbackEvent, 
     BubbleContainer, PostbackAction, URIAction,
     QuickReply, QuickReplyButton
 )
 
 from config import settings
+from line_client import create_line_client
+from push_scheduler import create_push_scheduler
+from flex_renderer import flex_renderer, MAX_CAROUSEL_BUBBLES
+from task_executor import line_task_executor
 
 # 設定日誌
 logger = logging.getLogger(__name__)
@@ -40,38 +42,43 @@ class LineBotService:
             self.enabled = False
             return
         
-        # 初始化 LINE Bot API
-        self.line_bot_api = LineBotApi(settings.line_channel_access_token)
-        self.handler = WebhookHandler(settings.line_channel_secret)
+        # 初始化非同步 LINE API 客戶端（httpx 連線池，不阻塞事件迴圈）
+        self.line_client = create_line_client()
+        self.push_scheduler = create_push_scheduler(self.line_client)
+        self.parser = WebhookParser(settings.line_channel_secret)
         self.enabled = True
-        
-        # 註冊事件處理器
-        self._register_handlers()
+        self.executor = line_task_executor
         
         logger.info("✅ LINE Bot 服務初始化完成")
     
-    def _register_handlers(self):
-        """註冊事件處理器"""
-        
-        @self.handler.add(MessageEvent, message=TextMessage)
-        def handle_text_message(event):
-            """處理文字訊息"""
-            try:
-                self._handle_text_message_internal(event)
-            except Exception as e:
-                logger.error(f"❌ 處理訊息失敗: {e}")
-                self._send_error_message(event.reply_token)
-        
-        @self.handler.add(PostbackEvent)
-        def handle_postback(event):
-            """處理 PostBack 事件"""
-            try:
-                self._handle_postback_internal(event)
-            except Exception as e:
-                logger.error(f"❌ 處理 PostBack 失敗: {e}")
-                self._send_error_message(event.reply_token)
+    async def handle_event(self, event):
+        """依事件類型分派（由 webhook 事件佇列的 consumer 呼叫）"""
+        if isinstance(event, MessageEvent) and isinstance(event.message, TextMessage):
+            await self._handle_text_message(event)
+        elif isinstance(event, PostbackEvent):
+            # postback 工作（保存、總覽、資料夾、個人檔案）交給有界執行器，不佔住 webhook consumer
+            if not self.executor.submit(self._handle_postback(event), name=f"postback:{event.postback.data}"):
+                await self._reply_message(event.reply_token, "⏳ 目前使用人數較多，請稍後再試。")
+        else:
+            logger.info(f"ℹ️ 略過未處理的事件類型: {getattr(event, 'type', type(event).__name__)}")
     
-    def _handle_text_message_internal(self, event: MessageEvent):
+    async def _handle_text_message(self, event: MessageEvent):
+        """處理文字訊息"""
+        try:
+            await self._handle_text_message_internal(event)
+        except Exception as e:
+            logger.error(f"❌ 處理訊息失敗: {e}")
+            await self._send_error_message(event.reply_token)
+    
+    async def _handle_postback(self, event: PostbackEvent):
+        """處理 PostBack 事件"""
+        try:
+            await self._handle_postback_internal(event)
+        except Exception as e:
+            logger.error(f"❌ 處理 PostBack 失敗: {e}")
+            await self._send_error_message(event.reply_token)
+    
+    async def _handle_text_message_internal(self, event: MessageEvent):
         """內部文字訊息處理邏輯"""
         user_message = event.message.text
         user_id = getattr(event.source, 'user_id', 'unknown')
@@ -82,13 +89,17 @@ class LineBotService:
         urls = self._extract_urls(user_message)
         
         if urls:
-            # 處理 URL
-            self._handle_url_message(event, urls[0], user_id)  # 目前只處理第一個 URL
+            # 處理 URL（去除重複；多個連結整理成 carousel）
+            urls = list(dict.fromkeys(urls))
+            if len(urls) == 1:
+                await self._handle_url_message(event, urls[0], user_id)
+            else:
+                await self._handle_multi_url_message(event, urls, user_id)
         else:
             # 處理一般文字訊息
-            self._handle_general_message(event, user_message, user_id)
+            await self._handle_general_message(event, user_message, user_id)
     
-    def _handle_postback_internal(self, event: PostbackEvent):
+    async def _handle_postback_internal(self, event: PostbackEvent):
         """內部 PostBack 事件處理邏輯"""
         user_id = getattr(event.source, 'user_id', 'unknown')
         postback_data = event.postback.data
@@ -99,108 +110,90 @@ class LineBotService:
             # 解析 PostBack 數據
             if postback_data.startswith("action=save&bookmark_id="):
                 bookmark_id = postback_data.split("bookmark_id=")[1]
-                self._handle_save_bookmark(event, bookmark_id, user_id)
+                await self._handle_save_bookmark(event, bookmark_id, user_id)
             elif postback_data == "bookmark_overview":
-                self._handle_bookmark_overview(event, user_id)
+                await self._handle_bookmark_overview(event, user_id)
             elif postback_data == "folders":
-                self._handle_folders(event, user_id)
+                await self._handle_folders(event, user_id)
             elif postback_data == "my_profile":
-                self._handle_my_profile(event, user_id)
+                await self._handle_my_profile(event, user_id)
             else:
                 logger.warning(f"⚠️ 未知的 PostBack 動作: {postback_data}")
-                self._reply_message(event.reply_token, "🤔 未知的操作，請重新嘗試。")
+                await self._reply_message(event.reply_token, "🤔 未知的操作，請重新嘗試。")
         except Exception as e:
             logger.error(f"❌ 處理 PostBack 失敗: {e}")
-            self._reply_message(event.reply_token, "😅 處理請求時發生錯誤，請稍後再試。")
+            await self._reply_message(event.reply_token, "😅 處理請求時發生錯誤，請稍後再試。")
     
-    def _handle_save_bookmark(self, event: PostbackEvent, bookmark_id: str, user_id: str):
+    async def _handle_save_bookmark(self, event: PostbackEvent, bookmark_id: str, user_id: str):
         """處理保存書籤到預設資料夾 - 改善版"""
         logger.info(f"💾 處理保存書籤請求: {bookmark_id} (用戶: {user_id})")
         
-        # 立即發送回饋訊息 (解決問題 3-1: 即時回饋)
-        self._reply_message(event.reply_token, "�� 正在保存書籤，請稍候...")
+        # 保存通常在 reply token 有效期內完成，結果直接以 reply 回覆（免費），逾時才改為推播
+        self.push_scheduler.offer_reply_token(user_id, event.reply_token)
         
-        # 創建異步任務來處理書籤保存
-        async def save_bookmark_async():
-            try:
-                from database import db_client
-                import uuid
-                from datetime import datetime
-                
-                # 獲取用戶的預設資料夾
-                logger.info(f"🔍 查詢用戶預設資料夾: {user_id}")
-                default_folder = await db_client.get_default_folder(user_id)
-                logger.info(f"🔍 查詢結果: {default_folder}")
-                
+        try:
+            from database import db_client
+            import uuid
+            from datetime import datetime
+            
+            # 獲取用戶的預設資料夾
+            logger.info(f"🔍 查詢用戶預設資料夾: {user_id}")
+            default_folder = await db_client.get_default_folder(user_id)
+            logger.info(f"🔍 查詢結果: {default_folder}")
+            
+            if not default_folder:
+                logger.info(f"🔧 自動為用戶創建預設資料夾: {user_id}")
+                # 自動創建預設資料夾 (解決問題 3-2: 找不到預設資料夾)
+                folder_data = {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "name": "稍後閱讀",
+                    "color": "#1976D2",
+                    "is_default": True,
+                    "sort_order": 0,
+                    "created_at": datetime.utcnow().isoformat()
+                }
+                default_folder = await db_client.create_folder(folder_data)
                 if not default_folder:
-                    logger.info(f"🔧 自動為用戶創建預設資料夾: {user_id}")
-                    # 自動創建預設資料夾 (解決問題 3-2: 找不到預設資料夾)
-                    folder_data = {
-                        "id": str(uuid.uuid4()),
-                        "user_id": user_id,
-                        "name": "稍後閱讀",
-                        "color": "#1976D2",
-                        "is_default": True,
-                        "sort_order": 0,
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                    default_folder = await db_client.create_folder(folder_data)
-                    if not default_folder:
-                        # 發送失敗訊息
-                        self.line_bot_api.push_message(
-                            user_id,
-                            TextSendMessage(text="😕 無法創建預設資料夾，請稍後再試。")
-                        )
-                        return
-                
-                # 更新書籤，設置 folder_id
-                update_data = {'folder_id': default_folder['id']}
-                
-                logger.info(f"🔄 更新書籤資料: {bookmark_id} -> {default_folder['id']}")
-                result = await db_client.update_bookmark(bookmark_id, update_data)
-                
-                if result:
-                    folder_name = default_folder.get('name', '稍後閱讀')
-                    logger.info(f"✅ 書籤保存成功: {bookmark_id} → {folder_name}")
-                    
-                    # 發送成功訊息
-                    success_message = f"✅ 書籤已保存到「{folder_name}」資料夾！\n\n⬇️ 快速選單："
-                    quick_reply = self.create_main_menu_quick_reply()
-                    self.line_bot_api.push_message(
-                        user_id,
-                        TextSendMessage(text=success_message, quick_reply=quick_reply)
-                    )
-                else:
-                    logger.error(f"❌ 書籤保存失敗: {bookmark_id}")
-                    self.line_bot_api.push_message(
+                    # 發送失敗訊息
+                    self.push_scheduler.send(
                         user_id,
-                        TextSendMessage(text="😕 保存失敗，請稍後再試。")
+                        TextSendMessage(text="😕 無法創建預設資料夾，請稍後再試。")
                     )
-                    
-            except Exception as e:
-                logger.error(f"❌ 保存書籤異步處理失敗: {e}")
-                self.line_bot_api.push_message(
+                    return
+            
+            # 更新書籤，設置 folder_id
+            update_data = {'folder_id': default_folder['id']}
+            
+            logger.info(f"🔄 更新書籤資料: {bookmark_id} -> {default_folder['id']}")
+            result = await db_client.update_bookmark(bookmark_id, update_data)
+            
+            if result:
+                folder_name = default_folder.get('name', '稍後閱讀')
+                logger.info(f"✅ 書籤保存成功: {bookmark_id} → {folder_name}")
+                
+                # 發送成功訊息
+                success_message = f"✅ 書籤已保存到「{folder_name}」資料夾！\n\n⬇️ 快速選單："
+                quick_reply = self.create_main_menu_quick_reply()
+                self.push_scheduler.send(
                     user_id,
-                    TextSendMessage(text="😅 保存時發生錯誤，請稍後再試。")
+                    TextSendMessage(text=success_message, quick_reply=quick_reply)
                 )
-        
-        # 在新的事件循環中執行異步操作
-        def run_async():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(save_bookmark_async())
-            except Exception as e:
-                logger.error(f"❌ Threading 異常: {e}")
-            finally:
-                loop.close()
-        
-        # 在背景執行緒中處理異步操作
-        thread = threading.Thread(target=run_async)
-        thread.daemon = True
-        thread.start()
+            else:
+                logger.error(f"❌ 書籤保存失敗: {bookmark_id}")
+                self.push_scheduler.send(
+                    user_id,
+                    TextSendMessage(text="😕 保存失敗，請稍後再試。")
+                )
+                
+        except Exception as e:
+            logger.error(f"❌ 保存書籤異步處理失敗: {e}")
+            self.push_scheduler.send(
+                user_id,
+                TextSendMessage(text="😅 保存時發生錯誤，請稍後再試。")
+            )
     
-    def _handle_my_bookmarks(self, event, user_id: str):
+    async def _handle_my_bookmarks(self, event, user_id: str):
         """處理我的書籤請求"""
         logger.info(f"📚 處理我的書籤請求 (用戶: {user_id})")
         
@@ -209,9 +202,81 @@ class LineBotService:
         
         # 回覆訊息
         message = f"📚 點擊下方連結查看您的書籤歷史：\n{history_url}\n\n您可以在這裡瀏覽、搜尋和管理所有保存的書籤！\n\n⬇️ 快速選單："
-        self._reply_message_with_menu(event.reply_token, message)
+        await self._reply_message_with_menu(event.reply_token, message)
+    
+    async def _handle_bookmark_overview(self, event, user_id: str):
+        """處理書籤總覽請求：統計數字與最近保存的書籤"""
+        from database import db_client
+        
+        stats, recent = await asyncio.gather(
+            db_client.get_bookmark_stats(user_id),
+            db_client.get_bookmarks_by_user(user_id, limit=5, columns="id,title,url,created_at")
+        )
+        
+        lines = [
+            "📚 書籤總覽",
+            "",
+            f"📌 總計：{stats['total']} 個",
+            f"📅 今天：{stats['today']} 個｜本週：{stats['this_week']} 個｜本月：{stats['this_month']} 個"
+        ]
+        if recent:
+            lines += ["", "🕒 最近保存："]
+            lines += [f"• {(bookmark.get('title') or bookmark.get('url', ''))[:40]}" for bookmark in recent]
+        lines += ["", f"👉 查看全部：{settings.liff_url}?tab=bookmarks&userId={user_id}", "", "⬇️ 快速選單："]
+        
+        await self._reply_message_with_menu(event.reply_token, "\n".join(lines))
+    
+    async def _handle_folders(self, event, user_id: str):
+        """處理資料夾請求：列出用戶的資料夾"""
+        from database import db_client
+        
+        folders = await db_client.get_folders_by_user(user_id)
+        
+        if folders:
+            lines = ["📁 我的資料夾", ""]
+            lines += [
+                f"{'⭐' if folder.get('is_default') else '📂'} {folder.get('name', '未命名')}（{folder.get('bookmark_count', 0)}）"
+                for folder in folders
+            ]
+        else:
+            lines = ["📁 您還沒有資料夾", "", "點擊卡片上的「保存書籤」會自動建立「稍後閱讀」資料夾。"]
+        lines += ["", f"👉 管理資料夾：{settings.liff_url}?tab=folders&userId={user_id}", "", "⬇️ 快速選單："]
+        
+        await self._reply_message_with_menu(event.reply_token, "\n".join(lines))
+    
+    async def _handle_my_profile(self, event, user_id: str):
+        """處理個人檔案請求：LINE 名稱與使用統計"""
+        from database import db_client
+        
+        async def get_display_name() -> str:
+            try:
+                profile = await self.line_client.get_profile(user_id)
+                return profile.get("displayName", "")
+            except Exception as e:
+                logger.warning(f"⚠️ 獲取用戶資料失敗: {e}")
+                return ""
+        
+        display_name, stats, folders = await asyncio.gather(
+            get_display_name(),
+            db_client.get_bookmark_stats(user_id),
+            db_client.get_folders_by_user(user_id)
+        )
+        
+        lines = [
+            f"👤 {display_name or '我的個人檔案'}",
+            "",
+            f"📌 已保存書籤：{stats['total']} 個",
+            f"📁 資料夾：{len(folders)} 個",
+            f"🔥 本週新增：{stats['this_week']} 個",
+            "",
+            f"👉 個人檔案：{settings.liff_url}?tab=profile&userId={user_id}",
+            "",
+            "⬇️ 快速選單："
+        ]
+        
+        await self._reply_message_with_menu(event.reply_token, "\n".join(lines))
     
-    def _handle_help(self, event):
+    async def _handle_help(self, event):
         """處理幫助請求"""
         help_message = """
 🤖 **BriefCard 使用指南**
@@ -234,9 +299,9 @@ class LineBotService:
 需要更多幫助嗎？隨時發送訊息給我！ 😊
         """.strip()
         
-        self._reply_message(event.reply_token, help_message)
+        await self._reply_message(event.reply_token, help_message)
     
-    def _handle_analytics(self, event):
+    async def _handle_analytics(self, event):
         """處理分析請求"""
         analytics_message = """
 📊 **使用分析功能即將推出！**
@@ -253,7 +318,7 @@ class LineBotService:
 敬請期待更多精彩功能！ ✨
         """.strip()
         
-        self._reply_message(event.reply_token, analytics_message)
+        await self._reply_message(event.reply_token, analytics_message)
     
 # 移除了不再需要的 PostBack 處理函數，因為現在直接使用 URI 跳轉
     
@@ -300,88 +365,282 @@ class LineBotService:
         
         return valid_urls
     
-    def _handle_url_message(self, event: MessageEvent, url: str, user_id: str):
+    async def _handle_url_message(self, event: MessageEvent, url: str, user_id: str):
         """處理包含 URL 的訊息"""
         logger.info(f"🔗 檢測到 URL: {url}")
         
-        # 發送確認訊息
-        self._reply_message(
-            event.reply_token,
-            f"📋 正在處理您的連結...\n🔗 {url}\n\n請稍候，我將為您生成預覽卡片！"
-        )
+        # 先不回覆，保留 reply token 給第一張卡片（免費的 reply 取代付費的 push）
+        # 等待處理結果可能長達數十秒，交給有界執行器以免佔住 webhook consumer
+        if not self.executor.submit(self._create_bookmark_from_url(url, user_id, event.reply_token), name=f"url:{url}"):
+            await self._reply_message(event.reply_token, "⏳ 目前使用人數較多，請稍後再傳送連結。")
+    
+    async def _handle_multi_url_message(self, event: MessageEvent, urls: List[str], user_id: str):
+        """處理包含多個 URL 的訊息"""
+        skipped = max(0, len(urls) - settings.line_max_urls_per_message)
+        urls = urls[:settings.line_max_urls_per_message]
+        logger.info(f"🔗 檢測到 {len(urls)} 個 URL（略過 {skipped} 個）")
         
-        # 調用書籤創建 API（模擬內部調用）
-        # 註：實際應用中可能需要更完善的內部 API 調用機制
-        import asyncio
-        asyncio.create_task(self._create_bookmark_from_url(url, user_id, event.reply_token))
+        task = self._create_bookmarks_from_urls(urls, user_id, event.reply_token, skipped)
+        if not self.executor.submit(task, name=f"urls:{len(urls)}:{user_id}"):
+            await self._reply_message(event.reply_token, "⏳ 目前使用人數較多，請稍後再傳送連結。")
+    
+    async def _start_bookmark_job(self, url: str, user_id: str):
+        """
+        創建書籤記錄、登記兩階段事件並排入工作佇列
+        
+        Returns:
+            (bookmark_id, 第一階段 future, 第二階段 future)；創建失敗時回傳 None
+        """
+        from database import db_client
+        from job_queue import job_queue
+        from events import event_bus, BOOKMARK_METADATA_READY, BOOKMARK_COMPLETED, BOOKMARK_FAILED
+        
+        # 創建書籤記錄
+        bookmark_data = {
+            "url": url,
+            "user_id": user_id,
+            "title": "處理中...",
+            "description": "正在分析網頁內容",
+            "status": "processing"
+        }
+        
+        bookmark_result = await db_client.create_bookmark(bookmark_data)
+        if not bookmark_result:
+            return None
+        
+        bookmark_id = bookmark_result['id']  # 取得 ID 字符串
+        
+        # 先登記等待事件，再排入工作佇列
+        first_phase = event_bus.expect(bookmark_id, [BOOKMARK_METADATA_READY, BOOKMARK_COMPLETED, BOOKMARK_FAILED])
+        final_phase = event_bus.expect(bookmark_id, [BOOKMARK_COMPLETED, BOOKMARK_FAILED])
+        await job_queue.enqueue(bookmark_id, url)
+        
+        return bookmark_id, first_phase, final_phase
     
     async def _create_bookmark_from_url(self, url: str, user_id: str, reply_token: str):
-        """創建書籤並發送結果卡片"""
+        """
+        創建書籤並分兩階段發送卡片
+        
+        1. 網頁資訊就緒後以 reply token 回覆卡片（逾時則回覆處理中訊息）
+        2. AI 分析完成後推播含摘要與標籤的更新卡片
+        
+        所有訊息經由發送排程器送出，reply token 用掉之前的訊息都會以 reply 發送
+        """
+        self.push_scheduler.offer_reply_token(user_id, reply_token)
         try:
             # 導入必要模組
             from database import db_client
-            from main import process_bookmark_content
+            from events import event_bus, BOOKMARK_COMPLETED, BOOKMARK_FAILED
+            
+            started = await self._start_bookmark_job(url, user_id)
             
-            # 創建書籤記錄
-            bookmark_data = {
-                "url": url,
-                "user_id": user_id,
-                "title": "處理中...",
-                "description": "正在分析網頁內容",
-                "status": "processing"
-            }
+            if not started:
+                self.push_scheduler.send(user_id, TextSendMessage(text="😅 抱歉，處理您的連結時遇到問題，請稍後再試。"))
+                return
             
-            bookmark_result = await db_client.create_bookmark(bookmark_data)
+            bookmark_id, first_phase, final_phase = started
             
-            if bookmark_result:
-                bookmark_id = bookmark_result['id']  # 取得 ID 字符串
+            # 第一階段：網頁資訊
+            event = await event_bus.wait_for(bookmark_id, settings.line_metadata_reply_timeout, first_phase)
+            card_sent = False
+            
+            if event and event["type"] == BOOKMARK_FAILED:
+                event_bus.discard(bookmark_id, final_phase)
+                self.push_scheduler.send(user_id, TextSendMessage(text="😅 抱歉，處理您的連結時遇到問題，請稍後再試。"))
+                return
+            
+            if event and event.get("bookmark"):
+                self.push_scheduler.send(user_id, flex_renderer.render_message(event["bookmark"], user_id))
+                card_sent = True
+                if event["type"] == BOOKMARK_COMPLETED:
+                    event_bus.discard(bookmark_id, final_phase)
+                    return
+            else:
+                self.push_scheduler.send(
+                    user_id,
+                    TextSendMessage(text=f"📋 正在處理您的連結...\n🔗 {url}\n\n請稍候，我將為您生成預覽卡片！")
+                )
+            
+            # 第二階段：AI 摘要、標籤與分類
+            event = await event_bus.wait_for(bookmark_id, settings.crawler_timeout * 3, final_phase)
+            
+            # 事件帶有最新資料列；逾時（例如由其他 worker 處理且未啟用 Redis 事件）才重新讀取
+            if event:
+                updated_bookmark = event.get("bookmark")
+            else:
+                updated_bookmark = await db_client.get_bookmark(bookmark_id)
+            
+            if updated_bookmark and updated_bookmark.get("status") == "completed":
+                if card_sent and not settings.line_push_enriched_card:
+                    return
                 
-                # 啟動背景處理
-                await process_bookmark_content(bookmark_id, url)
+                # 發送含 AI 分析結果的卡片
+                self.push_scheduler.send(user_id, flex_renderer.render_message(updated_bookmark, user_id))
                 
-                # 等待一段時間後獲取處理結果
-                await asyncio.sleep(5)  # 等待處理完成
+            elif not card_sent:
+                # 發送處理失敗訊息
+                self.push_scheduler.send(
+                    user_id,
+                    TextSendMessage(text="😅 抱歉，處理您的連結時遇到問題，請稍後再試。")
+                )
+            
+        except Exception as e:
+            logger.error(f"❌ 創建書籤失敗: {e}")
+            self.push_scheduler.send(
+                user_id,
+                TextSendMessage(text="😅 抱歉，處理您的連結時發生錯誤，請稍後再試。")
+            )
+    
+    async def _create_bookmarks_from_urls(self, urls: List[str], user_id: str, reply_token: str, skipped: int = 0):
+        """
+        同時處理多個連結並以 carousel 發送卡片
+        
+        1. 等待時間內就緒的卡片整理成一則 carousel，以 reply token 回覆
+        2. 其餘連結（以及含 AI 分析結果的更新卡片）完成後陸續推播
+        """
+        from events import BOOKMARK_METADATA_READY, BOOKMARK_COMPLETED, BOOKMARK_FAILED
+        
+        self.push_scheduler.offer_reply_token(user_id, reply_token)
+        
+        results: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, settings.line_url_concurrency))
+        tasks = [
+            asyncio.create_task(self._process_url_for_carousel(index, url, user_id, semaphore, results))
+            for index, url in enumerate(urls)
+        ]
+        
+        seen = set()       # 已有任何結果的連結
+        finished = set()   # 已有最終結果的連結
+        ready: Dict[int, Dict[str, Any]] = {}  # 可放進回覆 carousel 的卡片
+        replied: Dict[int, str] = {}           # 已回覆卡片的連結 → 當時的事件類型
+        failed: List[str] = []
+        
+        def record(index: int, event_type: str, bookmark):
+            seen.add(index)
+            if event_type != BOOKMARK_METADATA_READY:
+                finished.add(index)
+            if event_type == BOOKMARK_FAILED:
+                failed.append(urls[index])
+            elif bookmark:
+                ready[index] = {"type": event_type, "bookmark": bookmark}
+        
+        try:
+            # 第一階段：收集在等待時間內就緒的卡片
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.line_metadata_reply_timeout
+            while len(seen) < len(urls):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    record(*await asyncio.wait_for(results.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            messages = []
+            if ready:
+                messages.append(flex_renderer.render_carousel(
+                    [ready[index]["bookmark"] for index in sorted(ready)], user_id
+                ))
+                replied = {index: item["type"] for index, item in ready.items()}
+            
+            notes = []
+            pending = len(urls) - len(replied) - len(failed)
+            if not ready:
+                notes.append(f"📋 正在處理您的 {len(urls)} 個連結...\n\n請稍候，完成後會陸續發送預覽卡片！")
+            elif pending:
+                notes.append(f"⏳ 其餘 {pending} 個連結處理完成後會陸續發送")
+            if failed:
+                notes.append(f"😅 {len(failed)} 個連結無法處理：\n" + "\n".join(failed))
+                failed = []
+            if skipped:
+                notes.append(f"ℹ️ 一次最多處理 {settings.line_max_urls_per_message} 個連結，已略過 {skipped} 個")
+            if notes:
+                messages.append(TextSendMessage(text="\n\n".join(notes)))
+            
+            self.push_scheduler.send(user_id, messages)
+            
+            # 第二階段：完成的卡片累積成批推播（同時完成的合併為一則 carousel）
+            while len(finished) < len(urls):
+                batch = [await results.get()]
+                while not results.empty():
+                    batch.append(results.get_nowait())
                 
-                # 獲取更新後的書籤
-                updated_bookmark = await db_client.get_bookmark(bookmark_id)
+                completed = []
+                for index, event_type, bookmark in batch:
+                    if event_type == BOOKMARK_METADATA_READY:
+                        continue
+                    finished.add(index)
+                    if event_type == BOOKMARK_FAILED:
+                        if index not in replied:
+                            failed.append(urls[index])
+                    elif index not in replied or (replied[index] != BOOKMARK_COMPLETED
+                                                  and settings.line_push_enriched_card):
+                        completed.append((index, bookmark))
                 
-                if updated_bookmark and updated_bookmark.get("status") == "completed":
-                    # 發送成功卡片
-                    flex_card = self.create_bookmark_flex_card(updated_bookmark, user_id)
-                    flex_message = FlexSendMessage(
-                        alt_text=f"📋 {updated_bookmark.get('title', '新書籤')}",
-                        contents=flex_card
-                    )
-                    
-                    # 發送 push message
-                    self.line_bot_api.push_message(user_id, flex_message)
-                    
-                else:
-                    # 發送處理失敗訊息
-                    self.line_bot_api.push_message(
-                        user_id,
-                        TextSendMessage(text="😅 抱歉，處理您的連結時遇到問題，請稍後再試。")
+                completed.sort(key=lambda item: item[0])
+                bookmarks = [bookmark for _, bookmark in completed]
+                for start in range(0, len(bookmarks), MAX_CAROUSEL_BUBBLES):
+                    self.push_scheduler.send(
+                        user_id, flex_renderer.render_carousel(bookmarks[start:start + MAX_CAROUSEL_BUBBLES], user_id)
                     )
             
+            if failed:
+                self.push_scheduler.send(
+                    user_id,
+                    TextSendMessage(text=f"😅 {len(failed)} 個連結無法處理：\n" + "\n".join(failed))
+                )
+            
         except Exception as e:
-            logger.error(f"❌ 創建書籤失敗: {e}")
-            self.line_bot_api.push_message(
+            logger.error(f"❌ 批次創建書籤失敗: {e}")
+            self.push_scheduler.send(
                 user_id,
                 TextSendMessage(text="😅 抱歉，處理您的連結時發生錯誤，請稍後再試。")
             )
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _process_url_for_carousel(self, index: int, url: str, user_id: str,
+                                        semaphore: asyncio.Semaphore, results: asyncio.Queue):
+        """處理多連結訊息中的一個連結，將各階段結果 (index, 事件類型, 書籤) 放入 results"""
+        from database import db_client
+        from events import event_bus, BOOKMARK_METADATA_READY, BOOKMARK_COMPLETED, BOOKMARK_FAILED
+        
+        bookmark = None
+        try:
+            async with semaphore:
+                started = await self._start_bookmark_job(url, user_id)
+                if started:
+                    bookmark_id, first_phase, final_phase = started
+                    timeout = settings.crawler_timeout * 3
+                    
+                    event = await event_bus.wait_for(bookmark_id, timeout, first_phase)
+                    if event and event["type"] == BOOKMARK_METADATA_READY:
+                        await results.put((index, BOOKMARK_METADATA_READY, event.get("bookmark")))
+                        event = await event_bus.wait_for(bookmark_id, timeout, final_phase)
+                    else:
+                        event_bus.discard(bookmark_id, final_phase)
+                    
+                    bookmark = event.get("bookmark") if event else await db_client.get_bookmark(bookmark_id)
+        except Exception as e:
+            logger.error(f"❌ 處理連結失敗: {url} - {e}")
         
-    def _handle_general_message(self, event: MessageEvent, message: str, user_id: str):
+        event_type = BOOKMARK_COMPLETED if bookmark and bookmark.get("status") == "completed" else BOOKMARK_FAILED
+        await results.put((index, event_type, bookmark))
+    
+    async def _handle_general_message(self, event: MessageEvent, message: str, user_id: str):
         """處理一般文字訊息"""
         # 簡化處理，專注核心功能
         if message.lower() in ['help', '幫助', '/help']:
-            self._send_help_message(event.reply_token)
+            await self._send_help_message(event.reply_token)
         else:
-            self._reply_message_with_menu(
+            await self._reply_message_with_menu(
                 event.reply_token,
                 "👋 歡迎使用 BriefCard！\n\n📋 請分享網頁連結，我會生成精美的預覽卡片\n💡 輸入「幫助」查看功能說明\n\n⬇️ 快速選單："
             )
     
-    def _send_help_message(self, reply_token: str):
+    async def _send_help_message(self, reply_token: str):
         """發送幫助訊息"""
         help_text = """🌟 BriefCard Bot 功能說明
 
@@ -395,15 +654,15 @@ class LineBotService:
 
 ⬇️ 快速選單："""
         
-        self._reply_message_with_menu(reply_token, help_text)
+        await self._reply_message_with_menu(reply_token, help_text)
     
 
     
-    def _send_error_message(self, reply_token: str):
+    async def _send_error_message(self, reply_token: str):
         """發送錯誤訊息"""
-        self._reply_message(reply_token, "😅 處理時發生錯誤，請稍後再試！")
+        await self._reply_message(reply_token, "😅 處理時發生錯誤，請稍後再試！")
     
-    def _reply_message(self, reply_token: str, text: str, quick_reply: QuickReply = None):
+    async def _reply_message(self, reply_token: str, text: str, quick_reply: QuickReply = None):
         """回覆文字訊息，可選擇性加入 Quick Reply"""
         if not self.enabled:
             logger.warning("⚠️ LINE Bot 未啟用，無法發送訊息")
@@ -414,112 +673,27 @@ class LineBotService:
                 text=text,
                 quick_reply=quick_reply
             )
-            self.line_bot_api.reply_message(reply_token, message)
+            await self.push_scheduler.reply(reply_token, message)
             logger.info(f"✅ 訊息發送成功: {text[:50]}...")
         except Exception as e:
             logger.error(f"❌ 發送訊息失敗: {e}")
     
-    def _reply_message_with_menu(self, reply_token: str, text: str):
+    async def _reply_message_with_menu(self, reply_token: str, text: str):
         """回覆文字訊息並附加主選單 Quick Reply"""
         quick_reply = self.create_main_menu_quick_reply()
-        self._reply_message(reply_token, text, quick_reply)
+        await self._reply_message(reply_token, text, quick_reply)
     
     def create_bookmark_flex_card(self, bookmark_data: Dict[str, Any], user_id: str = None) -> BubbleContainer:
-        """創建書籤 Flex 卡片 - Phase 1 新設計"""
-        # 基本資訊
-        title = bookmark_data.get('title', '無標題')
-        url = bookmark_data.get('url', '')
-        bookmark_id = bookmark_data.get('id', '')
-        
-        # 主要內文：使用 content_markdown 前 100 字（Phase 1 規格）
-        main_content = bookmark_data.get('content_markdown', bookmark_data.get('description', ''))
-        if main_content and len(main_content) > 100:
-            main_content = main_content[:97] + "..."
-        elif not main_content:
-            main_content = "📋 已保存此網頁書籤"
-        
-        # 圖片 fallback 策略：首圖 → 預覽圖 → icon.png
-        image_url = (bookmark_data.get('image_url') or 
-                    bookmark_data.get('preview_image') or 
-                    'https://via.placeholder.com/640x360/E3F2FD/1976D2?text=📋')
-        
-        # 截斷過長的標題
-        if len(title) > 60:
-            title = title[:57] + "..."
-        
-        # 構建 Phase 1 Flex 卡片 JSON
-        flex_json = {
-            "type": "bubble",
-            "hero": {
-                "type": "image",
-                "url": str(image_url).strip(),
-                "size": "full",
-                "aspectRatio": "16:9",
-                "aspectMode": "cover"
-            },
-            "body": {
-                "type": "box",
-                "layout": "vertical",
-                "contents": [
-                    {
-                        "type": "text",
-                        "text": title,
-                        "weight": "bold",
-                        "size": "lg",
-                        "wrap": True,
-                        "maxLines": 2
-                    },
-                    {
-                        "type": "text",
-                        "text": main_content,
-                        "size": "sm",
-                        "color": "#666666",
-                        "wrap": True,
-                        "maxLines": 4,
-                        "margin": "md"
-                    },
-                    {
-                        "type": "button",
-                        "style": "primary",
-                        "action": {
-                            "type": "uri",
-                            "uri": f"{settings.liff_url}?bookmarkId={bookmark_id}&userId={user_id or 'anonymous'}",
-                            "label": "編輯卡片"
-                        },
-                        "margin": "lg"
-                    }
-                ]
-            },
-            "footer": {
-                "type": "box",
-                "layout": "horizontal",
-                "spacing": "sm",
-                "contents": [
-                    {
-                        "type": "button",
-                        "style": "secondary",
-                        "action": {
-                            "type": "uri",
-                            "uri": url,
-                            "label": "閱讀原文"
-                        },
-                        "flex": 1
-                    },
-                    {
-                        "type": "button",
-                        "style": "secondary",
-                        "action": {
-                            "type": "postback",
-                            "data": f"action=save&bookmark_id={bookmark_id}",
-                            "label": "保存書籤"
-                        },
-                        "flex": 1
-                    }
-                ]
-            }
-        }
-        
-        return BubbleContainer.new_from_json_dict(flex_json)
+        """創建書籤 Flex 卡片（SDK 物件版本；發送時請直接使用 flex_renderer 輸出的 JSON）"""
+        return BubbleContainer.new_from_json_dict(json.loads(flex_renderer.render_bubble(bookmark_data, user_id)))
+    
+    async def close(self):
+        """等待進行中的背景任務、送出待發送的訊息並關閉 LINE 客戶端"""
+        if not self.enabled:
+            return
+        await self.executor.drain()
+        await self.push_scheduler.stop()
+        await self.line_client.close()
     
     def send_bookmark_card(self, user_id: str, bookmark_data: Dict[str, Any]):
         """發送書籤卡片給用戶"""
@@ -528,11 +702,7 @@ class LineBotService:
             return
         
         try:
-            flex_card = self.create_bookmark_flex_card(bookmark_data, user_id)
-            flex_message = FlexSendMessage(
-                alt_text=f"📋 {bookmark_data.get('title', '新書籤')}",
-                contents=flex_card
-            )
+            flex_message = flex_renderer.render_message(bookmark_data, user_id)
             
             # 發送訊息給用戶
             # 注意: 這裡需要 push message，但需要用戶先與 Bot 互動
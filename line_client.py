@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 非同步 LINE Messaging API 客戶端
+以 httpx 連線池（keep-alive）呼叫 reply / push，不阻塞事件迴圈，並在 429 / 5xx 時重試
+"""
+
+import asyncio
+import json
+import logging
+import random
+import uuid
+from typing import Optional, Dict, Any, List, Union
+
+import httpx
+
+from config import settings
+from rate_limiter import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+class LineApiError(Exception):
+    """LINE API 呼叫失敗"""
+
+    def __init__(self, status_code: int, message: str, request_id: Optional[str] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(f"LINE API {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        self.request_id = request_id
+        self.retry_after = retry_after  # 回應的 Retry-After 秒數（沒有時為 None）
+
+class AsyncLineClient:
+    """LINE Messaging API 非同步客戶端"""
+
+    def __init__(self, access_token: str, base_url: str = "https://api.line.me",
+                 timeout: float = 10.0, max_retries: int = 3, max_connections: int = 20,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, max_retry_after: float = 60.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.http_client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60
+            )
+        )
+
+        self.counters = {"requests": 0, "retries": 0, "rate_limited": 0, "errors": 0}
+
+    @staticmethod
+    def _encode_body(fields: Dict[str, Any], messages: Union[Any, List[Any]]) -> bytes:
+        """
+        組出請求 JSON
+
+        messages 可為 linebot.models 的 SendMessage、dict，或已渲染的 JSON bytes（例如 flex_renderer 的輸出）
+        """
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+
+        encoded = []
+        for message in messages:
+            if isinstance(message, bytes):
+                encoded.append(message)
+                continue
+            if not isinstance(message, dict):
+                message = message.as_json_dict()
+            encoded.append(json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+        head = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return head[:-1] + b',"messages":[' + b",".join(encoded) + b"]}"
+
+    async def reply_message(self, reply_token: str, messages: Union[Any, List[Any]]) -> Dict[str, Any]:
+        """以 reply token 回覆訊息（免費，但 token 只能使用一次）"""
+        body = self._encode_body({"replyToken": reply_token}, messages)
+        # reply token 送達後即失效，只在確定未被處理的 429 / 連線失敗時重試
+        return await self._post("/v2/bot/message/reply", body, retry_server_errors=False)
+
+    async def push_message(self, to: str, messages: Union[Any, List[Any]],
+                           retry_key: Optional[str] = None, max_retries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        推播訊息（計入每月推播額度）
+
+        以 X-Line-Retry-Key 讓重試具冪等性，同一則推播不會重複送達
+
+        Args:
+            max_retries: 覆寫客戶端的重試次數（自行重試的呼叫端傳 0）
+        """
+        body = self._encode_body({"to": to}, messages)
+        headers = {"X-Line-Retry-Key": retry_key or str(uuid.uuid4())}
+        return await self._post("/v2/bot/message/push", body, headers=headers, max_retries=max_retries)
+
+    async def get_profile(self, user_id: str) -> Dict[str, Any]:
+        """獲取用戶個人資料"""
+        return await self._request("GET", f"/v2/bot/profile/{user_id}")
+
+    async def _post(self, path: str, body: bytes, headers: Optional[Dict[str, str]] = None,
+                    retry_server_errors: bool = True, max_retries: Optional[int] = None) -> Dict[str, Any]:
+        headers = {**(headers or {}), "Content-Type": "application/json"}
+        return await self._request("POST", path, content=body, headers=headers,
+                                   retry_server_errors=retry_server_errors, max_retries=max_retries)
+
+    async def _request(self, method: str, path: str, content: Optional[bytes] = None,
+                       headers: Optional[Dict[str, str]] = None,
+                       retry_server_errors: bool = True, max_retries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        送出請求，429（以及可重試時的 5xx / 連線錯誤）依 Retry-After 或指數退避重試
+
+        Retry-After 超過 max_retry_after 時不等待，直接拋出（錯誤附上 retry_after）
+
+        Raises:
+            LineApiError: 重試後仍失敗
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            self.counters["requests"] += 1
+            can_retry = attempt < max_retries
+
+            try:
+                response = await self.http_client.request(method, path, content=content, headers=headers)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # 請求尚未送出，任何呼叫都可以安全重試
+                if can_retry:
+                    await self._backoff(attempt, None)
+                    continue
+                self.counters["errors"] += 1
+                raise LineApiError(0, f"連線失敗: {e}") from e
+            except httpx.HTTPError as e:
+                if can_retry and retry_server_errors:
+                    await self._backoff(attempt, None)
+                    continue
+                self.counters["errors"] += 1
+                raise LineApiError(0, str(e)) from e
+
+            status = response.status_code
+            if status < 300:
+                return response.json() if response.content else {}
+
+            retry_after = retry_after_seconds(response)
+            if status == 429 or (status >= 500 and retry_server_errors):
+                if status == 429:
+                    self.counters["rate_limited"] += 1
+                if can_retry and (retry_after is None or retry_after <= self.max_retry_after):
+                    await self._backoff(attempt, retry_after)
+                    continue
+            elif status == 409 and headers and "X-Line-Retry-Key" in headers:
+                # 相同 retry key 的請求已被接受（先前的重試其實已送達）
+                return {}
+
+            self.counters["errors"] += 1
+            raise LineApiError(status, response.text, response.headers.get("x-line-request-id"), retry_after)
+
+        raise LineApiError(0, "超過重試次數")
+
+    async def _backoff(self, attempt: int, retry_after: Optional[float]):
+        """照 Retry-After 等待；沒有時以含抖動、上限為 backoff_max 的指數退避"""
+        self.counters["retries"] += 1
+        if retry_after is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        else:
+            delay = retry_after
+
+        logger.warning(f"⏳ LINE API 重試（第 {attempt + 1} 次），等待 {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+    async def close(self):
+        await self.http_client.aclose()
+
+def create_line_client() -> AsyncLineClient:
+    """根據配置建立 LINE 客戶端"""
+    return AsyncLineClient(
+        settings.line_channel_access_token or "",
+        base_url=settings.line_api_base_url,
+        timeout=settings.line_api_timeout,
+        max_retries=settings.line_api_max_retries,
+        max_connections=settings.line_api_max_connections,
+        max_retry_after=settings.line_api_max_retry_after
+    )
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 本地 AI 分析服務
+不呼叫外部 API 的摘要、關鍵詞與分類：漢字以 n-gram 切詞，摘要以 TF-IDF 預選句子後跑 TextRank，
+分類以關鍵詞辭典加權計分。只分析前 2 萬字，長網頁也在數十毫秒內完成，可作為 LLM 結果出來前的即時預覽。
+"""
+
+import asyncio
+import logging
+import math
+import re
+from collections import Counter
+from operator import add
+from typing import Optional, Dict, Any, List, Tuple
+
+from models import ContentCategory
+
+logger = logging.getLogger(__name__)
+
+# 漢字連續段、日文片假名 / 韓文詞、英數單字
+TOKEN_PATTERN = re.compile(
+    r"([\u3400-\u4dbf\u4e00-\u9fff]+)"
+    r"|([\u30a0-\u30ff]{2,}|[\uac00-\ud7af]{2,})"
+    r"|([A-Za-z][A-Za-z0-9+#]*(?:[.\-'][A-Za-z0-9+#]+)*)"
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[。！？!?；;])|\n+|(?<=[.])\s+")
+MARKDOWN_NOISE = re.compile(r"!\[[^\]]*\]\([^)]*\)|\]\([^)]*\)|https?://\S+|[#>*_`|\[\]]+")
+
+# 只分析前段內容：文章重點多在前段，也讓長網頁的耗時有上限（LLM 只看前 2000 字）
+ANALYSIS_MAX_CHARS = 20000
+CATEGORY_MAX_CHARS = 10000
+
+# 出現在詞首或詞尾時幾乎不構成詞的虛字
+EDGE_STOP_CHARS = set("的了是在和與与及或也都就而被把這这那您我你他她它們们個个為为以於于之其並并且但很更最又再已將将讓让使著着過过嗎吗呢吧啊等")
+STOP_BIGRAMS = {
+    "我們", "我们", "你們", "你们", "他們", "他们", "這個", "这个", "那個", "那个", "一個", "一个",
+    "可以", "因為", "因为", "所以", "如果", "但是", "還是", "还是", "就是", "不是", "沒有", "没有",
+    "什麼", "什么", "這樣", "这样", "那麼", "那么", "目前", "今天", "已經", "已经", "其中", "以及",
+    "並且", "并且", "自己", "相關", "相关", "進行", "进行", "包括", "透過", "通过", "一些", "很多"
+}
+STOP_WORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "all", "any", "can", "her", "was", "one", "our",
+    "out", "has", "have", "had", "his", "how", "its", "may", "new", "now", "see", "who", "did", "get",
+    "this", "that", "with", "from", "they", "will", "would", "there", "their", "what", "about", "which",
+    "when", "your", "were", "been", "more", "than", "into", "also", "just", "like", "some", "such",
+    "these", "those", "then", "them", "only", "over", "most", "other", "very", "here", "where", "http", "https", "www"
+}
+
+# 分類辭典：(關鍵詞, 權重)，標題中出現的關鍵詞再乘上 TITLE_WEIGHT
+CATEGORY_LEXICON: Dict[ContentCategory, List[Tuple[str, float]]] = {
+    ContentCategory.TECH: [
+        ("程式", 2), ("程序", 1), ("代碼", 2), ("代码", 2), ("開發", 1), ("开发", 1), ("工程師", 1), ("工程师", 1),
+        ("演算法", 2), ("算法", 2), ("人工智慧", 2), ("人工智能", 2), ("機器學習", 2), ("机器学习", 2),
+        ("資料庫", 2), ("数据库", 2), ("伺服器", 2), ("服务器", 2), ("晶片", 2), ("芯片", 2), ("半導體", 2),
+        ("python", 2), ("javascript", 2), ("github", 2), ("api", 1), ("programming", 2), ("developer", 1),
+        ("software", 1), ("code", 1), ("llm", 2), ("kubernetes", 2), ("docker", 2), ("linux", 2)
+    ],
+    ContentCategory.NEWS: [
+        ("新聞", 2), ("新闻", 2), ("報導", 2), ("报道", 2), ("記者", 2), ("记者", 2), ("快訊", 2), ("快讯", 2),
+        ("政府", 1), ("總統", 2), ("总统", 2), ("立法院", 2), ("選舉", 2), ("选举", 2), ("警方", 2), ("事故", 1),
+        ("breaking", 2), ("news", 1), ("reported", 1), ("government", 1), ("election", 2)
+    ],
+    ContentCategory.BUSINESS: [
+        ("財經", 2), ("财经", 2), ("股市", 2), ("股價", 2), ("股价", 2), ("投資", 2), ("投资", 2), ("營收", 2),
+        ("营收", 2), ("經濟", 1), ("经济", 1), ("企業", 1), ("企业", 1), ("創業", 2), ("创业", 2), ("市場", 1),
+        ("市场", 1), ("融資", 2), ("融资", 2), ("finance", 2), ("startup", 2), ("revenue", 2), ("market", 1),
+        ("investor", 2), ("stock", 1)
+    ],
+    ContentCategory.ENTERTAINMENT: [
+        ("電影", 2), ("电影", 2), ("影集", 2), ("劇集", 2), ("剧集", 2), ("演員", 2), ("演员", 2), ("歌手", 2),
+        ("音樂", 1), ("音乐", 1), ("遊戲", 2), ("游戏", 2), ("動漫", 2), ("动漫", 2), ("綜藝", 2), ("综艺", 2),
+        ("娛樂", 2), ("娱乐", 2), ("movie", 2), ("film", 1), ("game", 1), ("music", 1), ("netflix", 2)
+    ],
+    ContentCategory.EDUCATION: [
+        ("教學", 2), ("教学", 2), ("學習", 1), ("学习", 1), ("課程", 2), ("课程", 2), ("考試", 2), ("考试", 2),
+        ("教育", 2), ("學生", 1), ("学生", 1), ("老師", 1), ("老师", 1), ("大學", 1), ("大学", 1), ("教材", 2),
+        ("tutorial", 2), ("course", 2), ("learn", 1), ("education", 2), ("lesson", 2)
+    ],
+    ContentCategory.HEALTH: [
+        ("健康", 2), ("醫療", 2), ("医疗", 2), ("醫生", 2), ("医生", 2), ("醫師", 2), ("醫院", 2), ("医院", 2),
+        ("疾病", 2), ("症狀", 2), ("症状", 2), ("治療", 2), ("治疗", 2), ("藥物", 2), ("药物", 2), ("疫苗", 2),
+        ("營養", 1), ("营养", 1), ("health", 2), ("medical", 2), ("disease", 2), ("doctor", 1)
+    ],
+    ContentCategory.LIFESTYLE: [
+        ("生活", 1), ("旅遊", 2), ("旅游", 2), ("美食", 2), ("餐廳", 2), ("餐厅", 2), ("食譜", 2), ("食谱", 2),
+        ("料理", 1), ("居家", 2), ("穿搭", 2), ("育兒", 2), ("育儿", 2), ("景點", 2), ("景点", 2),
+        ("travel", 2), ("recipe", 2), ("food", 1), ("lifestyle", 2)
+    ],
+    ContentCategory.SOCIAL: [
+        ("臉書", 2), ("脸书", 2), ("推特", 2), ("貼文", 2), ("贴文", 2), ("網友", 2), ("网友", 2), ("粉絲", 1),
+        ("粉丝", 1), ("按讚", 2), ("转发", 2), ("facebook", 2), ("instagram", 2), ("twitter", 2), ("threads", 2),
+        ("tiktok", 2), ("follower", 2)
+    ],
+    ContentCategory.SHOPPING: [
+        ("優惠", 2), ("优惠", 2), ("折扣", 2), ("價格", 1), ("价格", 1), ("購買", 2), ("购买", 2), ("開箱", 2),
+        ("开箱", 2), ("特價", 2), ("特价", 2), ("下單", 2), ("下单", 2), ("免運", 2), ("評測", 1), ("评测", 1),
+        ("shop", 1), ("discount", 2), ("deal", 1), ("price", 1), ("review", 1)
+    ],
+    ContentCategory.TOOLS: [
+        ("工具", 2), ("軟體", 2), ("软件", 2), ("應用程式", 2), ("应用", 1), ("外掛", 2), ("插件", 2),
+        ("擴充功能", 2), ("下載", 1), ("下载", 1), ("安裝", 1), ("安装", 1), ("教你", 1), ("免費", 1),
+        ("app", 1), ("tool", 2), ("plugin", 2), ("extension", 2), ("download", 1)
+    ]
+}
+TITLE_WEIGHT = 3.0
+MIN_CATEGORY_SCORE = 4.0
+
+def _is_han(text: str) -> bool:
+    return "\u3400" <= text[0] <= "\u9fff"
+
+def tokenize(text: str, max_n: int = 2) -> List[str]:
+    """
+    CJK 感知的分詞
+
+    漢字連續段切成 2～max_n 字的 n-gram（不需要辭典），片假名 / 韓文與英文以整個詞為單位，
+    英文轉小寫並去除停用詞
+    """
+    tokens: List[str] = []
+    for han, other, word in TOKEN_PATTERN.findall(text):
+        if han:
+            tokens.extend(map(add, han, han[1:]))
+            for n in range(3, max_n + 1):
+                tokens.extend(map("".join, zip(*(han[i:] for i in range(n)))))
+        elif other:
+            tokens.append(other)
+        else:
+            word = word.lower()
+            if len(word) > 2 and word not in STOP_WORDS:
+                tokens.append(word)
+    return tokens
+
+def _is_candidate(term: str) -> bool:
+    if not _is_han(term):
+        return True
+    return term[0] not in EDGE_STOP_CHARS and term[-1] not in EDGE_STOP_CHARS and term not in STOP_BIGRAMS
+
+def clean_text(content: str) -> str:
+    """去除 Markdown 圖片、連結網址與格式符號"""
+    return MARKDOWN_NOISE.sub(" ", content or "")
+
+def split_sentences(text: str, min_length: int = 8, max_length: int = 300) -> List[str]:
+    """切分句子，略過重複、過短（標題、按鈕文字）與過長（未斷句的區塊）的片段"""
+    sentences = []
+    seen = set()
+    for sentence in SENTENCE_SPLIT.split(text):
+        sentence = sentence.strip()
+        if min_length <= len(sentence) <= max_length and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    return sentences
+
+def _overlaps(term: str, other: str) -> bool:
+    """互相包含，或只差一個字的平移片段（例如「晶片需求」與「片需求強」）"""
+    if term in other or other in term:
+        return True
+    return _is_han(term) and _is_han(other) and (term[1:] in other or term[:-1] in other)
+
+def extract_keywords(title: str, content: str, max_keywords: int = 5) -> List[str]:
+    """
+    統計式關鍵詞提取
+
+    詞頻 × 長度加權（越長的 n-gram 越可能是完整詞），標題中的詞加倍；
+    與已選的詞重疊（包含或平移一字）且出現次數相近的片段會被略過
+    """
+    counts = Counter(tokenize(content[:ANALYSIS_MAX_CHARS], max_n=4))
+    title_terms = set(tokenize(title or "", max_n=4))
+    counts.update(title_terms)
+
+    scored = []
+    for term, count in counts.items():
+        if (count < 2 and term not in title_terms) or not _is_candidate(term):
+            continue
+        score = count * (1 + 0.5 * (len(term) - 2) if _is_han(term) else 1.0)
+        if term in title_terms:
+            score *= 2
+        scored.append((score, count, term))
+    scored.sort(reverse=True)
+
+    selected: List[Tuple[str, int]] = []
+    for _, count, term in scored:
+        if any(_overlaps(term, chosen) and count * 1.5 > chosen_count and chosen_count * 1.5 > count
+               for chosen, chosen_count in selected):
+            continue
+        selected.append((term, count))
+        if len(selected) >= max_keywords:
+            break
+
+    keywords = [term for term, _ in selected]
+    if not keywords and title:
+        keywords = [word for word in re.split(r"[\s|｜:：\-–—]+", title) if len(word) >= 2][:max_keywords]
+    return keywords
+
+def summarize(title: str, content: str, max_length: int = 200,
+              max_sentences: int = 3, candidates: int = 30) -> str:
+    """
+    抽取式摘要
+
+    1. TF-IDF：以句子為文件計算 IDF，句子分數為詞權重總和（依長度正規化），前段與含標題詞的句子加分
+    2. TextRank：只在前 candidates 句候選間建立相似度圖並迭代 PageRank
+    3. 兩者分數相乘取前幾句（略過與已選句子高度重複者），依原文順序輸出
+    """
+    sentences = split_sentences(clean_text(content[:ANALYSIS_MAX_CHARS]))
+    if not sentences:
+        return ""
+
+    sentence_terms = [set(tokenize(sentence)) for sentence in sentences]
+    document_frequency: Counter = Counter()
+    for terms in sentence_terms:
+        document_frequency.update(terms)
+
+    total = len(sentences)
+    title_terms = set(tokenize(title or ""))
+    weights = {term: df * (math.log((total + 1) / (df + 1)) + 1) for term, df in document_frequency.items()}
+
+    tfidf_scores = []
+    for index, terms in enumerate(sentence_terms):
+        if not terms:
+            tfidf_scores.append(0.0)
+            continue
+        score = sum(weights[term] for term in terms) / math.sqrt(len(terms))
+        score *= 1 + 0.5 / (1 + index / 5)  # 導言通常最能概括全文
+        if title_terms:
+            score *= 1 + len(terms & title_terms) / len(title_terms)
+        tfidf_scores.append(score)
+
+    ranked = sorted(range(total), key=lambda i: tfidf_scores[i], reverse=True)[:candidates]
+    textrank = _textrank([sentence_terms[i] for i in ranked])
+    best_tfidf = max(tfidf_scores[i] for i in ranked) or 1.0
+    final = sorted(
+        ((tfidf_scores[i] / best_tfidf) * rank, i) for i, rank in zip(ranked, textrank)
+    )
+
+    chosen: List[int] = []
+    length = 0
+    for _, index in reversed(final):
+        if len(chosen) >= max_sentences:
+            break
+        if chosen and length + len(sentences[index]) > max_length:
+            continue
+        terms = sentence_terms[index]
+        if any(len(terms & sentence_terms[other]) > 0.6 * min(len(terms), len(sentence_terms[other])) for other in chosen):
+            continue
+        chosen.append(index)
+        length += len(sentences[index])
+
+    parts = []
+    for index in sorted(chosen):
+        sentence = sentences[index]
+        parts.append(sentence if _is_han(sentence[-1]) or sentence[-1] in "。！？；" else sentence + " ")
+    summary = "".join(parts).strip()
+    if len(summary) > max_length:
+        summary = summary[:max_length - 3] + "..."
+    return summary
+
+def _textrank(term_sets: List[set], damping: float = 0.85, iterations: int = 20) -> List[float]:
+    """TextRank（相似度為共同詞數 / (log|A| + log|B|)），回傳正規化到 0～1 的分數"""
+    count = len(term_sets)
+    if count <= 2:
+        return [1.0] * count
+
+    logs = [math.log(len(terms) + 1) for terms in term_sets]
+    edges: List[List[Tuple[int, float]]] = [[] for _ in range(count)]
+    for i in range(count):
+        for j in range(i + 1, count):
+            overlap = len(term_sets[i] & term_sets[j])
+            if overlap:
+                weight = overlap / (logs[i] + logs[j])
+                edges[i].append((j, weight))
+                edges[j].append((i, weight))
+
+    out_weight = [sum(weight for _, weight in neighbours) or 1.0 for neighbours in edges]
+    scores = [1.0] * count
+    for _ in range(iterations):
+        scores = [
+            (1 - damping) + damping * sum(scores[j] * weight / out_weight[j] for j, weight in edges[i])
+            for i in range(count)
+        ]
+
+    best = max(scores) or 1.0
+    return [score / best for score in scores]
+
+def categorize(title: str, content: str) -> str:
+    """以分類辭典加權計分，分數不足時歸為「其他」"""
+    title_lower = (title or "").lower()
+    content_lower = (content or "")[:CATEGORY_MAX_CHARS].lower()
+
+    best_category, best_score = ContentCategory.OTHER, 0.0
+    for category, lexicon in CATEGORY_LEXICON.items():
+        score = 0.0
+        for term, weight in lexicon:
+            hits = content_lower.count(term)
+            if hits:
+                # 出現次數取對數，避免單一高頻詞主導
+                score += weight * (1 + math.log(hits))
+            if term in title_lower:
+                score += weight * TITLE_WEIGHT
+        if score > best_score:
+            best_category, best_score = category, score
+
+    return best_category.value if best_score >= MIN_CATEGORY_SCORE else ContentCategory.OTHER.value
+
+class LocalAIService:
+    """本地 AI 分析服務（介面與其他 AI 服務相同）"""
+
+    # 演算法版本，調整分析邏輯時需遞增以讓 AI 分析快取失效
+    PROMPT_VERSION = "1"
+    model = "local-textrank"
+
+    def __init__(self):
+        logger.info("🧮 初始化本地 AI 分析服務")
+
+    def analyze(self, title: str, content: str, max_length: int = 200, max_keywords: int = 5) -> Dict[str, Any]:
+        """同步完成摘要、關鍵詞與分類（可在 LLM 結果出來前作為預覽）"""
+        summary = summarize(title, content, max_length) or (f"這是關於「{title}」的內容" if title else "")
+        return {
+            "summary": summary,
+            "keywords": extract_keywords(title, clean_text(content), max_keywords),
+            "category": categorize(title, content)
+        }
+
+    # 非同步介面在執行緒中計算，避免 TextRank 阻塞事件迴圈
+
+    async def generate_summary(self, title: str, content: str, max_length: int = 200) -> Optional[str]:
+        """生成摘要"""
+        return await asyncio.to_thread(summarize, title, content, max_length) or None
+
+    async def extract_keywords(self, title: str, content: str, max_keywords: int = 5) -> List[str]:
+        """提取關鍵詞"""
+        return await asyncio.to_thread(lambda: extract_keywords(title, clean_text(content), max_keywords))
+
+    async def categorize_content(self, title: str, content: str) -> str:
+        """內容分類"""
+        return await asyncio.to_thread(categorize, title, content)
+
+    async def analyze_content(self, title: str, content: str) -> Dict[str, Any]:
+        """綜合分析內容"""
+        result = await asyncio.to_thread(self.analyze, title, content)
+        logger.info(f"🧮 本地分析完成: 摘要={len(result['summary'])} 字, 關鍵詞={len(result['keywords'])}, 分類={result['category']}")
+        return result
+
+    async def close(self):
+        """關閉服務（無外部連線）"""
+        pass
+
+# 建立全域本地分析服務實例
+local_ai_service = LocalAIService()
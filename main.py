@@ -11,20 +11,32 @@ from datetime import datetime
 from typing import Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 # 本地模組
 from config import settings
-from database import db_client
+from database import db_client, encode_cursor
 from crawler_service import crawler_service
 from ai_service_factory import ai_service
+from ai_cache import CachedAIService
+from ai_router import AIRouter
+from rate_limiter import llm_rate_limiter
+from local_ai_service import local_ai_service
+from ai_stream import summary_preview
+from job_queue import job_queue, JobRetry
+from webhook_queue import webhook_queue
+from events import event_bus, BOOKMARK_METADATA_READY, BOOKMARK_COMPLETED, BOOKMARK_FAILED
+from flex_renderer import flex_renderer
+from semantic_index import semantic_index
 from line_bot_service import line_bot_service
 from models import (
     CreateBookmarkRequest, CrawlUrlRequest,
     BookmarkResponse, CrawlResult,
+    BookmarkHistoryResponse, BookmarkSearchResponse, BookmarkStatsResponse,
+    SemanticSearchResponse, RelatedBookmarksResponse,
     HealthCheckResponse, SuccessResponse,
     create_success_response
 )
@@ -49,6 +61,19 @@ async def lifespan(app: FastAPI):
         logger.error("❌ 配置驗證失敗，應用無法啟動")
         exit(1)
     
+    # 預熱瀏覽器池
+    await crawler_service.start()
+    
+    # 啟動書籤事件與工作佇列，並重新排入上次關閉時卡在處理中的書籤
+    await event_bus.start()
+    await job_queue.start(run_bookmark_job, on_abandoned=abandon_bookmark_job)
+    stale_bookmarks = await db_client.get_stale_processing_bookmarks(settings.job_stuck_after_seconds)
+    await job_queue.recover(stale_bookmarks)
+    
+    # 啟動 webhook 事件 consumer
+    if line_bot_service.enabled:
+        await webhook_queue.start(line_bot_service.handle_event)
+    
     # 檢查服務連線
     services_status = await check_services_health()
     failed_services = [name for name, status in services_status.items() if not status]
@@ -64,7 +89,15 @@ async def lifespan(app: FastAPI):
     
     # 關閉時
     logger.info("🛑 BriefCard PoC API 正在關閉...")
+    await webhook_queue.stop()
+    # 先讓進行中的工作與事件通知結束，它們仍需要 LINE 客戶端推送卡片
+    await job_queue.stop()
+    job_queue.close()
+    await event_bus.close()
+    await line_bot_service.close()
+    await crawler_service.close()
     await ai_service.close()
+    await db_client.close()
     logger.info("✅ 應用已安全關閉")
 
 # ==================== 應用初始化 ====================
@@ -97,58 +130,187 @@ async def check_services_health() -> dict:
     ai_service_available = ai_service is not None and any(ai_providers.values())
     
     return {
-        "database": db_client.health_check(),
-        "crawler": True,  # Crawl4AI 沒有直接的健康檢查
+        "database": await db_client.health_check(),
+        "crawler": crawler_service.is_ready,
         "ai_service": ai_service_available,
         "ai_provider": settings.ai_service_provider,
-        "ai_providers": ai_providers
+        "ai_providers": ai_providers,
+        "ai_cache": ai_service.stats() if isinstance(ai_service, CachedAIService) else "disabled"
     }
 
-async def process_bookmark_content(bookmark_id: str, url: str):
-    """背景任務：處理書籤內容（爬取 + AI 分析）"""
+async def process_bookmark_content(bookmark_id: str, url: str, refresh_analysis: bool = False,
+                                   final_attempt: bool = True):
+    """
+    背景任務：處理書籤內容（爬取 + AI 分析）
+    
+    分兩階段保存：爬取完成後立即寫入網頁資訊（metadata_ready）並發布事件，
+    讓第一張卡片不必等待 AI；AI 分析完成後再補上摘要、標籤與分類（completed）。
+    
+    不是最後一次嘗試時，爬取失敗、AI 分析沒有任何結果或資料庫異常會拋出例外交由工作佇列重試，
+    只有最後一次嘗試才將書籤標記為 failed 並發布失敗事件。
+    """
     try:
         logger.info(f"📋 開始處理書籤內容: {bookmark_id}")
         
         # 1. 爬取網頁內容
-        crawl_result = await crawler_service.extract_content(url)
+        async with job_queue.stage("crawl"):
+            crawl_result = await crawler_service.extract_content(url)
         
         if not crawl_result or not crawl_result.get("success"):
             error_msg = crawl_result.get("error", "未知爬取錯誤") if crawl_result else "爬蟲服務無回應"
             logger.error(f"❌ 爬取失敗: {bookmark_id} - {error_msg}")
-            await db_client.update_bookmark(bookmark_id, {
-                "status": "failed",
-                "description": f"爬取失敗: {error_msg}"
-            })
+            if not final_attempt:
+                raise JobRetry(f"爬取失敗: {error_msg}")
+            async with job_queue.stage("db"):
+                failed = await db_client.update_bookmark(bookmark_id, {
+                    "status": "failed",
+                    "description": f"爬取失敗: {error_msg}"
+                })
+            await event_bus.publish(BOOKMARK_FAILED, bookmark_id, failed, error_msg)
             return
         
-        # 2. AI 分析內容
-        ai_analysis = await ai_service.analyze_content(
-            crawl_result.get("title", ""),
-            crawl_result.get("content_markdown", "")
-        )
-        
-        # 3. 更新書籤資料
-        update_data = {
+        # 2. 先保存網頁資訊並通知監聽者
+        metadata = {
             "title": crawl_result.get("title", ""),
             "description": crawl_result.get("description", ""),
             "image_url": crawl_result.get("image_url", ""),
+            "site_name": crawl_result.get("site_name", ""),
             "content_markdown": crawl_result.get("content_markdown", ""),
+            "status": "metadata_ready"
+        }
+        
+        # 本地分析的摘要、標籤與分類作為即時預覽，LLM 結果出來後覆寫
+        preview = None
+        if settings.ai_local_preview and not refresh_analysis and settings.ai_service_provider != "local":
+            preview = await asyncio.to_thread(local_ai_service.analyze, metadata["title"], metadata["content_markdown"])
+            metadata.update({
+                "summary": preview["summary"],
+                "tags": preview["keywords"],
+                "category": preview["category"]
+            })
+        
+        async with job_queue.stage("db"):
+            metadata_row = await db_client.update_bookmark(bookmark_id, metadata)
+        
+        if metadata_row:
+            logger.info(f"📰 書籤網頁資訊已就緒: {bookmark_id}")
+            await event_bus.publish(BOOKMARK_METADATA_READY, bookmark_id, metadata_row)
+        
+        # 3. AI 分析內容（refresh_analysis 時略過 AI 分析快取）
+        analyze_kwargs = {"refresh": True} if refresh_analysis and isinstance(ai_service, CachedAIService) else {}
+        
+        # 串流模式下 LLM 摘要第一句完成時先寫入，LIFF 頁面不必等到分析結束
+        # 路由器對沖（hedge）時多個串流共用此回呼，只寫入最先完成的一句
+        preview_saved = False
+        
+        async def save_summary_preview(sentence: str):
+            nonlocal preview_saved
+            if preview_saved:
+                return
+            preview_saved = True
+            if await db_client.save_summary_preview(bookmark_id, sentence):
+                logger.info(f"📝 已寫入摘要預覽: {bookmark_id}")
+        
+        preview_token = summary_preview.set(save_summary_preview if settings.ai_streaming and metadata_row else None)
+        try:
+            async with job_queue.stage("ai"):
+                ai_analysis = await ai_service.analyze_content(
+                    crawl_result.get("title", ""),
+                    crawl_result.get("content_markdown", ""),
+                    **analyze_kwargs
+                )
+        finally:
+            summary_preview.reset(preview_token)
+        
+        # LLM 分析失敗時保留本地預覽結果
+        if preview and not ai_analysis.get("summary"):
+            ai_analysis = preview
+        if not ai_analysis.get("summary") and not final_attempt:
+            raise JobRetry("AI 分析沒有產生摘要")
+        
+        # 4. 補上 AI 分析結果（網頁資訊先前未寫入成功時一併寫入）
+        update_data = {
+            **({} if metadata_row else metadata),
             "summary": ai_analysis.get("summary"),
             "tags": ai_analysis.get("keywords", []),
             "category": ai_analysis.get("category", "其他"),
             "status": "completed"
         }
         
-        result = await db_client.update_bookmark(bookmark_id, update_data)
+        async with job_queue.stage("db"):
+            result = await db_client.update_bookmark(bookmark_id, update_data)
         
         if result:
             logger.info(f"✅ 書籤處理完成: {bookmark_id}")
+            await event_bus.publish(BOOKMARK_COMPLETED, bookmark_id, result)
+            await store_rendered_card(result)
+            await update_semantic_index(result)
         else:
             logger.error(f"❌ 更新書籤失敗: {bookmark_id}")
+            if not final_attempt:
+                raise JobRetry("更新書籤失敗")
+            await event_bus.publish(BOOKMARK_FAILED, bookmark_id, error="更新書籤失敗")
             
     except Exception as e:
+        if not final_attempt:
+            logger.warning(f"⚠️ 處理書籤內容失敗，稍後重試: {bookmark_id} - {e}")
+            raise
         logger.error(f"❌ 處理書籤內容異常: {bookmark_id} - {e}")
-        await db_client.update_bookmark(bookmark_id, {"status": "failed"})
+        failed = await db_client.update_bookmark(bookmark_id, {"status": "failed"})
+        await event_bus.publish(BOOKMARK_FAILED, bookmark_id, failed, str(e))
+
+async def store_rendered_card(bookmark: dict):
+    """保存渲染好的卡片，之後發送時不必重新渲染（需啟用 FLEX_STORE_RENDERED_CARD）"""
+    if not settings.flex_store_rendered_card:
+        return
+    bubble = flex_renderer.render_bubble(bookmark, bookmark.get("user_id"))
+    await db_client.save_bookmark_card(bookmark["id"], bubble)
+
+async def update_semantic_index(bookmark: dict):
+    """寫入語意索引（需啟用 SEMANTIC_SEARCH_ENABLED）"""
+    if settings.semantic_search_enabled:
+        await asyncio.to_thread(semantic_index.index_bookmark, bookmark)
+
+async def ensure_semantic_index(user_id: str):
+    """用戶既有書籤尚未補建語意索引時，以資料庫中的書籤建立（不含內文）"""
+    if await asyncio.to_thread(semantic_index.is_backfilled, user_id):
+        return
+    
+    offset, page_size, indexed = 0, 500, 0
+    while True:
+        bookmarks = await db_client.get_bookmarks_by_user(user_id, page_size, offset)
+        indexed += await asyncio.to_thread(semantic_index.index_bookmarks, user_id, bookmarks)
+        if len(bookmarks) < page_size:
+            break
+        offset += page_size
+    await asyncio.to_thread(semantic_index.mark_backfilled, user_id)
+    logger.info(f"🧭 已建立用戶語意索引: {user_id} ({indexed} 筆)")
+
+async def load_scored_bookmarks(user_id: str, matches: list) -> list:
+    """依相似度順序取回書籤並附上分數；資料庫中已不存在的書籤從索引移除"""
+    rows = {row["id"]: row for row in await db_client.get_bookmarks_by_ids(user_id, [bookmark_id for bookmark_id, _ in matches])}
+    results = []
+    for bookmark_id, score in matches:
+        row = rows.get(bookmark_id)
+        if row is None:
+            await asyncio.to_thread(semantic_index.remove_bookmark, user_id, bookmark_id)
+            continue
+        results.append({**row, "score": round(score, 4)})
+    return results
+
+async def run_bookmark_job(job: dict):
+    """工作佇列處理函數：處理一個書籤工作（拋出例外時由工作佇列重試）"""
+    await process_bookmark_content(
+        job["bookmark_id"],
+        job["url"],
+        job["payload"].get("refresh_analysis", False),
+        final_attempt=job["attempts"] >= job["max_attempts"]
+    )
+
+async def abandon_bookmark_job(job: dict):
+    """工作因 worker 崩潰而用盡嘗試次數：將書籤標記為失敗"""
+    failed = await db_client.update_bookmark(job["bookmark_id"], {"status": "failed"})
+    await event_bus.publish(BOOKMARK_FAILED, job["bookmark_id"], failed, "處理時服務異常中斷")
 
 # ==================== API 路由 ====================
 
@@ -196,10 +358,7 @@ async def crawl_url(request: CrawlUrlRequest):
 # ==================== 書籤相關 API ====================
 
 @app.post("/api/bookmarks", response_model=BookmarkResponse)
-async def create_bookmark(
-    request: CreateBookmarkRequest,
-    background_tasks: BackgroundTasks
-):
+async def create_bookmark(request: CreateBookmarkRequest):
     """建立新書籤"""
     try:
         # 建立初始書籤記錄
@@ -221,12 +380,8 @@ async def create_bookmark(
                 detail="建立書籤失敗"
             )
         
-        # 啟動背景任務處理內容
-        background_tasks.add_task(
-            process_bookmark_content,
-            result["id"],
-            str(request.url)
-        )
+        # 排入工作佇列處理內容
+        await job_queue.enqueue(result["id"], str(request.url))
         
         return BookmarkResponse(**result)
         
@@ -254,6 +409,30 @@ async def get_bookmark(bookmark_id: str):
         logger.error(f"❌ 獲取書籤異常: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/bookmarks/{bookmark_id}/reanalyze", response_model=BookmarkResponse)
+async def reanalyze_bookmark(bookmark_id: str):
+    """重新分析書籤內容（略過 AI 分析快取）"""
+    try:
+        bookmark = await db_client.get_bookmark(bookmark_id)
+        
+        if not bookmark:
+            raise HTTPException(
+                status_code=404,
+                detail="書籤不存在"
+            )
+        
+        result = await db_client.update_bookmark(bookmark_id, {"status": "processing"})
+        
+        await job_queue.enqueue(bookmark_id, bookmark["url"], refresh_analysis=True)
+        
+        return BookmarkResponse(**(result or bookmark))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ 重新分析書籤異常: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ==================== LIFF API 端點 ====================
 
 @app.patch("/api/bookmarks/{bookmark_id}", response_model=BookmarkResponse)
@@ -268,6 +447,9 @@ async def update_bookmark(bookmark_id: str, request: dict):
                 detail="書籤不存在或更新失敗"
             )
         
+        await store_rendered_card(result)
+        await update_semantic_index(result)
+        
         return BookmarkResponse(**result)
         
     except HTTPException:
@@ -389,18 +571,34 @@ async def delete_folder(folder_id: str):
 
 # ==================== 書籤歷史管理 API ====================
 
-@app.get("/api/v1/bookmarks/history")
+@app.get("/api/v1/bookmarks/history", response_model=BookmarkHistoryResponse)
 async def get_bookmark_history(
     user_id: str,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     sort_by: str = "created_at",
     order: str = "desc"
 ):
-    """獲取用戶書籤歷史（分頁）"""
+    """
+    獲取用戶書籤歷史（分頁）
+    
+    建議使用 cursor：傳入上一頁回傳的 pagination.next_cursor。
+    page 僅為相容舊版前端保留，第 2 頁以後會退回 offset 查詢。
+    """
     try:
-        offset = (page - 1) * limit
-        bookmarks = await db_client.get_bookmarks_by_user(user_id, limit, offset)
+        use_keyset = bool(cursor) or page <= 1
+        if use_keyset:
+            try:
+                result = await db_client.get_bookmarks_page(user_id, limit, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            bookmarks = result["bookmarks"]
+            next_cursor = result["next_cursor"]
+        else:
+            offset = (page - 1) * limit
+            bookmarks = await db_client.get_bookmarks_by_user(user_id, limit, offset)
+            next_cursor = encode_cursor(bookmarks[-1]) if len(bookmarks) == limit else None
         
         # 獲取總數用於分頁計算
         stats = await db_client.get_bookmark_stats(user_id)
@@ -414,27 +612,34 @@ async def get_bookmark_history(
                 "total_pages": total_pages,
                 "total_items": total,
                 "items_per_page": limit,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
+                "has_next": next_cursor is not None if use_keyset else page < total_pages,
+                "has_prev": page > 1,
+                "next_cursor": next_cursor
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ 獲取書籤歷史失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/v1/bookmarks/search")
-async def search_bookmarks(user_id: str, q: str, limit: int = 20):
-    """搜索用戶書籤"""
+@app.get("/api/v1/bookmarks/search", response_model=BookmarkSearchResponse)
+async def search_bookmarks(user_id: str, q: str, limit: int = 20, page: int = 1):
+    """搜索用戶書籤（依相關度排序，支援分頁）"""
     try:
         if not q or len(q.strip()) < 2:
             raise HTTPException(status_code=400, detail="搜索關鍵字至少需要2個字符")
         
-        bookmarks = await db_client.search_bookmarks(user_id, q.strip(), limit)
+        page = max(1, page)
+        # 多取一筆用來判斷是否還有下一頁
+        bookmarks = await db_client.search_bookmarks(user_id, q.strip(), limit + 1, (page - 1) * limit)
         
         return {
             "query": q,
-            "results": bookmarks,
-            "count": len(bookmarks)
+            "results": bookmarks[:limit],
+            "count": len(bookmarks[:limit]),
+            "page": page,
+            "has_next": len(bookmarks) > limit
         }
     except HTTPException:
         raise
@@ -442,7 +647,46 @@ async def search_bookmarks(user_id: str, q: str, limit: int = 20):
         logger.error(f"❌ 搜索書籤失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/v1/bookmarks/stats")
+@app.get("/api/v1/bookmarks/semantic-search", response_model=SemanticSearchResponse)
+async def semantic_search_bookmarks(user_id: str, q: str, limit: int = 20):
+    """語意搜尋用戶書籤（依內容相似度排序，不需要關鍵字完全相符）"""
+    try:
+        if not q or not q.strip():
+            raise HTTPException(status_code=400, detail="查詢文字不能為空")
+        
+        await ensure_semantic_index(user_id)
+        matches = await asyncio.to_thread(semantic_index.search, user_id, q.strip(), max(1, min(limit, 100)))
+        results = await load_scored_bookmarks(user_id, matches)
+        
+        return {"query": q, "results": results, "count": len(results)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ 語意搜尋失敗: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/bookmarks/{bookmark_id}/related", response_model=RelatedBookmarksResponse)
+async def get_related_bookmarks(bookmark_id: str, user_id: str, limit: int = 5):
+    """取得與指定書籤內容相近的其他書籤"""
+    try:
+        await ensure_semantic_index(user_id)
+        matches = await asyncio.to_thread(semantic_index.related, user_id, bookmark_id, max(1, min(limit, 50)))
+        if not matches:
+            # 書籤尚未被索引時（例如仍在處理中）即時計算向量
+            bookmark = await db_client.get_bookmark(bookmark_id)
+            if not bookmark or bookmark.get("user_id") != user_id:
+                raise HTTPException(status_code=404, detail="書籤不存在")
+            matches = await asyncio.to_thread(semantic_index.related, user_id, bookmark_id, max(1, min(limit, 50)), bookmark)
+        
+        results = await load_scored_bookmarks(user_id, matches)
+        return {"bookmark_id": bookmark_id, "results": results, "count": len(results)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ 獲取相關書籤失敗: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/bookmarks/stats", response_model=BookmarkStatsResponse)
 async def get_bookmark_stats(user_id: str):
     """獲取用戶書籤統計資訊"""
     try:
@@ -465,6 +709,25 @@ async def get_bookmark_stats(user_id: str):
         logger.error(f"❌ 獲取書籤統計失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/system/metrics", response_model=dict)
+async def get_system_metrics():
+    """系統指標：工作佇列深度與延遲、爬取快取、瀏覽器池、AI 快取、路由、速率限制與語意索引"""
+    ai_backend = getattr(ai_service, "service", ai_service)
+    return {
+        "job_queue": await job_queue.metrics(),
+        "crawl_cache": crawler_service.cache.stats(),
+        "browser_pool": crawler_service.browser_pool.stats(),
+        "ai_cache": ai_service.stats() if isinstance(ai_service, CachedAIService) else None,
+        "ai_router": ai_backend.stats() if isinstance(ai_backend, AIRouter) else None,
+        "ai_rate_limiter": llm_rate_limiter.stats(),
+        "semantic_index": semantic_index.stats(),
+        "events": event_bus.stats(),
+        "webhook": webhook_queue.metrics(),
+        "line_api": line_bot_service.line_client.stats() if line_bot_service.enabled else None,
+        "line_outbound": line_bot_service.push_scheduler.stats() if line_bot_service.enabled else None,
+        "line_tasks": line_bot_service.executor.stats() if line_bot_service.enabled else None
+    }
+
 # ==================== 內部 API（由 LINE Bot 服務調用）====================
 # 其他 CRUD 操作通過內部函數處理，減少公開 API 端點
 
@@ -488,16 +751,15 @@ async def send_updated_card(request: dict):
             raise HTTPException(status_code=404, detail="書籤不存在")
         
         # 發送更新後的卡片
-        from line_bot_service import line_bot_service
         if line_bot_service.enabled:
-            flex_card = line_bot_service.create_bookmark_flex_card(bookmark, user_id)
-            flex_message = FlexSendMessage(
-                alt_text=f"📋 {bookmark.get('title', '更新後的書籤')}",
-                contents=flex_card
-            )
+            # 已保存的卡片以書籤擁有者渲染，只有同一用戶時才能直接沿用
+            stored_card = bookmark.get("card_json") if bookmark.get("user_id") == user_id else None
+            bubble = stored_card.encode("utf-8") if settings.flex_store_rendered_card and stored_card else None
+            flex_message = flex_renderer.render_message(bookmark, user_id, bubble=bubble)
             
-            # 發送 push message
-            line_bot_service.line_bot_api.push_message(user_id, flex_message)
+            # 經由發送排程器推播（與同一用戶的其他訊息合併）
+            if not await line_bot_service.push_scheduler.send(user_id, flex_message):
+                raise HTTPException(status_code=502, detail="卡片發送失敗")
             
             return {"status": "success", "message": "卡片已發送"}
         else:
@@ -533,10 +795,14 @@ async def line_webhook(request: Request):
                 logger.info("✅ 無簽名的驗證請求，直接返回成功")
                 return JSONResponse(status_code=200, content={"status": "ok"})
             
-            # 使用 handler 處理事件
-            line_bot_service.handler.handle(body.decode('utf-8'), signature)
+            # 驗證簽名並解析事件，排入佇列後立即回應，避免處理過慢導致 LINE 逾時重送
+            events = line_bot_service.parser.parse(body.decode('utf-8'), signature)
+            
+            if not await webhook_queue.submit(events):
+                # 佇列已滿：回應 503 讓 LINE 稍後重送（重送事件會依 webhookEventId 去重）
+                return JSONResponse(status_code=503, content={"status": "overloaded"})
             
-            logger.info("✅ LINE webhook 處理成功")
+            logger.info(f"✅ LINE webhook 已排入 {len(events)} 個事件")
             return JSONResponse(status_code=200, content={"status": "ok"})
             
         except InvalidSignatureError as e:
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 指標工具
+各模組共用的延遲統計（不依賴設定、不產生副作用，可安全匯入）
+"""
+
+from collections import deque
+from typing import Optional, Dict, Any
+
+class LatencyWindow:
+    """最近 N 筆延遲的滑動視窗"""
+
+    def __init__(self, size: int = 500):
+        self._values = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._values.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """取得百分位數（秒），沒有資料時回傳 None"""
+        if not self._values:
+            return None
+        values = sorted(self._values)
+        return values[round((len(values) - 1) * q)]
+
+    def summary(self) -> Dict[str, Any]:
+        if not self._values:
+            return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        values = sorted(self._values)
+        return {
+            "count": len(values),
+            "p50_ms": round(values[len(values) // 2] * 1000, 1),
+            "p95_ms": round(values[round((len(values) - 1) * 0.95)] * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1)
+        }
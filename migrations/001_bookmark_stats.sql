@@ -0,0 +1,28 @@
+-- BriefCard - 書籤統計彙總查詢
+-- 以單一查詢回傳 total / today / this_week / this_month，取代四次 count="exact" 查詢
+-- 在 Supabase SQL Editor 執行
+
+-- 依用戶 + 建立時間的複合索引，讓統計與列表查詢都能走索引
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user_created_at
+  ON bookmarks (user_id, created_at DESC);
+
+CREATE OR REPLACE FUNCTION get_bookmark_stats(p_user_id TEXT)
+RETURNS TABLE (
+  total BIGINT,
+  today BIGINT,
+  this_week BIGINT,
+  this_month BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    count(*) AS total,
+    count(*) FILTER (WHERE created_at >= date_trunc('day', timezone('utc', now())) AT TIME ZONE 'utc') AS today,
+    count(*) FILTER (WHERE created_at >= now() - interval '7 days') AS this_week,
+    count(*) FILTER (WHERE created_at >= now() - interval '30 days') AS this_month
+  FROM bookmarks
+  WHERE user_id = p_user_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_bookmark_stats(TEXT) TO anon, authenticated;
@@ -0,0 +1,8 @@
+-- BriefCard - 書籤歷史 keyset 分頁索引
+-- 分頁以 (created_at, id) 排序，索引需包含 id 作為同時間的次序鍵
+
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user_created_id
+  ON bookmarks (user_id, created_at DESC, id DESC);
+
+-- 已被上面的索引涵蓋
+DROP INDEX IF EXISTS idx_bookmarks_user_created_at;
@@ -0,0 +1,102 @@
+-- BriefCard - 書籤全文搜尋
+-- 以 tsvector（含中日韓文字 bigram 切分）+ pg_trgm 取代 title/url/notes 的 ilike 全表掃描
+-- 在 Supabase SQL Editor 執行
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 中日韓文字沒有空白分詞，將連續的 CJK 字元切成重疊 bigram（「全文搜尋」→「全文 文搜 搜尋」），
+-- 其餘文字保持原樣交給 'simple' 設定處理
+CREATE OR REPLACE FUNCTION cjk_bigrams(input TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  cjk_pattern CONSTANT TEXT := '[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+';
+  run TEXT;
+  grams TEXT := '';
+  i INT;
+BEGIN
+  IF input IS NULL OR input = '' THEN
+    RETURN '';
+  END IF;
+
+  FOR run IN SELECT m[1] FROM regexp_matches(input, cjk_pattern, 'g') AS m LOOP
+    IF char_length(run) = 1 THEN
+      grams := grams || ' ' || run;
+    ELSE
+      FOR i IN 1 .. char_length(run) - 1 LOOP
+        grams := grams || ' ' || substr(run, i, 2);
+      END LOOP;
+    END IF;
+  END LOOP;
+
+  RETURN regexp_replace(input, cjk_pattern, ' ', 'g') || grams;
+END;
+$$;
+
+-- 搜尋向量：標題與標籤權重 A、摘要與筆記 B、內文 C（內文只取前 20000 字）
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION bookmarks_search_vector_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.search_vector :=
+    setweight(to_tsvector('simple', cjk_bigrams(coalesce(NEW.title, ''))), 'A') ||
+    setweight(to_tsvector('simple', cjk_bigrams(coalesce(array_to_string(NEW.tags, ' '), ''))), 'A') ||
+    setweight(to_tsvector('simple', cjk_bigrams(coalesce(NEW.summary, '') || ' ' || coalesce(NEW.notes, ''))), 'B') ||
+    setweight(to_tsvector('simple', cjk_bigrams(left(coalesce(NEW.content_markdown, ''), 20000))), 'C');
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_bookmarks_search_vector ON bookmarks;
+CREATE TRIGGER trg_bookmarks_search_vector
+  BEFORE INSERT OR UPDATE OF title, tags, summary, notes, content_markdown ON bookmarks
+  FOR EACH ROW EXECUTE FUNCTION bookmarks_search_vector_update();
+
+-- 回填既有資料（觸發器會重新計算 search_vector）
+UPDATE bookmarks SET title = title WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_bookmarks_search_vector
+  ON bookmarks USING GIN (search_vector);
+
+-- 標題與網址的 trigram 索引：處理過短或無法切詞的查詢（例如網域、英數代碼）
+CREATE INDEX IF NOT EXISTS idx_bookmarks_title_trgm
+  ON bookmarks USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_url_trgm
+  ON bookmarks USING GIN (url gin_trgm_ops);
+
+-- 依相關度排序的搜尋，回傳 bookmarks 資料列，呼叫端可用 select 指定欄位
+CREATE OR REPLACE FUNCTION search_bookmarks(
+  p_user_id TEXT,
+  p_query TEXT,
+  p_limit INT DEFAULT 20,
+  p_offset INT DEFAULT 0
+)
+RETURNS SETOF bookmarks
+LANGUAGE sql
+STABLE
+AS $$
+  WITH q AS (
+    SELECT plainto_tsquery('simple', cjk_bigrams(p_query)) AS tsq,
+           '%' || p_query || '%' AS pattern
+  )
+  SELECT b.*
+  FROM bookmarks b, q
+  WHERE b.user_id = p_user_id
+    AND (
+      b.search_vector @@ q.tsq
+      OR b.title ILIKE q.pattern
+      OR b.url ILIKE q.pattern
+    )
+  ORDER BY
+    ts_rank_cd(b.search_vector, q.tsq, 32) + similarity(coalesce(b.title, ''), p_query) DESC,
+    b.created_at DESC
+  LIMIT p_limit
+  OFFSET p_offset;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_bookmarks(TEXT, TEXT, INT, INT) TO anon, authenticated;
@@ -0,0 +1,5 @@
+-- BriefCard - 兩階段卡片
+-- 第一階段先保存網頁中繼資料（含網站名稱），狀態為 metadata_ready，AI 分析完成後才轉為 completed
+-- 在 Supabase SQL Editor 執行
+
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS site_name TEXT;
@@ -0,0 +1,6 @@
+-- BriefCard - 預先渲染的 Flex 卡片
+-- 書籤處理完成或編輯後保存渲染好的 bubble JSON，/api/send-updated-card 只需讀取即可發送
+-- 執行後設定 FLEX_STORE_RENDERED_CARD=true 啟用
+-- 在 Supabase SQL Editor 執行
+
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS card_json TEXT;
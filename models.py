@@ -14,6 +14,7 @@ from enum import Enum
 class BookmarkStatus(str, Enum):
     """書籤狀態"""
     PROCESSING = "processing"  # 處理中
+    METADATA_READY = "metadata_ready"  # 網頁資訊已就緒，AI 分析中
     COMPLETED = "completed"    # 完成
     FAILED = "failed"         # 失敗
 
@@ -99,8 +100,8 @@ class AIAnalysisResult(BaseModel):
     keywords: List[str] = Field(default_factory=list, description="關鍵詞列表")
     category: str = Field("其他", description="內容分類")
 
-class BookmarkResponse(BaseModel):
-    """書籤回應"""
+class BookmarkCardResponse(BaseModel):
+    """書籤卡片回應（列表用，不含 Markdown 內容）"""
     id: str = Field(..., description="書籤 ID")
     user_id: Optional[str] = Field(None, description="用戶 ID")
     folder_id: Optional[str] = Field(None, description="資料夾 ID")
@@ -108,7 +109,7 @@ class BookmarkResponse(BaseModel):
     title: Optional[str] = Field("", description="標題")
     description: Optional[str] = Field("", description="描述")
     image_url: Optional[str] = Field("", description="圖片 URL")
-    content_markdown: Optional[str] = Field(None, description="Markdown 內容")
+    site_name: Optional[str] = Field("", description="網站名稱")
     summary: Optional[str] = Field(None, description="AI 摘要")
     notes: Optional[str] = Field(None, description="個人筆記")
     tags: Optional[List[str]] = Field(default_factory=list, description="標籤")
@@ -123,6 +124,10 @@ class BookmarkResponse(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+class BookmarkResponse(BookmarkCardResponse):
+    """書籤回應（詳情，含 Markdown 內容）"""
+    content_markdown: Optional[str] = Field(None, description="Markdown 內容")
+
 class FolderResponse(BaseModel):
     """資料夾回應"""
     id: str = Field(..., description="資料夾 ID")
@@ -163,11 +168,56 @@ class UpdateFolderRequest(BaseModel):
 
 class BookmarkListResponse(BaseModel):
     """書籤列表回應"""
-    bookmarks: List[BookmarkResponse] = Field(..., description="書籤列表")
+    bookmarks: List[BookmarkCardResponse] = Field(..., description="書籤列表")
     total: int = Field(..., description="總數量")
     page: int = Field(1, description="頁碼")
     page_size: int = Field(50, description="每頁數量")
 
+class PaginationInfo(BaseModel):
+    """分頁資訊"""
+    current_page: int = Field(1, description="目前頁碼")
+    total_pages: int = Field(0, description="總頁數")
+    total_items: int = Field(0, description="總數量")
+    items_per_page: int = Field(20, description="每頁數量")
+    has_next: bool = Field(False, description="是否有下一頁")
+    has_prev: bool = Field(False, description="是否有上一頁")
+    next_cursor: Optional[str] = Field(None, description="下一頁游標")
+
+class BookmarkHistoryResponse(BaseModel):
+    """書籤歷史回應"""
+    bookmarks: List[BookmarkCardResponse] = Field(..., description="書籤列表")
+    pagination: PaginationInfo = Field(..., description="分頁資訊")
+
+class BookmarkSearchResponse(BaseModel):
+    """書籤搜尋回應"""
+    query: str = Field(..., description="搜尋關鍵字")
+    results: List[BookmarkCardResponse] = Field(..., description="搜尋結果（依相關度排序）")
+    count: int = Field(..., description="本頁結果數量")
+    page: int = Field(1, description="頁碼")
+    has_next: bool = Field(False, description="是否有下一頁")
+
+class ScoredBookmarkResponse(BookmarkCardResponse):
+    """附相似度的書籤卡片"""
+    score: float = Field(..., description="語意相似度（cosine，-1～1）")
+
+class SemanticSearchResponse(BaseModel):
+    """語意搜尋回應"""
+    query: str = Field(..., description="查詢文字")
+    results: List[ScoredBookmarkResponse] = Field(..., description="搜尋結果（依相似度排序）")
+    count: int = Field(..., description="結果數量")
+
+class RelatedBookmarksResponse(BaseModel):
+    """相關書籤回應"""
+    bookmark_id: str = Field(..., description="書籤 ID")
+    results: List[ScoredBookmarkResponse] = Field(..., description="相關書籤（依相似度排序）")
+    count: int = Field(..., description="結果數量")
+
+class BookmarkStatsResponse(BaseModel):
+    """書籤統計回應"""
+    statistics: Dict[str, int] = Field(..., description="統計數據")
+    recent_bookmarks: List[BookmarkCardResponse] = Field(..., description="最近的書籤")
+    summary: Dict[str, int] = Field(..., description="成長摘要")
+
 class FolderListResponse(BaseModel):
     """資料夾列表回應"""
     folders: List[FolderResponse] = Field(..., description="資料夾列表")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+BriefCard - LINE 訊息發送排程器
+所有回覆與推播經過同一個 token bucket；同一用戶短時間內的多則訊息合併成一次發送（最多 5 則），
+仍有效的 reply token 優先於付費推播，429 時整個頻道依 Retry-After 退避後重試（推播只在此重試，客戶端不重試）
+"""
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+from config import settings
+from line_client import AsyncLineClient, LineApiError
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGES_PER_REQUEST = 5  # LINE 單次 reply / push 的訊息上限
+
+@dataclass
+class _Outbox:
+    """單一用戶待發送的訊息（每個 send 呼叫為一組，發送時不拆開）"""
+    units: List[Tuple[List[Any], asyncio.Future]] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def message_count(self) -> int:
+        return sum(len(messages) for messages, _ in self.units)
+
+class PushScheduler:
+    """LINE 訊息發送排程器（每個頻道一個）"""
+
+    def __init__(self, client: AsyncLineClient, rate: float = 200, burst: int = 200,
+                 coalesce_window: float = 0.3, reply_token_ttl: float = 50,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 monthly_push_quota: int = 0):
+        self.client = client
+        self.bucket = TokenBucket(rate, burst)
+        self.coalesce_window = coalesce_window
+        self.reply_token_ttl = reply_token_ttl
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.monthly_push_quota = monthly_push_quota
+
+        self._outboxes: Dict[str, _Outbox] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._reply_tokens: Dict[str, Tuple[str, float]] = {}
+        self._month = datetime.utcnow().strftime("%Y-%m")
+
+        self.counters = {
+            "replies": 0, "pushes": 0, "messages": 0, "coalesced": 0,
+            "reply_token_expired": 0, "rate_limited": 0, "failed": 0, "quota_skipped": 0
+        }
+        self.month_pushes = 0
+
+    def offer_reply_token(self, to: str, reply_token: Optional[str]):
+        """登記用戶尚未使用的 reply token，之後發給該用戶的訊息優先以 reply 送出"""
+        if reply_token:
+            self._reply_tokens[to] = (reply_token, time.monotonic() + self.reply_token_ttl)
+
+    def _take_reply_token(self, to: str) -> Optional[str]:
+        reply_token, expires_at = self._reply_tokens.pop(to, (None, 0.0))
+        if reply_token and expires_at > time.monotonic():
+            return reply_token
+        return None
+
+    def send(self, to: str, messages: Union[Any, List[Any]],
+             reply_token: Optional[str] = None) -> asyncio.Future:
+        """
+        排入要發給用戶的訊息
+
+        Returns:
+            發送完成後的結果："reply"、"push"，失敗或被略過時為 None（呼叫端可選擇 await）
+        """
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        self.offer_reply_token(to, reply_token)
+
+        outbox = self._outboxes.setdefault(to, _Outbox())
+        future = asyncio.get_running_loop().create_future()
+        for start in range(0, len(messages), MAX_MESSAGES_PER_REQUEST):
+            chunk = list(messages[start:start + MAX_MESSAGES_PER_REQUEST])
+            is_last = start + MAX_MESSAGES_PER_REQUEST >= len(messages)
+            outbox.units.append((chunk, future if is_last else asyncio.get_running_loop().create_future()))
+
+        if outbox.message_count() >= MAX_MESSAGES_PER_REQUEST:
+            outbox.full.set()
+        if to not in self._flush_tasks:
+            self._flush_tasks[to] = asyncio.create_task(self._flush_later(to), name=f"line-outbox:{to}")
+        return future
+
+    async def reply(self, reply_token: str, messages: Union[Any, List[Any]]) -> Dict[str, Any]:
+        """立即以 reply token 回覆（同樣受頻道速率限制並計入統計）"""
+        await self.bucket.acquire()
+        result = await self.client.reply_message(reply_token, messages)
+        self.counters["replies"] += 1
+        self.counters["messages"] += len(messages) if isinstance(messages, (list, tuple)) else 1
+        return result
+
+    async def _flush_later(self, to: str):
+        """等待合併視窗（或累積滿 5 則）後分批送出"""
+        outbox = self._outboxes[to]
+        try:
+            try:
+                await asyncio.wait_for(outbox.full.wait(), self.coalesce_window)
+            except asyncio.TimeoutError:
+                pass
+
+            while outbox.units:
+                batch = [outbox.units.pop(0)]
+                count = len(batch[0][0])
+                while outbox.units and count + len(outbox.units[0][0]) <= MAX_MESSAGES_PER_REQUEST:
+                    count += len(outbox.units[0][0])
+                    batch.append(outbox.units.pop(0))
+                outbox.full.clear()
+                await self._deliver(to, batch)
+        finally:
+            for _, future in outbox.units:
+                if not future.done():
+                    future.set_result(None)
+            self._outboxes.pop(to, None)
+            self._flush_tasks.pop(to, None)
+
+    async def _deliver(self, to: str, batch: List[Tuple[List[Any], asyncio.Future]]):
+        messages = [message for chunk, _ in batch for message in chunk]
+        self.counters["coalesced"] += len(batch) - 1
+
+        result = None
+        try:
+            result = await self._send_batch(to, messages)
+        except Exception as e:
+            self.counters["failed"] += 1
+            logger.error(f"❌ LINE 訊息發送失敗 ({to}): {e}")
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _send_batch(self, to: str, messages: List[Any]) -> Optional[str]:
+        # 優先使用仍有效的 reply token（免費）
+        reply_token = self._take_reply_token(to)
+        if reply_token:
+            try:
+                await self.reply(reply_token, messages)
+                return "reply"
+            except LineApiError as e:
+                if e.status_code != 400:
+                    raise
+                # reply token 已失效或已被使用，改為推播
+                self.counters["reply_token_expired"] += 1
+
+        if not self._within_quota():
+            self.counters["quota_skipped"] += 1
+            logger.warning(f"⚠️ 已達每月推播額度 {self.monthly_push_quota}，略過推播: {to}")
+            return None
+
+        # 同一個 retry key 讓重試不會重複送達；重試只在這一層進行，客戶端以 max_retries=0 呼叫
+        retry_key = str(uuid.uuid4())
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                await self.client.push_message(to, messages, retry_key=retry_key, max_retries=0)
+                break
+            except LineApiError as e:
+                # 0 為連線錯誤
+                retryable = e.status_code in (0, 429) or e.status_code >= 500
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after
+                if delay is None:
+                    delay = random.uniform(self.backoff_base, min(self.backoff_max, self.backoff_base * (2 ** (attempt + 1))))
+
+                if e.status_code == 429:
+                    self.counters["rate_limited"] += 1
+                    logger.warning(f"⏳ LINE 推播被限流，頻道暫停 {delay:.1f}s 後重試（第 {attempt + 1} 次）")
+                    self.bucket.pause(delay)
+                else:
+                    logger.warning(f"⏳ LINE 推播失敗（{e.status_code}），{delay:.1f}s 後重試（第 {attempt + 1} 次）")
+                    await asyncio.sleep(delay)
+
+        self.counters["pushes"] += 1
+        self.counters["messages"] += len(messages)
+        self.month_pushes += 1
+        return "push"
+
+    def _within_quota(self) -> bool:
+        month = datetime.utcnow().strftime("%Y-%m")
+        if month != self._month:
+            self._month = month
+            self.month_pushes = 0
+        return not self.monthly_push_quota or self.month_pushes < self.monthly_push_quota
+
+    async def stop(self, timeout: float = 10.0):
+        """立即送出所有待發送的訊息"""
+        for outbox in self._outboxes.values():
+            outbox.full.set()
+        if not self._flush_tasks:
+            return
+
+        done, pending = await asyncio.wait(set(self._flush_tasks.values()), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"⚠️ 已放棄 {len(pending)} 個用戶的待發送訊息")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "month": self._month,
+            "month_pushes": self.month_pushes,
+            "monthly_push_quota": self.monthly_push_quota,
+            "pending_users": len(self._outboxes),
+            "reply_tokens": len(self._reply_tokens)
+        }
+
+def create_push_scheduler(client: AsyncLineClient) -> PushScheduler:
+    """根據配置建立發送排程器"""
+    return PushScheduler(
+        client,
+        rate=settings.line_send_rate,
+        burst=settings.line_send_burst,
+        coalesce_window=settings.line_coalesce_window,
+        reply_token_ttl=settings.line_reply_token_ttl,
+        monthly_push_quota=settings.line_monthly_push_quota
+    )
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+BriefCard - LLM API 速率限制
+所有 AI 服務的 HTTP 呼叫經過依提供者與模型設定的 token bucket；
+429 時依 Retry-After（沒有時以隨機指數退避）暫停同一個 bucket 後重試，5xx 同樣退避重試，
+排隊與重試的總時間受截止時間限制，逾時即回傳 None 讓呼叫端改用其他方式
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+from config import settings
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """發送速率限制（token bucket）"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取得一個發送額度，不足時等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.blocked_until > now:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """收到 429 時暫停整個 bucket 的發送"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def parse_rate_limits(value: str) -> Dict[str, Tuple[float, int]]:
+    """
+    解析速率設定
+
+    格式為以逗號分隔的 "提供者=每秒請求數/突發量" 或 "提供者:模型=每秒請求數/突發量"，
+    例如 "openrouter=0.33/5,deepseek:deepseek-chat=5/10"
+    """
+    limits = {}
+    for item in (value or "").split(","):
+        key, _, spec = item.strip().rpartition("=")
+        rate, _, burst = spec.partition("/")
+        try:
+            limits[key.strip().lower()] = (float(rate), int(burst or 1))
+        except ValueError:
+            if item.strip():
+                logger.warning(f"⚠️ 忽略無效的速率設定: {item.strip()}")
+    return limits
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """從 Retry-After（秒數或 HTTP 日期）或 X-RateLimit-Reset（毫秒時間戳）取得需等待的秒數"""
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+
+    reset = response.headers.get("x-ratelimit-reset")
+    if reset and reset.isdigit():
+        return max(0.0, int(reset) / 1000 - time.time())
+    return None
+
+class _LimiterStats:
+    """單一提供者 / 模型的速率限制統計"""
+
+    def __init__(self):
+        self.counters = {
+            "requests": 0, "rate_limited": 0, "server_errors": 0,
+            "retries": 0, "deadline_exceeded": 0
+        }
+        self.queue_wait = LatencyWindow()
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.counters, "queue_wait": self.queue_wait.summary()}
+
+class LLMRateLimiter:
+    """LLM API 呼叫的速率限制與重試（所有 AI 服務共用）"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate: float = 2.0, default_burst: int = 5,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 deadline: float = 40.0):
+        self.limits = limits or {}
+        self.default_limit = (default_rate, default_burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, _LimiterStats] = {}
+
+    def _key(self, provider: str, model: str) -> str:
+        """對應的設定鍵：優先使用提供者 + 模型的設定，其次是提供者，否則使用預設值"""
+        model_key = f"{provider}:{model}".lower()
+        if model_key in self.limits:
+            return model_key
+        return provider.lower()
+
+    def bucket(self, provider: str, model: str = "") -> TokenBucket:
+        key = self._key(provider, model)
+        if key not in self._buckets:
+            rate, burst = self.limits.get(key, self.default_limit)
+            self._buckets[key] = TokenBucket(rate, burst)
+            self._stats[key] = _LimiterStats()
+        return self._buckets[key]
+
+    def _backoff(self, attempt: int) -> float:
+        """隨機指數退避（full jitter）"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def post(self, client: httpx.AsyncClient, provider: str, model: str, url: str,
+                   json: Dict[str, Any], deadline: Optional[float] = None,
+                   stream: bool = False) -> Optional[httpx.Response]:
+        """
+        受速率限制的 POST 請求
+
+        Args:
+            provider: 提供者名稱（決定使用的 bucket）
+            model: 模型名稱
+            deadline: 排隊與重試的總秒數上限，預設使用 AI_QUEUE_DEADLINE
+            stream: 不預先讀取成功回應的內容（呼叫端讀取後需 aclose）
+
+        Returns:
+            最後一次的回應（可能仍為 429 / 5xx），超過截止時間時回傳 None
+        """
+        bucket = self.bucket(provider, model)
+        stats = self._stats[self._key(provider, model)]
+        expires_at = time.monotonic() + (deadline or self.deadline)
+
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            try:
+                await asyncio.wait_for(bucket.acquire(), max(0.0, expires_at - queued_at))
+            except asyncio.TimeoutError:
+                stats.counters["deadline_exceeded"] += 1
+                logger.warning(f"⏳ {provider} 請求排隊超過截止時間，放棄")
+                return None
+            stats.queue_wait.add(time.monotonic() - queued_at)
+            stats.counters["requests"] += 1
+
+            response = await client.send(client.build_request("POST", url, json=json), stream=stream)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if stream:
+                await response.aread()
+
+            if response.status_code == 429:
+                stats.counters["rate_limited"] += 1
+                delay = retry_after_seconds(response)
+                delay = self._backoff(attempt + 1) if delay is None else delay
+                # 同一個 bucket 的其他請求也一起暫停
+                bucket.pause(delay)
+            else:
+                stats.counters["server_errors"] += 1
+                delay = self._backoff(attempt + 1)
+
+            if attempt >= self.max_retries or time.monotonic() + delay >= expires_at:
+                return response
+
+            stats.counters["retries"] += 1
+            logger.warning(f"⏳ {provider} 回應 {response.status_code}，{delay:.1f}s 後重試（第 {attempt + 1} 次）")
+            if response.status_code != 429:
+                await asyncio.sleep(delay)
+
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: stats.summary() for key, stats in self._stats.items()}
+
+def create_llm_rate_limiter() -> LLMRateLimiter:
+    """根據配置建立 LLM 速率限制器"""
+    return LLMRateLimiter(
+        parse_rate_limits(settings.ai_rate_limits),
+        default_rate=settings.ai_rate_default_rate,
+        default_burst=settings.ai_rate_default_burst,
+        max_retries=settings.ai_retry_max,
+        backoff_base=settings.ai_retry_backoff_base,
+        backoff_max=settings.ai_retry_backoff_max,
+        deadline=settings.ai_queue_deadline
+    )
+
+# 建立全域速率限制器實例
+llm_rate_limiter = create_llm_rate_limiter()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 書籤語意索引
+以本地編碼器（預設為不需網路的 hashing vectorizer）將書籤轉成向量，
+每個用戶一個分片，以 float16 的 NumPy memmap 存在磁碟；搜尋時以常用分片的 float32 快取做矩陣向量乘法取 top-k
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable
+
+import numpy as np
+
+from config import settings
+from metrics import LatencyWindow
+from local_ai_service import tokenize
+
+logger = logging.getLogger(__name__)
+
+HAN_CHAR_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+HAN_UNIGRAM_WEIGHT = 0.3  # 單字權重（讓一兩個字的查詢也有向量，但不蓋過詞組）
+INITIAL_CAPACITY = 256
+
+class HashingEncoder:
+    """
+    Hashing vectorizer 編碼器
+
+    CJK n-gram 與英文詞經 crc32 雜湊到固定維度（以雜湊的最高位決定正負號以抵銷碰撞），
+    詞頻取對數後做 L2 正規化
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 256, max_chars: int = 4000):
+        self.dim = dim
+        self.max_chars = max_chars
+
+    def _features(self, text: str) -> Counter:
+        text = text[:self.max_chars]
+        counts = Counter(tokenize(text))
+        for char, count in Counter(HAN_CHAR_PATTERN.findall(text)).items():
+            counts[char] = count * HAN_UNIGRAM_WEIGHT
+        return counts
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in self._features(text or "").items():
+                h = zlib.crc32(token.encode("utf-8"))
+                weight = 1 + math.log(count) if count >= 1 else count
+                vectors[row, h % self.dim] += weight if h & 0x80000000 else -weight
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+# 可用的編碼器（名稱 → 以維度建立編碼器的函數），可用 register_encoder 加入其他本地模型
+ENCODERS: Dict[str, Callable[[int], Any]] = {"hashing": HashingEncoder}
+
+def register_encoder(name: str, factory: Callable[[int], Any]):
+    """註冊編碼器；編碼器需提供 name、dim 與 encode(texts) -> (n, dim) 的 L2 正規化 float32 陣列"""
+    ENCODERS[name] = factory
+
+def bookmark_text(bookmark: Dict[str, Any], content_chars: int = 2000) -> str:
+    """建立書籤的索引文字（標題重複一次以提高權重）"""
+    title = bookmark.get("title") or ""
+    parts = [
+        title, title,
+        bookmark.get("description") or "",
+        " ".join(bookmark.get("tags") or []),
+        bookmark.get("summary") or "",
+        bookmark.get("notes") or "",
+        (bookmark.get("content_markdown") or "")[:content_chars]
+    ]
+    return "\n".join(part for part in parts if part)
+
+class UserShard:
+    """
+    單一用戶的向量分片
+
+    vectors.npy 為 float16 memmap（容量不足時加倍），ids.txt 依列順序記錄書籤 ID（刪除的列為空行），
+    meta.json 記錄編碼器、維度與是否已由資料庫補齊既有書籤；搜尋使用載入時建立的 float32 副本
+    """
+
+    def __init__(self, path: str, encoder_name: str, dim: int):
+        self.path = path
+        self.encoder_name = encoder_name
+        self.dim = dim
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.memmap] = None
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.backfilled = False
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        meta_path = self._file("meta.json")
+        if not os.path.exists(meta_path):
+            return
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("encoder") != self.encoder_name or meta.get("dim") != self.dim:
+            logger.warning(f"⚠️ 語意索引分片的編碼器已變更，重建: {self.path}")
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+
+        self.backfilled = bool(meta.get("backfilled"))
+        if not os.path.exists(self._file("vectors.npy")):
+            return
+        with open(self._file("ids.txt"), "r", encoding="utf-8") as f:
+            self.ids = [line.rstrip("\n") or None for line in f]
+        self.rows = {bookmark_id: row for row, bookmark_id in enumerate(self.ids) if bookmark_id}
+        self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        self.matrix = np.empty((self.vectors.shape[0], self.dim), dtype=np.float32)
+        self.matrix[:self.count] = self.vectors[:self.count]
+
+    def _ensure_capacity(self, needed: int):
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(INITIAL_CAPACITY, capacity * 2, needed)
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = self._file("vectors.npy.tmp")
+        vectors = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.float16, shape=(new_capacity, self.dim))
+        if self.vectors is not None:
+            vectors[:self.count] = self.vectors[:self.count]
+        vectors.flush()
+        del vectors
+        os.replace(temp_path, self._file("vectors.npy"))
+        self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        matrix[:self.count] = self.matrix[:self.count]
+        self.matrix = matrix
+
+        if not os.path.exists(self._file("meta.json")):
+            self._write_meta()
+
+    def _write_meta(self):
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = self._file("meta.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"encoder": self.encoder_name, "dim": self.dim, "backfilled": self.backfilled}, f)
+        os.replace(temp_path, self._file("meta.json"))
+
+    def mark_backfilled(self):
+        """記錄既有書籤已全部寫入（之後不再從資料庫補建）"""
+        self.backfilled = True
+        self._write_meta()
+
+    def upsert(self, bookmark_ids: List[str], vectors: np.ndarray):
+        """寫入或更新多筆向量"""
+        new_ids = [bookmark_id for bookmark_id in dict.fromkeys(bookmark_ids) if bookmark_id not in self.rows]
+        self._ensure_capacity(self.count + len(new_ids))
+        for bookmark_id in new_ids:
+            self.rows[bookmark_id] = len(self.ids)
+            self.ids.append(bookmark_id)
+
+        rows = [self.rows[bookmark_id] for bookmark_id in bookmark_ids]
+        self.vectors[rows] = vectors
+        self.matrix[rows] = self.vectors[rows]
+        self.vectors.flush()
+
+        if new_ids:
+            with open(self._file("ids.txt"), "a", encoding="utf-8") as f:
+                f.write("".join(f"{bookmark_id}\n" for bookmark_id in new_ids))
+
+    def remove(self, bookmark_id: str) -> bool:
+        row = self.rows.pop(bookmark_id, None)
+        if row is None:
+            return False
+        self.ids[row] = None
+        self.vectors[row] = 0
+        self.matrix[row] = 0
+        self.vectors.flush()
+        with open(self._file("ids.txt"), "w", encoding="utf-8") as f:
+            f.write("".join(f"{bookmark_id or ''}\n" for bookmark_id in self.ids))
+        return True
+
+    def vector(self, bookmark_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(bookmark_id)
+        return None if row is None else self.matrix[row]
+
+    def search(self, query: np.ndarray, k: int, min_score: float = 0.0,
+               exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """以 cosine 相似度（向量皆已正規化，即內積）取前 k 筆"""
+        if not self.rows or k <= 0:
+            return []
+
+        scores = self.matrix[:self.count] @ query
+        exclude = set(exclude)
+        take = min(self.count, k + len(exclude))
+        top = np.argpartition(-scores, take - 1)[:take] if take < self.count else np.arange(self.count)
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for row in top:
+            bookmark_id = self.ids[row]
+            score = float(scores[row])
+            if score < min_score:
+                break
+            if bookmark_id and bookmark_id not in exclude:
+                results.append((bookmark_id, score))
+                if len(results) >= k:
+                    break
+        return results
+
+class SemanticIndex:
+    """書籤語意索引（每個用戶一個分片，常用分片保留在記憶體）"""
+
+    def __init__(self, root: str = "data/semantic", encoder_name: str = "hashing", dim: int = 256,
+                 cache_bytes: int = 256 * 1024 * 1024, content_chars: int = 2000, min_score: float = 0.05):
+        if encoder_name not in ENCODERS:
+            logger.warning(f"⚠️ 不支援的語意編碼器 {encoder_name}，改用 hashing")
+            encoder_name = "hashing"
+        self.encoder = ENCODERS[encoder_name](dim)
+        self.root = root
+        self.cache_bytes = cache_bytes
+        self.content_chars = content_chars
+        self.min_score = min_score
+
+        self._shards: "OrderedDict[str, UserShard]" = OrderedDict()
+        # 分片的讀寫在執行緒中進行：_lock 保護分片快取，每個用戶另有一把鎖避免同時寫入同一分片
+        self._lock = threading.Lock()
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self.latency = LatencyWindow()
+        self.counters = {"indexed": 0, "removed": 0, "searches": 0, "shard_loads": 0, "shard_evictions": 0}
+
+    def _shard_path(self, user_id: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:20])
+
+    def user_lock(self, user_id: str) -> threading.Lock:
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def is_backfilled(self, user_id: str) -> bool:
+        """用戶既有書籤是否已補建索引（編碼器變更而被重建的分片視為尚未補建）"""
+        with self.user_lock(user_id):
+            return self.shard(user_id).backfilled
+
+    def mark_backfilled(self, user_id: str):
+        with self.user_lock(user_id):
+            self.shard(user_id).mark_backfilled()
+
+    def shard(self, user_id: str) -> UserShard:
+        """
+        取得用戶分片（必要時從磁碟載入，並淘汰最久未使用的分片）
+
+        呼叫端需持有該用戶的 user_lock
+        """
+        with self._lock:
+            shard = self._shards.get(user_id)
+            if shard is not None:
+                self._shards.move_to_end(user_id)
+                return shard
+
+        shard = UserShard(self._shard_path(user_id), self.encoder.name, self.encoder.dim)
+        with self._lock:
+            self._shards[user_id] = shard
+            self.counters["shard_loads"] += 1
+
+            cached = sum(loaded.nbytes for loaded in self._shards.values())
+            while cached > self.cache_bytes and len(self._shards) > 1:
+                _, evicted = self._shards.popitem(last=False)
+                cached -= evicted.nbytes
+                self.counters["shard_evictions"] += 1
+        return shard
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.encoder.encode(texts)
+
+    def index_bookmarks(self, user_id: str, bookmarks: List[Dict[str, Any]]) -> int:
+        """
+        將書籤寫入用戶分片（已存在者覆寫）
+
+        Returns:
+            寫入的筆數
+        """
+        bookmarks = [bookmark for bookmark in bookmarks if bookmark.get("id")]
+        if not user_id or not bookmarks:
+            return 0
+
+        vectors = self.encode([bookmark_text(bookmark, self.content_chars) for bookmark in bookmarks])
+        with self.user_lock(user_id):
+            self.shard(user_id).upsert([str(bookmark["id"]) for bookmark in bookmarks], vectors)
+        self.counters["indexed"] += len(bookmarks)
+        return len(bookmarks)
+
+    def index_bookmark(self, bookmark: Dict[str, Any]) -> bool:
+        """索引單一書籤（失敗時只記錄，不影響書籤處理流程）"""
+        try:
+            return bool(self.index_bookmarks(bookmark.get("user_id"), [bookmark]))
+        except Exception as e:
+            logger.error(f"❌ 語意索引寫入失敗: {bookmark.get('id')} - {e}")
+            return False
+
+    def remove_bookmark(self, user_id: str, bookmark_id: str) -> bool:
+        with self.user_lock(user_id):
+            removed = self.shard(user_id).remove(bookmark_id)
+        self.counters["removed"] += int(removed)
+        return removed
+
+    def search(self, user_id: str, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """以文字查詢用戶書籤，回傳 (書籤 ID, 相似度)"""
+        started = time.perf_counter()
+        self.counters["searches"] += 1
+        query_vector = self.encode([query])[0]
+        with self.user_lock(user_id):
+            results = self.shard(user_id).search(query_vector, k, self.min_score)
+        self.latency.add(time.perf_counter() - started)
+        return results
+
+    def related(self, user_id: str, bookmark_id: str, k: int = 5,
+                bookmark: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """
+        找出與指定書籤相似的書籤
+
+        Args:
+            bookmark: 書籤尚未被索引時，用於即時計算向量的書籤資料
+        """
+        started = time.perf_counter()
+        with self.user_lock(user_id):
+            shard = self.shard(user_id)
+            vector = shard.vector(bookmark_id)
+            if vector is None:
+                if not bookmark:
+                    return []
+                vector = self.encode([bookmark_text(bookmark, self.content_chars)])[0]
+
+            self.counters["searches"] += 1
+            results = shard.search(vector, k, self.min_score, exclude=(bookmark_id,))
+        self.latency.add(time.perf_counter() - started)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "encoder": self.encoder.name,
+            "dim": self.encoder.dim,
+            "loaded_shards": len(self._shards),
+            "cached_mb": round(sum(shard.nbytes for shard in self._shards.values()) / 1024 / 1024, 1),
+            "latency": self.latency.summary()
+        }
+
+def create_semantic_index() -> SemanticIndex:
+    """根據配置建立語意索引"""
+    return SemanticIndex(
+        root=settings.semantic_index_dir,
+        encoder_name=settings.semantic_encoder,
+        dim=settings.semantic_dim,
+        cache_bytes=settings.semantic_cache_mb * 1024 * 1024,
+        content_chars=settings.semantic_content_chars,
+        min_score=settings.semantic_min_score
+    )
+
+# 建立全域語意索引實例
+semantic_index = create_semantic_index()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 有界非同步任務執行器
+在應用事件迴圈上執行 LINE 背景工作（postback、連結處理），限制同時執行數與排隊數，
+記錄任務與錯誤，關閉時等待進行中的任務完成
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, Set, Coroutine
+
+from config import settings
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+class BoundedTaskExecutor:
+    """有界任務執行器"""
+
+    def __init__(self, name: str, max_concurrency: int, max_pending: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._accepting = True
+        self.active = 0
+
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "cancelled": 0}
+        self.errors: Counter = Counter()
+        self.run_time = LatencyWindow()
+
+    def submit(self, coro: Coroutine, name: Optional[str] = None) -> Optional[asyncio.Task]:
+        """
+        提交任務
+
+        Returns:
+            建立的任務；執行器已滿或正在關閉時回傳 None（coroutine 會被關閉）
+        """
+        if not self._accepting or len(self._tasks) >= self.max_concurrency + self.max_pending:
+            self.counters["rejected"] += 1
+            coro.close()
+            logger.warning(f"⚠️ {self.name} 執行器已滿，拒絕任務: {name or '未命名'}")
+            return None
+
+        self.counters["submitted"] += 1
+        task = asyncio.create_task(self._run(coro, name), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, coro: Coroutine, name: Optional[str]):
+        async with self._semaphore:
+            self.active += 1
+            started = time.time()
+            try:
+                await coro
+                self.counters["completed"] += 1
+            except asyncio.CancelledError:
+                self.counters["cancelled"] += 1
+                raise
+            except Exception as e:
+                self.counters["failed"] += 1
+                self.errors[type(e).__name__] += 1
+                logger.error(f"❌ {self.name} 任務失敗: {name or '未命名'} - {e}")
+            finally:
+                self.active -= 1
+                self.run_time.add(time.time() - started)
+
+    async def drain(self, timeout: float = 10.0):
+        """停止接受新任務，等待進行中的任務完成，逾時則取消"""
+        self._accepting = False
+        if not self._tasks:
+            return
+
+        logger.info(f"⏳ 等待 {len(self._tasks)} 個 {self.name} 任務完成...")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"⚠️ 已取消 {len(pending)} 個未完成的 {self.name} 任務")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "pending": max(0, len(self._tasks) - self.active),
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+            **self.counters,
+            "errors": dict(self.errors),
+            "run_time": self.run_time.summary()
+        }
+
+# 建立全域 LINE 背景任務執行器
+line_task_executor = BoundedTaskExecutor(
+    "LINE",
+    max_concurrency=settings.line_task_concurrency,
+    max_pending=settings.line_task_max_pending
+)
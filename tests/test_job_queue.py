@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+BriefCard - 工作佇列測試
+以暫存目錄中的 SQLite 工作佇列驗證關閉、重試與放棄逾期工作的行為
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue, SQLiteJobStore
+
+def create_queue(tmp_path, **kwargs) -> JobQueue:
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    return JobQueue(store, workers=1, stage_limits={"crawl": 1}, poll_interval=0.05, **kwargs)
+
+def test_stop_releases_running_job(tmp_path):
+    """關閉時仍在執行的工作放回佇列，不計入嘗試次數"""
+    async def scenario():
+        queue = create_queue(tmp_path)
+        started = asyncio.Event()
+
+        async def handler(job):
+            started.set()
+            await asyncio.Event().wait()
+
+        await queue.start(handler)
+        job_id = await queue.enqueue("bm-1", "https://example.com")
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop(timeout=0.2)
+
+        job = await queue.store.get(job_id)
+        queue.close()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert job["lease_owner"] is None
+
+def test_released_job_runs_on_next_start(tmp_path):
+    """放回佇列的工作在下次啟動時立即被處理"""
+    async def scenario():
+        queue = create_queue(tmp_path)
+        started = asyncio.Event()
+
+        async def hang(job):
+            started.set()
+            await asyncio.Event().wait()
+
+        await queue.start(hang)
+        job_id = await queue.enqueue("bm-1", "https://example.com")
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop(timeout=0.2)
+        queue.close()
+
+        queue = create_queue(tmp_path)
+        handled = []
+
+        async def handler(job):
+            handled.append(job["attempts"])
+
+        await queue.start(handler)
+        status = await queue.wait(job_id, timeout=5)
+        await queue.stop()
+        queue.close()
+        return status, handled
+
+    status, handled = asyncio.run(scenario())
+    assert status == "done"
+    assert handled == [1]
+
+def test_failed_job_is_retried(tmp_path):
+    """handler 拋出例外時依退避重試，直到成功"""
+    async def scenario():
+        queue = create_queue(tmp_path, retry_backoff=0.01)
+        attempts = []
+
+        async def handler(job):
+            attempts.append(job["attempts"])
+            if job["attempts"] < 2:
+                raise RuntimeError("暫時性錯誤")
+
+        await queue.start(handler)
+        job_id = await queue.enqueue("bm-1", "https://example.com")
+        status = await queue.wait(job_id, timeout=5)
+        await queue.stop()
+        queue.close()
+        return status, attempts
+
+    status, attempts = asyncio.run(scenario())
+    assert status == "done"
+    assert attempts == [1, 2]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+BriefCard - LINE Webhook 事件佇列
+Webhook 驗證簽名後只負責排入事件並立即回應 200，由固定數量的 consumer 處理，
+依 webhookEventId 去除重送事件，佇列滿時施加背壓並卸載負載
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+
+from config import settings
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+class WebhookEventQueue:
+    """有界的 webhook 事件佇列與 consumer pool"""
+
+    def __init__(self, max_size: int, workers: int, enqueue_timeout: float = 0.5,
+                 dedupe_ttl: int = 3600, dedupe_max_entries: int = 100000):
+        self.max_size = max_size
+        self.workers = max(1, workers)
+        self.enqueue_timeout = enqueue_timeout
+        self.dedupe_ttl = dedupe_ttl
+        self.dedupe_max_entries = dedupe_max_entries
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._handler: Optional[Callable[[Any], Awaitable[None]]] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+        self.counters = {
+            "received": 0, "enqueued": 0, "processed": 0, "failed": 0,
+            "duplicates": 0, "redeliveries": 0, "shed": 0
+        }
+        self.queue_wait = LatencyWindow()
+        self.handle_time = LatencyWindow()
+
+    async def start(self, handler: Callable[[Any], Awaitable[None]]):
+        """啟動 consumer pool"""
+        if self._worker_tasks:
+            return
+
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        for index in range(self.workers):
+            self._worker_tasks.append(asyncio.create_task(self._worker_loop(), name=f"webhook-consumer-{index}"))
+
+        logger.info(f"📮 Webhook 事件佇列已啟動: {self.workers} 個 consumer, 容量 {self.max_size}")
+
+    async def stop(self, timeout: float = 10.0):
+        """處理完佇列中剩餘的事件後停止"""
+        if not self._worker_tasks:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Webhook 佇列未在 {timeout}s 內清空，剩餘 {self._queue.qsize()} 個事件")
+
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks.clear()
+        logger.info("✅ Webhook 事件佇列已停止")
+
+    async def submit(self, events: List[Any]) -> bool:
+        """
+        排入一批 webhook 事件
+
+        Returns:
+            False 表示佇列已滿、事件被卸載（呼叫端應回應 503，讓 LINE 稍後重送）
+        """
+        accepted: List[Tuple[float, Any]] = []
+        for event in events:
+            self.counters["received"] += 1
+            if self._is_duplicate(event):
+                continue
+            accepted.append((time.time(), event))
+
+        for index, item in enumerate(accepted):
+            try:
+                # 佇列滿時先短暫等待（背壓），仍無空間才卸載
+                await asyncio.wait_for(self._queue.put(item), self.enqueue_timeout)
+                self.counters["enqueued"] += 1
+            except asyncio.TimeoutError:
+                shed = accepted[index:]
+                self.counters["shed"] += len(shed)
+                # 被卸載的事件之後會重送，不能記為已見過
+                for _, event in shed:
+                    self._forget(event)
+                logger.warning(f"⚠️ Webhook 佇列已滿，卸載 {len(shed)} 個事件")
+                return False
+
+        return True
+
+    def _event_id(self, event: Any) -> Optional[str]:
+        return getattr(event, "webhook_event_id", None)
+
+    def _is_duplicate(self, event: Any) -> bool:
+        """依 webhookEventId 判斷是否為重複事件（LINE 重送或逾時後的再次投遞）"""
+        delivery_context = getattr(event, "delivery_context", None)
+        is_redelivery = bool(getattr(delivery_context, "is_redelivery", False))
+        if is_redelivery:
+            self.counters["redeliveries"] += 1
+
+        event_id = self._event_id(event)
+        if not event_id:
+            return False
+
+        now = time.time()
+        self._expire(now)
+        if event_id in self._seen:
+            self.counters["duplicates"] += 1
+            logger.info(f"🔁 略過重複的 webhook 事件: {event_id} (重送: {is_redelivery})")
+            return True
+
+        self._seen[event_id] = now + self.dedupe_ttl
+        while len(self._seen) > self.dedupe_max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def _forget(self, event: Any):
+        event_id = self._event_id(event)
+        if event_id:
+            self._seen.pop(event_id, None)
+
+    def _expire(self, now: float):
+        while self._seen:
+            oldest_id, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[oldest_id]
+
+    async def _worker_loop(self):
+        while True:
+            received_at, event = await self._queue.get()
+            started = time.time()
+            self.queue_wait.add(started - received_at)
+            try:
+                await self._handler(event)
+                self.counters["processed"] += 1
+            except Exception as e:
+                self.counters["failed"] += 1
+                logger.error(f"❌ Webhook 事件處理失敗: {e}")
+            finally:
+                self.handle_time.add(time.time() - started)
+                self._queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "capacity": self.max_size,
+            "dedupe_entries": len(self._seen),
+            **self.counters,
+            "queue_wait": self.queue_wait.summary(),
+            "handle_time": self.handle_time.summary()
+        }
+
+# 建立全域 webhook 事件佇列實例
+webhook_queue = WebhookEventQueue(
+    max_size=settings.webhook_queue_size,
+    workers=settings.webhook_workers,
+    enqueue_timeout=settings.webhook_enqueue_timeout,
+    dedupe_ttl=settings.webhook_dedupe_ttl
+)